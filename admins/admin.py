@@ -3,10 +3,11 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import path
 from django.http import HttpResponseRedirect
+from edu_platform.uploads import UploadGuardAdminMixin
 from .models import Admin
 
 @admin.register(Admin)
-class AdminAdmin(admin.ModelAdmin):
+class AdminAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'permissions', 'admin_actions']
     list_filter = ['permissions']
     search_fields = ['name', 'email']
@@ -34,11 +35,13 @@ except:
     pass
 
 @main_admin.register(Student)
-class StudentAdmin(main_admin.ModelAdmin):
+class StudentAdmin(UploadGuardAdminMixin, main_admin.ModelAdmin):
     list_display = ['name', 'phone_number', 'grade', 'year', 'balance']  # ❌ إزالة student_messaging
     search_fields = ['name', 'phone_number']
     list_filter = ['grade', 'year']
     actions = ['delete_selected']
+    # أعمدة الرصيد تُحدث من سجل المحفظة فقط (students/wallet.py)
+    readonly_fields = ['balance', 'total_spent', 'bonus_balance']
     
     # ❌ تم حذف دالة student_messaging بالكامل
     # ❌ تم حذف الأزرار: ✉️ رسالة و 📨 عرض
@@ -58,7 +61,7 @@ except:
     pass
 
 @main_admin.register(Teacher)
-class TeacherAdmin(main_admin.ModelAdmin):
+class TeacherAdmin(UploadGuardAdminMixin, main_admin.ModelAdmin):
     list_display = ['name', 'phone_number', 'email', 'status', 'specialization', 'teacher_actions']
     list_filter = ['status', 'specialization', 'teaching_levels']
     search_fields = ['name', 'phone_number', 'email']
@@ -1,5 +1,13 @@
-from django.contrib import admin
+import os
+
+from django.contrib import admin, messages
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.urls import path, reverse
+from edu_platform.uploads import UploadGuardAdminMixin, upload_error
+from .importer import OutlineFormatError, ReplaceNotAllowed, run_import
 from .models import Course, CourseModule, Lesson
+from .search import matching_course_ids
 
 class LessonInline(admin.TabularInline):
     model = Lesson
@@ -11,11 +19,77 @@ class CourseModuleInline(admin.TabularInline):
     show_change_link = True
     inlines = [LessonInline]
 
-class CourseAdmin(admin.ModelAdmin):
-    list_display = ['title', 'teacher', 'category', 'price', 'status', 'students_count', 'average_rating']
+class CourseAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
+    list_display = ['title', 'teacher', 'category', 'price', 'status', 'students_count', 'lesson_count', 'average_rating']
+    readonly_fields = ['lesson_count', 'total_duration_minutes']
     list_filter = ['status', 'category', 'language', 'teacher']
     search_fields = ['title', 'description', 'category']
     inlines = [CourseModuleInline]
+    actions = ['import_outline_action']
+
+    def get_urls(self):
+        custom_urls = [
+            path('<int:course_id>/import-outline/', self.admin_site.admin_view(self.import_outline_view), name='courses_course_import_outline'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_outline_action(self, request, queryset):
+        """فتح صفحة استيراد الفهرس للكورس المحدد"""
+        if queryset.count() != 1:
+            self.message_user(request, 'اختر كورساً واحداً فقط للاستيراد', level=messages.ERROR)
+            return None
+        return HttpResponseRedirect(reverse('admin:courses_course_import_outline', args=[queryset.get().pk]))
+    import_outline_action.short_description = '📥 استيراد الوحدات والدروس من ملف (JSON/CSV)'
+
+    def import_outline_view(self, request, course_id):
+        """رفع ملف الفهرس والتحقق منه ثم كتابته دفعة واحدة"""
+        course = get_object_or_404(Course, id=course_id)
+        if not self.has_change_permission(request, course):
+            return HttpResponseRedirect(reverse('admin:courses_course_changelist'))
+
+        result = None
+        if request.method == 'POST':
+            outline_file = request.FILES.get('outline_file')
+            error = upload_error(request)
+            if error:
+                messages.error(request, error)
+            elif not outline_file:
+                messages.error(request, 'اختر ملف الفهرس أولاً')
+            else:
+                file_format = os.path.splitext(outline_file.name)[1].lower().lstrip('.')
+                try:
+                    result = run_import(
+                        course,
+                        outline_file.read(),
+                        file_format,
+                        replace=bool(request.POST.get('replace')),
+                        dry_run=bool(request.POST.get('dry_run')),
+                    )
+                except (OutlineFormatError, ReplaceNotAllowed) as e:
+                    messages.error(request, str(e))
+                else:
+                    if not request.POST.get('dry_run'):
+                        messages.success(request, f'تم استيراد {result["modules"]} وحدة و {result["lessons"]} درس')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'course': course,
+            'result': result,
+            'title': f'استيراد فهرس: {course.title}',
+        }
+        return render(request, 'admin/courses/course/import_outline.html', context)
+
+    def get_search_results(self, request, queryset, search_term):
+        """البحث من الفهرس النصي بدلاً من icontains - مع الرجوع للبحث العادي للكورسات غير المنشورة"""
+        if not search_term:
+            return queryset, False
+        course_ids = matching_course_ids(search_term)
+        indexed = queryset.filter(id__in=course_ids)
+        fallback, may_have_duplicates = super().get_search_results(
+            request, queryset.exclude(status='published'), search_term
+        )
+        return indexed | fallback, may_have_duplicates
     
     fieldsets = (
         ('البيانات الأساسية', {
@@ -28,17 +102,17 @@ class CourseAdmin(admin.ModelAdmin):
             'fields': ('teacher_percentage',)
         }),
         ('الإحصائيات', {
-            'fields': ('students_count', 'average_rating'),
+            'fields': ('students_count', 'average_rating', 'lesson_count', 'total_duration_minutes'),
             'classes': ('collapse',)
         }),
     )
 
-class CourseModuleAdmin(admin.ModelAdmin):
+class CourseModuleAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'course', 'order']
     list_filter = ['course']
     inlines = [LessonInline]
 
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'module', 'lesson_type', 'youtube_video_id', 'order', 'duration']  # أضفت youtube_video_id
     list_filter = ['lesson_type', 'module__course']
     search_fields = ['title', 'content']
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from django.core import checks
+        from edu_platform import caching, images
+        from . import signals  # noqa: F401
+        from .fragments import course_images_ready
+        checks.register(caching.check_shared_cache, checks.Tags.caches)
+        images.register(self.get_model('Course'), 'image', on_ready=course_images_ready)
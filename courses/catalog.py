@@ -0,0 +1,165 @@
+# courses/catalog.py - محرك كتالوج الكورسات (ترقيم بالمؤشر Keyset)
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Course
+
+CATALOG_PAGE_SIZE = 24
+CATALOG_CATEGORIES_CACHE_KEY = 'courses:catalog:categories'
+CATALOG_CATEGORIES_TIMEOUT = 600
+
+# أنواع ترتيب الكتالوج - كل ترتيب يطابق فهرساً مركباً في Course.Meta.indexes
+CATALOG_SORTS = {
+    'popular': ('-students_count', '-created_at', '-id'),
+    'trending': ('-trending_score', '-students_count', '-id'),
+}
+CATALOG_SORT_LABELS = (
+    ('popular', 'الأكثر اشتراكاً'),
+    ('trending', 'الأكثر رواجاً الآن'),
+)
+DEFAULT_SORT = 'popular'
+CATALOG_ORDERING = CATALOG_SORTS[DEFAULT_SORT]
+
+# الحقول المطلوبة لبطاقة الكورس فقط
+CARD_FIELDS = (
+    'id', 'title', 'description', 'category', 'price', 'image', 'language',
+    'students_count', 'trending_score', 'created_at', 'teacher__id', 'teacher__name',
+)
+
+_CURSOR_PARSERS = {
+    'students_count': int,
+    'trending_score': float,
+    'created_at': parse_datetime,
+    'id': int,
+}
+
+
+def _sort_fields(sort):
+    return [field.lstrip('-') for field in CATALOG_SORTS[sort]]
+
+
+def encode_cursor(course, sort=DEFAULT_SORT):
+    """تحويل موضع آخر كورس في الصفحة إلى مؤشر نصي آمن للرابط"""
+    payload = []
+    for field in _sort_fields(sort):
+        value = getattr(course, field)
+        payload.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort=DEFAULT_SORT):
+    """فك المؤشر - يرجع None لو المؤشر تالف أو لا يطابق نوع الترتيب"""
+    if not token:
+        return None
+    fields = _sort_fields(sort)
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw_values, list) or len(raw_values) != len(fields):
+            return None
+        values = [_CURSOR_PARSERS[field](value) for field, value in zip(fields, raw_values)]
+        if any(value is None for value in values):
+            return None
+        return values
+    except (ValueError, TypeError, json.JSONDecodeError):
+        return None
+
+
+def _after_cursor(fields, values):
+    """شرط "بعد هذا الموضع" لترتيب تنازلي على عدة أعمدة (keyset)"""
+    condition = Q()
+    for index, field in enumerate(fields):
+        step = Q(**{f'{field}__lt': values[index]})
+        for previous_field, previous_value in zip(fields[:index], values[:index]):
+            step &= Q(**{previous_field: previous_value})
+        condition |= step
+    return condition
+
+
+def _parse_price(value):
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        return None
+    return price if price >= 0 else None
+
+
+def parse_filters(params):
+    """استخراج فلاتر الكتالوج من QueryDict"""
+    language = params.get('language', '').strip()
+    if language not in dict(Course.LANGUAGE_CHOICES):
+        language = ''
+    sort = params.get('sort', '').strip()
+    if sort not in CATALOG_SORTS or sort == DEFAULT_SORT:
+        sort = ''
+    return {
+        'sort': sort,
+        'category': params.get('category', '').strip(),
+        'language': language,
+        'min_price': _parse_price(params.get('min_price')),
+        'max_price': _parse_price(params.get('max_price')),
+    }
+
+
+def filtered_queryset(filters):
+    """الكورسات المنشورة بعد تطبيق الفلاتر - بدون ترتيب أو ترقيم"""
+    queryset = Course.objects.filter(status='published')
+    if filters['category']:
+        queryset = queryset.filter(category=filters['category'])
+    if filters['language']:
+        queryset = queryset.filter(language=filters['language'])
+    if filters['min_price'] is not None:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if filters['max_price'] is not None:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    return queryset
+
+
+def catalog_page(filters, cursor=None, page_size=CATALOG_PAGE_SIZE):
+    """
+    صفحة واحدة من الكتالوج بتكلفة ثابتة مهما كبر عدد الكورسات:
+    شرط المؤشر يبدأ القراءة من الفهرس مباشرة بدلاً من OFFSET
+    """
+    queryset = filtered_queryset(filters)
+    sort = filters.get('sort') or DEFAULT_SORT
+
+    position = decode_cursor(cursor, sort)
+    if position:
+        queryset = queryset.filter(_after_cursor(_sort_fields(sort), position))
+
+    courses = list(
+        queryset.select_related('teacher')
+        .only(*CARD_FIELDS)
+        .order_by(*CATALOG_SORTS[sort])[:page_size + 1]
+    )
+
+    has_next = len(courses) > page_size
+    courses = courses[:page_size]
+
+    return {
+        'courses': courses,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(courses[-1], sort) if has_next else None,
+    }
+
+
+def catalog_categories():
+    """قائمة التصنيفات المتاحة لفلتر الكتالوج (مخزنة مؤقتاً)"""
+    return cache.get_or_set(
+        CATALOG_CATEGORIES_CACHE_KEY,
+        lambda: list(
+            Course.objects.filter(status='published')
+            .order_by('category')
+            .values_list('category', flat=True)
+            .distinct()
+        ),
+        CATALOG_CATEGORIES_TIMEOUT,
+    )
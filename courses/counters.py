@@ -0,0 +1,34 @@
+# courses/counters.py - عدادات الدروس والمدة المخزنة على الكورس
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Course, Lesson
+
+
+def apply_lesson_delta(course_id, lessons=0, minutes=0):
+    """تعديل العدادات بتحديث ذري واحد (F) - يُستدعى داخل معاملة حفظ الدرس"""
+    if not course_id or not (lessons or minutes):
+        return
+    Course.objects.filter(pk=course_id).update(
+        lesson_count=F('lesson_count') + lessons,
+        total_duration_minutes=F('total_duration_minutes') + minutes,
+    )
+
+
+def course_totals(course_ids=None):
+    """القيم الصحيحة من جدول الدروس {course_id: (lesson_count, total_minutes)}"""
+    lessons = Lesson.objects.all()
+    if course_ids is not None:
+        lessons = lessons.filter(module__course_id__in=course_ids)
+    rows = (
+        lessons.values('module__course_id')
+        .annotate(count=Count('id'), minutes=Coalesce(Sum('duration'), 0))
+        .values_list('module__course_id', 'count', 'minutes')
+    )
+    return {course_id: (count, minutes) for course_id, count, minutes in rows}
+
+
+def recount_course(course_id):
+    """إعادة حساب عدادات كورس واحد (بعد الاستيراد الجماعي أو نقل وحدة)"""
+    count, minutes = course_totals([course_id]).get(course_id, (0, 0))
+    Course.objects.filter(pk=course_id).update(lesson_count=count, total_duration_minutes=minutes)
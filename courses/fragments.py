@@ -0,0 +1,83 @@
+# courses/fragments.py - تخزين مؤقت للصفحة الرئيسية وبطاقات الكورسات
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from edu_platform.caching import get_or_refresh, mark_stale, peek
+
+from .catalog import CATALOG_SORTS
+from .models import Course
+
+HOME_COURSES_KEY = 'courses:home:grid'
+HOME_COURSES_COUNT = 6
+HOME_COURSES_TIMEOUT = 600
+HOME_COURSES_STALE_TIMEOUT = 3600
+
+# اسم الجزء في {% cache %} داخل courses/partials/course_card.html
+COURSE_CARD_FRAGMENT = 'course_card'
+
+
+def _build_home_courses():
+    courses = list(
+        Course.objects.filter(status='published')
+        .select_related('teacher')
+        .only('id', 'title', 'description', 'price', 'image', 'image_variants',
+              'teacher__id', 'teacher__name', 'teacher__profile_image', 'teacher__profile_image_variants')
+        .order_by(*CATALOG_SORTS['trending'])[:HOME_COURSES_COUNT]
+    )
+    return {
+        'html': render_to_string('courses/partials/home_courses.html', {'courses': courses}),
+        'course_ids': [course.id for course in courses],
+        'teacher_ids': {course.teacher_id for course in courses},
+    }
+
+
+def home_courses_html():
+    """شبكة كورسات الصفحة الرئيسية - نفس المحتوى لكل الزوار"""
+    home = get_or_refresh(
+        HOME_COURSES_KEY,
+        _build_home_courses,
+        HOME_COURSES_TIMEOUT,
+        stale_timeout=HOME_COURSES_STALE_TIMEOUT,
+    )
+    return mark_safe(home['html'])
+
+
+def course_card_key(course_id, image_variants):
+    # نفس مكونات {% cache %} في البطاقة - اكتمال نسخ الصورة يغير المفتاح وحده
+    return make_template_fragment_key(COURSE_CARD_FRAGMENT, [course_id, image_variants])
+
+
+def invalidate_course(course_id, published, image_variants=''):
+    """إبطال ما يعرض هذا الكورس فقط"""
+    cache.delete(course_card_key(course_id, image_variants))
+
+    # الكورس المنشور قد يدخل الصفحة الرئيسية، وغير المنشور يهم فقط لو كان معروضاً فيها
+    home = peek(HOME_COURSES_KEY)
+    if published or (home and course_id in home['course_ids']):
+        mark_stale(HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT)
+
+
+def invalidate_teacher(teacher_id):
+    """بطاقات الكورسات تعرض اسم المعلم وصورته"""
+    courses = Course.objects.filter(teacher_id=teacher_id).values_list('id', 'image_variants')
+    cache.delete_many([course_card_key(course_id, image_variants) for course_id, image_variants in courses])
+
+    home = peek(HOME_COURSES_KEY)
+    if home and teacher_id in home['teacher_ids']:
+        mark_stale(HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT)
+
+
+def course_images_ready(course_id):
+    """اكتملت نسخ صورة الكورس: البطاقة مفتاحها تغير، والصفحة الرئيسية تُعاد لو تعرضه"""
+    home = peek(HOME_COURSES_KEY)
+    if home and course_id in home['course_ids']:
+        mark_stale(HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT)
+
+
+def teacher_images_ready(teacher_id):
+    """اكتملت نسخ صورة المعلم: تظهر فقط في الصفحة الرئيسية"""
+    home = peek(HOME_COURSES_KEY)
+    if home and teacher_id in home['teacher_ids']:
+        mark_stale(HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT)
@@ -0,0 +1,268 @@
+# courses/importer.py - استيراد فهرس كورس كامل (وحدات ودروس) من JSON أو CSV دفعة واحدة
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+
+from enrollments.models import Enrollment
+
+from . import video_tokens
+from .counters import recount_course
+from .models import CourseModule, Lesson
+from .outline import bump_outline
+
+LESSON_TYPE_CHOICES = {value for value, _ in Lesson.LESSON_TYPES}
+
+# أعمدة ملف CSV - كل سطر درس، والدروس تُجمع في وحداتها حسب عنوان الوحدة
+CSV_COLUMNS = [
+    'module_title', 'module_description', 'module_order',
+    'lesson_title', 'lesson_type', 'content', 'video_url', 'youtube_video_id',
+    'external_link', 'lesson_order', 'duration',
+]
+
+_validate_url = URLValidator()
+
+
+class OutlineFormatError(ValueError):
+    """الملف نفسه غير قابل للقراءة (وليس خطأ في سطر معين)"""
+
+
+class ReplaceNotAllowed(ValueError):
+    """
+    الاستبدال يحذف الدروس، وحذفها يمسح تقدم الطلاب (LessonCompletion و WatchTime) بالـ CASCADE.
+    مسموح فقط لكورس بدون اشتراكات.
+    """
+
+
+def check_replace_allowed(course):
+    if Enrollment.objects.filter(course=course).exists():
+        raise ReplaceNotAllowed(
+            'لا يمكن استبدال الوحدات والدروس في كورس له اشتراكات (سيُمسح تقدم الطلاب) - '
+            'استورد بدون الاستبدال أو عدل الدروس الحالية'
+        )
+
+
+def _text(value, field, max_length=None, required=False):
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ValidationError(f'الحقل {field} مطلوب')
+    if max_length and len(value) > max_length:
+        raise ValidationError(f'الحقل {field} أطول من {max_length} حرف')
+    return value
+
+
+def _integer(value, field, default=0):
+    if value in (None, ''):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f'الحقل {field} يجب أن يكون رقماً صحيحاً')
+    if number < 0:
+        raise ValidationError(f'الحقل {field} لا يمكن أن يكون سالباً')
+    return number
+
+
+def _url(value, field):
+    value = _text(value, field)
+    if value:
+        try:
+            _validate_url(value)
+        except ValidationError:
+            raise ValidationError(f'الحقل {field} ليس رابطاً صحيحاً')
+    return value
+
+
+def clean_module(data, position):
+    return {
+        'title': _text(data.get('title'), 'title', 200, required=True),
+        'description': _text(data.get('description'), 'description'),
+        'order': _integer(data.get('order'), 'order', default=position),
+    }
+
+
+def clean_lesson(data, position):
+    lesson_type = _text(data.get('lesson_type'), 'lesson_type', required=True)
+    if lesson_type not in LESSON_TYPE_CHOICES:
+        raise ValidationError(f'نوع الدرس "{lesson_type}" غير معروف')
+    lesson = {
+        'title': _text(data.get('title'), 'title', 200, required=True),
+        'lesson_type': lesson_type,
+        'content': _text(data.get('content'), 'content'),
+        'video_url': _url(data.get('video_url'), 'video_url'),
+        'youtube_video_id': _text(data.get('youtube_video_id'), 'youtube_video_id', 50),
+        'external_link': _url(data.get('external_link'), 'external_link'),
+        'order': _integer(data.get('order'), 'order', default=position),
+        'duration': _integer(data.get('duration'), 'duration'),
+    }
+    if lesson_type == 'video' and not (lesson['youtube_video_id'] or lesson['video_url']):
+        raise ValidationError('درس الفيديو يحتاج youtube_video_id أو video_url')
+    return lesson
+
+
+def parse_json(raw):
+    """{"modules": [{"title": ..., "lessons": [...]}]} أو قائمة وحدات مباشرة"""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise OutlineFormatError(f'ملف JSON غير صالح: {e}')
+    if isinstance(data, dict):
+        data = data.get('modules')
+    if not isinstance(data, list):
+        raise OutlineFormatError('ملف JSON يجب أن يحتوي على قائمة modules')
+
+    modules = []
+    for module_index, module in enumerate(data, start=1):
+        if not isinstance(module, dict):
+            module = {}
+        lessons = module.get('lessons') or []
+        modules.append({
+            'location': f'الوحدة {module_index}',
+            'data': module,
+            'lessons': [
+                (f'الوحدة {module_index} / الدرس {lesson_index}', lesson if isinstance(lesson, dict) else {})
+                for lesson_index, lesson in enumerate(lessons if isinstance(lessons, list) else [], start=1)
+            ],
+        })
+    return modules
+
+
+def parse_csv(raw):
+    """سطر لكل درس - الوحدة تُعرّف بعنوانها وتُنشأ بترتيب أول ظهور لها"""
+    reader = csv.DictReader(io.StringIO(raw.lstrip('\ufeff')))
+    missing = {'module_title', 'lesson_title', 'lesson_type'} - set(reader.fieldnames or ())
+    if missing:
+        raise OutlineFormatError(f'أعمدة ناقصة في ملف CSV: {", ".join(sorted(missing))}')
+
+    modules = {}
+    for line_number, row in enumerate(reader, start=2):
+        title = (row.get('module_title') or '').strip()
+        module = modules.get(title)
+        if module is None:
+            module = modules[title] = {
+                'location': f'سطر {line_number}',
+                'data': {
+                    'title': title,
+                    'description': row.get('module_description'),
+                    'order': row.get('module_order'),
+                },
+                'lessons': [],
+            }
+        module['lessons'].append((f'سطر {line_number}', {
+            'title': row.get('lesson_title'),
+            'lesson_type': row.get('lesson_type'),
+            'content': row.get('content'),
+            'video_url': row.get('video_url'),
+            'youtube_video_id': row.get('youtube_video_id'),
+            'external_link': row.get('external_link'),
+            'order': row.get('lesson_order'),
+            'duration': row.get('duration'),
+        }))
+    return list(modules.values())
+
+
+def parse_outline(raw, file_format):
+    if isinstance(raw, bytes):
+        try:
+            raw = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise OutlineFormatError('الملف يجب أن يكون بترميز UTF-8')
+    if file_format == 'json':
+        return parse_json(raw)
+    if file_format == 'csv':
+        return parse_csv(raw)
+    raise OutlineFormatError(f'صيغة غير مدعومة: {file_format}')
+
+
+def validate_outline(modules):
+    """
+    التحقق من كل الوحدات والدروس - يرجع (الصالح, الأخطاء).
+    الدرس الخاطئ يُستبعد وحده، والوحدة الخاطئة تُستبعد مع دروسها.
+    """
+    valid = []
+    errors = []
+    for module_position, module in enumerate(modules, start=1):
+        try:
+            cleaned = clean_module(module['data'], module_position)
+        except ValidationError as e:
+            errors.append((module['location'], e.messages[0]))
+            if module['lessons']:
+                errors.append((module['location'], f'تم تخطي {len(module["lessons"])} درس في هذه الوحدة'))
+            continue
+
+        cleaned['lessons'] = []
+        for lesson_position, (location, data) in enumerate(module['lessons'], start=1):
+            try:
+                cleaned['lessons'].append(clean_lesson(data, lesson_position))
+            except ValidationError as e:
+                errors.append((location, e.messages[0]))
+        valid.append(cleaned)
+    return valid, errors
+
+
+def _create_modules(course, modules):
+    """إنشاء الوحدات الجديدة وإرجاعها بأرقامها (MySQL لا يرجع الأرقام من bulk_create)"""
+    existing_ids = set(CourseModule.objects.filter(course=course).values_list('id', flat=True))
+    objects = CourseModule.objects.bulk_create([
+        CourseModule(course=course, title=module['title'], description=module['description'], order=module['order'])
+        for module in modules
+    ])
+    if objects and objects[0].pk is None:
+        objects = list(
+            CourseModule.objects.filter(course=course).exclude(id__in=existing_ids).order_by('id')
+        )
+    return objects
+
+
+def import_outline(course, modules, replace=False, batch_size=500):
+    """
+    كتابة الفهرس الصالح في معاملة واحدة: bulk_create للوحدات ثم للدروس،
+    مع تشفير معرفات الفيديو دفعة واحدة بنفس المفتاح.
+    """
+    with transaction.atomic():
+        if replace:
+            check_replace_allowed(course)
+            CourseModule.objects.filter(course=course).delete()
+
+        module_objects = _create_modules(course, modules)
+
+        lessons = []
+        for module, module_object in zip(modules, module_objects):
+            for lesson in module['lessons']:
+                lessons.append(Lesson(module=module_object, **lesson))
+
+        video_lessons = [lesson for lesson in lessons if lesson.youtube_video_id]
+        encrypted = video_tokens.encrypt_many([lesson.youtube_video_id for lesson in video_lessons])
+        for lesson, value in zip(video_lessons, encrypted):
+            lesson.encrypted_video_id = value
+
+        Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+        # bulk_create لا يرسل إشارات - العدادات تُحسب مرة واحدة للكورس
+        recount_course(course.pk)
+        bump_outline(course.pk)
+
+    return {'modules': len(module_objects), 'lessons': len(lessons)}
+
+
+def run_import(course, raw, file_format, replace=False, dry_run=False):
+    """
+    قراءة + تحقق + كتابة - يرفع OutlineFormatError لو الملف نفسه غير صالح
+    و ReplaceNotAllowed لو طُلب الاستبدال في كورس له اشتراكات.
+    """
+    if replace:
+        check_replace_allowed(course)
+    modules, errors = validate_outline(parse_outline(raw, file_format))
+    if dry_run or not modules:
+        created = {'modules': 0, 'lessons': 0}
+    else:
+        created = import_outline(course, modules, replace=replace)
+    return {
+        'modules': created['modules'],
+        'lessons': created['lessons'],
+        'valid_modules': len(modules),
+        'valid_lessons': sum(len(module['lessons']) for module in modules),
+        'errors': errors,
+    }
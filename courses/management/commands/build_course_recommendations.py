@@ -0,0 +1,46 @@
+# courses/management/commands/build_course_recommendations.py
+from django.core.management.base import BaseCommand
+
+from courses.recommendations import RECOMMENDATION_COUNT, build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'حساب اقتراحات "طلاب اشتركوا أيضاً في" لكل الكورسات من الاشتراكات المشتركة (يُشغل دورياً)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=RECOMMENDATION_COUNT,
+            help=f'عدد الاقتراحات لكل كورس (افتراضي: {RECOMMENDATION_COUNT})',
+        )
+        parser.add_argument(
+            '--min-common',
+            type=int,
+            default=2,
+            help='أقل عدد طلاب مشتركين بين كورسين لاعتبارهما متشابهين (افتراضي: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='عدد الصفوف في كل دفعة إدخال (افتراضي: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='الحساب فقط دون حفظ',
+        )
+
+    def handle(self, *args, **options):
+        result = build_recommendations(
+            top_k=options['top_k'],
+            min_common=options['min_common'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        prefix = '🔍 (تجربة) ' if options['dry_run'] else '✅ '
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{result["recommendations"]} اقتراح لـ {result["courses"]} كورس '
+            f'من {result["enrollments"]} اشتراك'
+        ))
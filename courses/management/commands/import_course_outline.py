@@ -0,0 +1,59 @@
+# courses/management/commands/import_course_outline.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.importer import OutlineFormatError, ReplaceNotAllowed, run_import
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'استيراد وحدات ودروس كورس من ملف JSON أو CSV في معاملة واحدة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int, help='رقم الكورس')
+        parser.add_argument('path', help='مسار ملف الفهرس')
+        parser.add_argument(
+            '--format',
+            choices=['json', 'csv'],
+            help='صيغة الملف (افتراضياً حسب الامتداد)',
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='حذف الوحدات والدروس الحالية قبل الاستيراد (مرفوض لو للكورس اشتراكات حتى لا يُمسح تقدم الطلاب)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='التحقق من الملف وعرض الأخطاء دون حفظ',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f'الكورس {options["course_id"]} غير موجود')
+
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lower().lstrip('.')
+        with open(options['path'], 'rb') as f:
+            raw = f.read()
+
+        try:
+            result = run_import(course, raw, file_format, replace=options['replace'], dry_run=options['dry_run'])
+        except (OutlineFormatError, ReplaceNotAllowed) as e:
+            raise CommandError(str(e))
+
+        for location, message in result['errors']:
+            self.stderr.write(f'⚠️ {location}: {message}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'🔍 (تجربة) {result["valid_modules"]} وحدة و {result["valid_lessons"]} درس صالحة، '
+                f'و {len(result["errors"])} خطأ'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ تم استيراد {result["modules"]} وحدة و {result["lessons"]} درس إلى "{course.title}"، '
+                f'و {len(result["errors"])} خطأ'
+            ))
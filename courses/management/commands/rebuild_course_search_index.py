@@ -0,0 +1,21 @@
+# courses/management/commands/rebuild_course_search_index.py
+from django.core.management.base import BaseCommand
+
+from courses.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء فهرس البحث لكل الكورسات المنشورة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد مدخلات الفهرس في كل عملية إدخال (افتراضي: 500)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔍 بدء إعادة بناء فهرس البحث...')
+        indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ تمت فهرسة {indexed} كورس'))
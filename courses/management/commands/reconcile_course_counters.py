@@ -0,0 +1,49 @@
+# courses/management/commands/reconcile_course_counters.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.counters import course_totals
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'مطابقة عدد الدروس والمدة الإجمالية المخزنة على الكورسات مع جدول الدروس وإصلاح الفروق'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد الكورسات في كل دفعة تحديث (افتراضي: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='عرض الكورسات المختلفة دون حفظ',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        totals = course_totals()
+        fixed = []
+        courses = Course.objects.only('id', 'title', 'lesson_count', 'total_duration_minutes').order_by('id')
+        for course in courses.iterator(chunk_size=batch_size):
+            count, minutes = totals.get(course.pk, (0, 0))
+            if (course.lesson_count, course.total_duration_minutes) == (count, minutes):
+                continue
+            self.stdout.write(
+                f'🔧 {course.title}: الدروس {course.lesson_count} ← {count}، '
+                f'المدة {course.total_duration_minutes} ← {minutes}'
+            )
+            course.lesson_count = count
+            course.total_duration_minutes = minutes
+            fixed.append(course)
+
+        if fixed and not dry_run:
+            with transaction.atomic():
+                Course.objects.bulk_update(fixed, ['lesson_count', 'total_duration_minutes'], batch_size=batch_size)
+
+        prefix = '🔍 (تجربة) ' if dry_run else '✅ '
+        self.stdout.write(self.style.SUCCESS(f'{prefix}تم تصحيح {len(fixed)} كورس'))
@@ -0,0 +1,26 @@
+# courses/management/commands/refresh_trending.py
+from django.core.management.base import BaseCommand
+
+from courses.fragments import HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT
+from courses.trending import refresh_trending
+from edu_platform.caching import mark_stale
+
+
+class Command(BaseCommand):
+    help = 'تحديث درجات رواج الكورسات من الاشتراكات والتقييمات الجديدة منذ آخر تشغيل (يُشغل دورياً من cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد الكورسات في كل دفعة تحديث (افتراضي: 500)',
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_trending(batch_size=options['batch_size'])
+        mark_stale(HOME_COURSES_KEY, HOME_COURSES_STALE_TIMEOUT)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ تم تحديث درجات {result["courses"]} كورس '
+            f'(الاشتراكات والتقييمات حتى {result["until"]:%Y-%m-%d %H:%M})'
+        ))
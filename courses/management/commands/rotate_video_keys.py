@@ -0,0 +1,73 @@
+# courses/management/commands/rotate_video_keys.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses import video_tokens
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = 'إعادة تشفير معرفات فيديوهات الدروس بالمفتاح الأساسي بعد إضافة مفتاح جديد إلى VIDEO_ID_KEYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد الدروس في كل دفعة تحديث (افتراضي: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='عرض عدد الدروس التي ستتغير دون حفظ',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if video_tokens.get_cipher() is None:
+            self.stderr.write(self.style.ERROR('❌ لا يوجد مفتاح صالح في VIDEO_ID_KEYS'))
+            return
+
+        lessons = (
+            Lesson.objects.exclude(youtube_video_id='', encrypted_video_id='')
+            .only('id', 'youtube_video_id', 'encrypted_video_id')
+            .order_by('id')
+        )
+
+        rotated = failed = 0
+        batch = []
+        for lesson in lessons.iterator(chunk_size=batch_size):
+            new_value = self._rotate(lesson)
+            if new_value is None:
+                failed += 1
+                self.stderr.write(f'⚠️ تعذر إعادة تشفير الدرس {lesson.id}')
+                continue
+            lesson.encrypted_video_id = new_value
+            batch.append(lesson)
+            if len(batch) >= batch_size:
+                rotated += self._save(batch, dry_run)
+                batch = []
+        rotated += self._save(batch, dry_run)
+
+        video_tokens.reset()
+        prefix = '🔍 (تجربة) ' if dry_run else '✅ '
+        self.stdout.write(self.style.SUCCESS(f'{prefix}تمت إعادة تشفير {rotated} درس، وفشل {failed}'))
+
+    def _rotate(self, lesson):
+        if lesson.encrypted_video_id:
+            try:
+                return video_tokens.rotate(lesson.encrypted_video_id)
+            except Exception:
+                pass
+        # قيم قديمة محفوظة بدون تشفير (عندما لم يكن هناك مفتاح صالح)
+        if lesson.youtube_video_id:
+            return video_tokens.encrypt(lesson.youtube_video_id)
+        return None
+
+    def _save(self, batch, dry_run):
+        if batch and not dry_run:
+            with transaction.atomic():
+                Lesson.objects.bulk_update(batch, ['encrypted_video_id'])
+        return len(batch)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('teachers', '0002_alter_teacher_password'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', '-students_count', '-created_at', '-id'], name='course_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'category', '-students_count', '-created_at', '-id'], name='course_catalog_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'language', '-students_count', '-created_at', '-id'], name='course_catalog_lang_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from courses.search import course_terms
+
+    Course = apps.get_model('courses', 'Course')
+    CourseSearchTerm = apps.get_model('courses', 'CourseSearchTerm')
+    postings = []
+    for course in Course.objects.filter(status='published').only('id', 'title', 'category', 'description').iterator():
+        postings.extend(
+            CourseSearchTerm(course_id=course.pk, term=term, weight=weight)
+            for term, weight in course_terms(course).items()
+        )
+    CourseSearchTerm.objects.bulk_create(postings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='الكلمة')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='الوزن')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'كلمة بحث',
+                'verbose_name_plural': 'فهرس البحث',
+                'unique_together': {('term', 'course')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
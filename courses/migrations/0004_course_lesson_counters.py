@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+def backfill_lesson_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    totals = (
+        Lesson.objects.values('module__course_id')
+        .annotate(count=models.Count('id'), minutes=models.Sum('duration'))
+    )
+    for row in totals:
+        Course.objects.filter(pk=row['module__course_id']).update(
+            lesson_count=row['count'],
+            total_duration_minutes=row['minutes'] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_coursesearchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='عدد الدروس'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_duration_minutes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='المدة الإجمالية (دقائق)'),
+        ),
+        migrations.RunPython(backfill_lesson_counters, migrations.RunPython.noop),
+    ]
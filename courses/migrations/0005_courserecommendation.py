@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_lesson_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='درجة التشابه')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='الترتيب')),
+                ('computed_at', models.DateTimeField(verbose_name='تاريخ الحساب')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='courses.course')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course', verbose_name='الكورس المقترح')),
+            ],
+            options={
+                'verbose_name': 'اقتراح كورس',
+                'verbose_name_plural': 'اقتراحات الكورسات',
+                'ordering': ['rank'],
+                'unique_together': {('course', 'rank')},
+            },
+        ),
+    ]
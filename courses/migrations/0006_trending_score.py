@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_courserecommendation'),
+        ('teachers', '0003_teacher_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_enrollment_id', models.BigIntegerField(default=0)),
+                ('last_rating_id', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'نقطة تحديث الرواج',
+                'verbose_name_plural': 'نقطة تحديث الرواج',
+            },
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='درجة الرواج'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', '-trending_score', '-students_count', '-id'], name='course_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+def checkpoint_from_refresh(apps, schema_editor):
+    # كل ما وُجد وقت آخر تحديث تمت إضافته - النافذة التالية تبدأ منه
+    TrendingCheckpoint = apps.get_model('courses', 'TrendingCheckpoint')
+    TrendingCheckpoint.objects.update(consumed_until=models.F('refreshed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_course_outline_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingcheckpoint',
+            name='consumed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(checkpoint_from_refresh, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='trendingcheckpoint',
+            name='last_enrollment_id',
+        ),
+        migrations.RemoveField(
+            model_name='trendingcheckpoint',
+            name='last_rating_id',
+        ),
+    ]
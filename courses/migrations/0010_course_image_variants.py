@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+def mark_existing_variants(apps, schema_editor):
+    # الصور التي وُلدت نسخها قبل هذا الحقل (آخر نسخة تُكتب في generate_variants موجودة)
+    from edu_platform.images import FORMATS, VARIANTS, variant_name
+    Course = apps.get_model('courses', 'Course')
+    storage = Course._meta.get_field('image').storage
+    ready = [
+        Course(id=row_id, image_variants=name)
+        for row_id, name in Course.objects.exclude(image='').values_list('id', 'image').iterator()
+        if storage.exists(variant_name(name, list(VARIANTS)[-1], list(FORMATS)[-1]))
+    ]
+    Course.objects.bulk_update(ready, ['image_variants'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_trending_consumed_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='image_variants',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(mark_existing_variants, migrations.RunPython.noop),
+    ]
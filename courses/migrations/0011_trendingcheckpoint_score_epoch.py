@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+def epoch_from_refresh(apps, schema_editor):
+    # الدرجات الحالية متناقصة حتى آخر تحديث - أي أنها بالفعل بمقياس هذه النقطة
+    TrendingCheckpoint = apps.get_model('courses', 'TrendingCheckpoint')
+    TrendingCheckpoint.objects.update(score_epoch=models.F('refreshed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_course_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingcheckpoint',
+            name='score_epoch',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(epoch_from_refresh, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from teachers.models import Teacher
 from students.models import Student
-from django.conf import settings
-from cryptography.fernet import Fernet
-import base64
-import os # ✅ إضافة os للاستخدام في التشفيرse64
+from . import video_tokens
 
 class Course(models.Model):
     TEACHER_PERCENTAGE_CHOICES = [
@@ -30,6 +27,8 @@ class Course(models.Model):
     category = models.CharField(max_length=100, verbose_name="التصنيف والتخصص")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="سعر الكورس")
     image = models.ImageField(upload_to='courses/images/', verbose_name="الصورة الرئيسية")
+    # اسم الصورة التي اكتملت نسخها المصغرة (edu_platform/images.py) - يختلف عن image أثناء التوليد
+    image_variants = models.CharField(max_length=255, blank=True, editable=False)
     language = models.CharField(max_length=20, choices=LANGUAGE_CHOICES, verbose_name="لغة العرض")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name="الحالة")
     start_date = models.DateField(null=True, blank=True, verbose_name="تاريخ البدء")
@@ -39,15 +38,89 @@ class Course(models.Model):
     teacher_percentage = models.IntegerField(choices=TEACHER_PERCENTAGE_CHOICES, default=50, verbose_name="نسبة المعلم")
     students_count = models.IntegerField(default=0, verbose_name="عدد الطلاب المسجلين")
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, verbose_name="متوسط التقييم")
+    # عدادات محسوبة من الدروس - تُحدث من إشارات Lesson و CourseModule (انظر courses/counters.py)
+    lesson_count = models.IntegerField(default=0, editable=False, verbose_name="عدد الدروس")
+    total_duration_minutes = models.IntegerField(default=0, editable=False, verbose_name="المدة الإجمالية (دقائق)")
+    # درجة الرواج: اشتراكات وتقييمات حديثة بوزن يتناقص أسياً مع الوقت، مخزنة بمقياس نقطة مرجعية ثابتة
+    # (TrendingCheckpoint.score_epoch) - الترتيب بها صحيح مباشرة (انظر courses/trending.py)
+    trending_score = models.FloatField(default=0, editable=False, verbose_name="درجة الرواج")
+    # إصدار فهرس الكورس (courses/outline.py) - يزيد في نفس معاملة تعديل الوحدات أو الدروس
+    outline_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="إصدار الفهرس")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # حقول تُحدث بتحديثات ذرية فقط - save() العادي لا يكتبها حتى لا يرجعها لقيمة قديمة محملة في الذاكرة
+    DERIVED_FIELDS = ('lesson_count', 'total_duration_minutes', 'trending_score', 'outline_version', 'image_variants')
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'كورس'
         verbose_name_plural = 'الكورسات'
+        # فهارس الكتالوج - بنفس ترتيب courses.catalog.CATALOG_SORTS
+        indexes = [
+            models.Index(fields=['status', '-trending_score', '-students_count', '-id'], name='course_trending_idx'),
+            models.Index(fields=['status', '-students_count', '-created_at', '-id'], name='course_catalog_idx'),
+            models.Index(fields=['status', 'category', '-students_count', '-created_at', '-id'], name='course_catalog_cat_idx'),
+            models.Index(fields=['status', 'language', '-students_count', '-created_at', '-id'], name='course_catalog_lang_idx'),
+        ]
+
+
+class TrendingCheckpoint(models.Model):
+    """صف واحد: الاشتراكات والتقييمات قبل consumed_until أُضيفت لدرجات الرواج، ووقت آخر تحديث"""
+    consumed_until = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    # النقطة المرجعية لمقياس trending_score: الدرجة الفعلية الآن = المخزنة × 2^(-(الآن - score_epoch) / نصف العمر)
+    score_epoch = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'نقطة تحديث الرواج'
+        verbose_name_plural = 'نقطة تحديث الرواج'
+
+    def __str__(self):
+        return f"{self.consumed_until} @ {self.refreshed_at}"
+
+
+class CourseSearchTerm(models.Model):
+    """مدخل في الفهرس المعكوس للبحث - كلمة بعد التوحيد ووزنها في الكورس"""
+    term = models.CharField(max_length=64, verbose_name="الكلمة")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveIntegerField(default=1, verbose_name="الوزن")
+
+    class Meta:
+        verbose_name = 'كلمة بحث'
+        verbose_name_plural = 'فهرس البحث'
+        unique_together = ['term', 'course']
+
+    def __str__(self):
+        return f"{self.term} → {self.course_id}"
+
+
+class CourseRecommendation(models.Model):
+    """أقرب الكورسات لكورس معين حسب الاشتراك المشترك - يُبنى دورياً بأمر build_course_recommendations"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+', verbose_name="الكورس المقترح")
+    score = models.FloatField(verbose_name="درجة التشابه")
+    rank = models.PositiveSmallIntegerField(verbose_name="الترتيب")
+    computed_at = models.DateTimeField(verbose_name="تاريخ الحساب")
+
+    class Meta:
+        ordering = ['rank']
+        verbose_name = 'اقتراح كورس'
+        verbose_name_plural = 'اقتراحات الكورسات'
+        unique_together = ['course', 'rank']
+
+    def __str__(self):
+        return f"{self.course_id} → {self.recommended_id} ({self.score:.2f})"
 
 
 class CourseModule(models.Model):
@@ -64,6 +137,11 @@ class CourseModule(models.Model):
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        # نقل الوحدة لكورس آخر يعيد حساب عدادات الكورسين في نفس المعاملة
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Lesson(models.Model):
     LESSON_TYPES = [
@@ -98,34 +176,20 @@ class Lesson(models.Model):
         """تشفير Video ID تلقائياً عند الحفظ"""
         if self.youtube_video_id and not self.encrypted_video_id:
             self.encrypted_video_id = self.encrypt_video_id(self.youtube_video_id)
-        super().save(*args, **kwargs)
+        # الحفظ وتحديث عدادات الكورس (في الإشارات) في معاملة واحدة
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def encrypt_video_id(self, video_id):
         """تشفير Video ID"""
-        try:
-            # ⬇️ تأكد من أن المفتاح صالح
-            ENCRYPTION_KEY = os.environ.get('FERNET_KEY', 'A_VERY_INSECURE_DEFAULT_KEY_FOR_DEMO_ONLY') # ✅ يجب تغيير القيمة الافتراضية في الإنتاج
-            fernet = Fernet(ENCRYPTION_KEY)
-            encrypted = fernet.encrypt(video_id.encode())
-            return base64.urlsafe_b64encode(encrypted).decode()
-        except Exception as e:
-            # ⬇️ لو فشل التشفير، ارجع الـ video_id كما هو
-            print(f"Encryption error: {e}")
-            return video_id
+        return video_tokens.encrypt(video_id)
 
     def decrypt_video_id(self):
         """فك تشفير Video ID"""
         if not self.encrypted_video_id:
             return self.youtube_video_id  # ⬅️ ارجع الـ ID الأصلي
-            
-        try:
-            fernet = Fernet(settings.ENCRYPTION_KEY)
-            decoded = base64.urlsafe_b64decode(self.encrypted_video_id.encode())
-            return fernet.decrypt(decoded).decode()
-        except Exception as e:
-            # ⬇️ لو فشل فك التشفير، ارجع الـ ID الأصلي
-            print(f"Decryption error: {e}")
-            return self.youtube_video_id
+        # ⬇️ لو فشل فك التشفير، ارجع الـ ID الأصلي
+        return video_tokens.decrypt(self.encrypted_video_id) or self.youtube_video_id
 
     def get_decrypted_video_id(self):
         """الحصول على Video ID بعد فك التشفير"""
@@ -159,20 +223,14 @@ class Lesson(models.Model):
         return None
 
     def get_previous_lesson(self):
-        prev = Lesson.objects.filter(module=self.module, order__lt=self.order).order_by('-order').first()
-        if prev:
-            return prev
-        prev_module = CourseModule.objects.filter(course=self.module.course, order__lt=self.module.order).order_by('-order').first()
-        if prev_module:
-            return Lesson.objects.filter(module=prev_module).order_by('-order').first()
-        return None
+        """الدرس السابق (بيانات الفهرس المخزن مؤقتاً وليس كائن Lesson)"""
+        return self._outline_neighbour(0)
 
     def get_next_lesson(self):
-        next_lesson = Lesson.objects.filter(module=self.module, order__gt=self.order).order_by('order').first()
-        if next_lesson:
-            return next_lesson
-        next_module = CourseModule.objects.filter(course=self.module.course, order__gt=self.module.order).order_by('order').first()
-        if next_module:
-            return Lesson.objects.filter(module=next_module).order_by('order').first()
-        return None
-    
\ No newline at end of file
+        """الدرس التالي (بيانات الفهرس المخزن مؤقتاً وليس كائن Lesson)"""
+        return self._outline_neighbour(1)
+
+    def _outline_neighbour(self, side):
+        from .outline import get_outline, lesson_neighbours
+        # module محمل مسبقاً (select_related) يعني بدون أي استعلام
+        return lesson_neighbours(get_outline(self.module.course_id), self.id)[side]
@@ -0,0 +1,117 @@
+# courses/outline.py - فهرس الكورس المحسوب مسبقاً (الوحدات والدروس والتنقل)
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Course, CourseModule, Lesson
+
+OUTLINE_TIMEOUT = 60 * 60 * 24
+LESSON_TYPE_LABELS = dict(Lesson.LESSON_TYPES)
+
+
+def _outline_key(course_id, version):
+    return f'courses:outline:{course_id}:v{version}'
+
+
+def outline_version(course_id):
+    """رقم إصدار الفهرس الحالي من قاعدة البيانات - يتغير مع أي تعديل في الوحدات أو الدروس"""
+    return Course.objects.filter(pk=course_id).values_list('outline_version', flat=True).first() or 0
+
+
+def bump_outline(course_id):
+    """
+    إبطال الفهرس الحالي: زيادة الإصدار في نفس معاملة التعديل.
+    الإصدار الجديد يظهر لكل العمليات مع الـ commit فقط، فلا يُبنى فهرس من بيانات لم تُحفظ بعد.
+    """
+    Course.objects.filter(pk=course_id).update(outline_version=F('outline_version') + 1)
+
+
+def build_outline(course_id):
+    """بناء الفهرس من قاعدة البيانات باستعلامين فقط"""
+    modules = []
+    modules_by_id = {}
+    for module in (
+        CourseModule.objects.filter(course_id=course_id)
+        .order_by('order', 'id')
+        .values('id', 'title', 'description', 'order')
+    ):
+        module.update(lessons=[], lesson_count=0, duration=0)
+        modules.append(module)
+        modules_by_id[module['id']] = module
+
+    lesson_rows = (
+        Lesson.objects.filter(module__course_id=course_id)
+        .order_by('order', 'id')
+        .values('id', 'title', 'lesson_type', 'duration', 'order', 'module_id')
+    )
+    for lesson in lesson_rows:
+        lesson['lesson_type_display'] = LESSON_TYPE_LABELS.get(lesson['lesson_type'], lesson['lesson_type'])
+        module = modules_by_id[lesson['module_id']]
+        module['lessons'].append(lesson)
+        module['lesson_count'] += 1
+        module['duration'] += lesson['duration']
+
+    # ترتيب الدروس على مستوى الكورس: الوحدة أولاً ثم ترتيب الدرس داخلها
+    lessons = []
+    for module in modules:
+        for lesson in module['lessons']:
+            lesson['position'] = len(lessons)
+            lessons.append(lesson)
+
+    for lesson in lessons:
+        position = lesson['position']
+        lesson['previous_id'] = lessons[position - 1]['id'] if position > 0 else None
+        lesson['next_id'] = lessons[position + 1]['id'] if position + 1 < len(lessons) else None
+
+    return {
+        'course_id': course_id,
+        'modules': modules,
+        'lessons': lessons,
+        'positions': {lesson['id']: lesson['position'] for lesson in lessons},
+        'lesson_count': len(lessons),
+        'total_duration': sum(lesson['duration'] for lesson in lessons),
+    }
+
+
+def get_outline(course_id, version=None):
+    """
+    الفهرس من التخزين المؤقت - يُبنى فقط بعد تعديل الوحدات أو الدروس.
+    version: course.outline_version لو الكورس محمل بالفعل (بدون استعلام إضافي)
+    """
+    if version is None:
+        version = outline_version(course_id)
+    key = _outline_key(course_id, version)
+    outline = cache.get(key)
+    if outline is None:
+        outline = build_outline(course_id)
+        outline['version'] = version
+        cache.set(key, outline, OUTLINE_TIMEOUT)
+    return outline
+
+
+def outline_lesson(outline, lesson_id):
+    """بيانات درس من الفهرس (أو None لو الدرس ليس في الكورس)"""
+    position = outline['positions'].get(lesson_id)
+    return outline['lessons'][position] if position is not None else None
+
+
+def lesson_neighbours(outline, lesson_id):
+    """الدرس السابق والتالي بدون أي استعلام"""
+    lesson = outline_lesson(outline, lesson_id)
+    if lesson is None:
+        return None, None
+    position = lesson['position']
+    lessons = outline['lessons']
+    previous_lesson = lessons[position - 1] if position > 0 else None
+    next_lesson = lessons[position + 1] if position + 1 < len(lessons) else None
+    return previous_lesson, next_lesson
+
+
+def outline_as_json(outline):
+    """نسخة الفهرس لنقطة JSON"""
+    return {
+        'course_id': outline['course_id'],
+        'version': outline['version'],
+        'lesson_count': outline['lesson_count'],
+        'total_duration': outline['total_duration'],
+        'modules': outline['modules'],
+    }
@@ -0,0 +1,109 @@
+# courses/recommendations.py - "طلاب اشتركوا أيضاً في": تشابه الكورسات من الاشتراكات المشتركة (حساب دوري)
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from enrollments.models import Enrollment
+
+from .models import Course, CourseRecommendation
+
+RECOMMENDATION_COUNT = 6
+
+
+def enrollment_baskets(course_ids):
+    """كورسات كل طالب (مرتبة) - للكورسات المنشورة فقط، طالب واحد في الذاكرة كل مرة"""
+    rows = (
+        Enrollment.objects.filter(status__in=['active', 'completed'], course_id__in=course_ids)
+        .order_by('student_id')
+        .values_list('student_id', 'course_id')
+    )
+    for _, group in groupby(rows.iterator(chunk_size=10000), key=itemgetter(0)):
+        yield sorted({course_id for _, course_id in group})
+
+
+def co_occurrence(baskets):
+    """
+    الاشتراك المشترك C = Xᵀ·X مخزناً بشكل متناثر: عدد طلاب كل زوج كورسات (i < j)
+    وعدد طلاب كل كورس (القطر). الذاكرة تتبع الأزواج الموجودة فعلاً وليس (كورسات × كورسات).
+    """
+    pair_counts = Counter()
+    course_counts = Counter()
+    enrollments = 0
+    for basket in baskets:
+        enrollments += len(basket)
+        course_counts.update(basket)
+        pair_counts.update(combinations(basket, 2))
+    return pair_counts, course_counts, enrollments
+
+
+def cosine_similarity(pair_counts, course_counts, min_common=2):
+    """تشابه جيب التمام: C[i,j] / √(C[i,i]·C[j,j]) مع إهمال الأزواج قليلة الطلاب - {كورس: [(درجة، كورس)]}"""
+    similarity = defaultdict(list)
+    for (first, second), common in pair_counts.items():
+        if common < min_common:
+            continue
+        score = common / math.sqrt(course_counts[first] * course_counts[second])
+        similarity[first].append((score, second))
+        similarity[second].append((score, first))
+    return similarity
+
+
+def top_neighbours(similarity, top_k):
+    """أعلى K لكل كورس بالدرجة (والأقدم معرفاً عند التساوي) - {كورس: [(كورس، درجة)]}"""
+    return {
+        course_id: [
+            (neighbour, score)
+            for score, neighbour in heapq.nsmallest(top_k, candidates, key=lambda item: (-item[0], item[1]))
+        ]
+        for course_id, candidates in similarity.items()
+    }
+
+
+def build_recommendations(top_k=RECOMMENDATION_COUNT, min_common=2, batch_size=1000, dry_run=False):
+    """حساب الاقتراحات لكل الكورسات المنشورة واستبدال الجدول بالكامل في معاملة واحدة"""
+    course_ids = list(Course.objects.filter(status='published').order_by('id').values_list('id', flat=True))
+
+    pair_counts, course_counts, enrollments = co_occurrence(enrollment_baskets(course_ids))
+    neighbours = top_neighbours(cosine_similarity(pair_counts, course_counts, min_common), top_k)
+
+    computed_at = timezone.now()
+    recommendations = [
+        CourseRecommendation(
+            course_id=course_id,
+            recommended_id=neighbour,
+            score=score,
+            rank=rank,
+            computed_at=computed_at,
+        )
+        for course_id in course_ids
+        for rank, (neighbour, score) in enumerate(neighbours.get(course_id, ()), start=1)
+    ]
+
+    if not dry_run:
+        with transaction.atomic():
+            CourseRecommendation.objects.all().delete()
+            CourseRecommendation.objects.bulk_create(recommendations, batch_size=batch_size)
+
+    return {
+        'courses': len(course_ids),
+        'enrollments': enrollments,
+        'recommendations': len(recommendations),
+    }
+
+
+def recommended_courses(course_id, limit=RECOMMENDATION_COUNT):
+    """الكورسات المقترحة لصفحة الكورس - استعلام واحد على فهرس (course, rank)"""
+    return [
+        recommendation.recommended
+        for recommendation in CourseRecommendation.objects.filter(course_id=course_id, recommended__status='published')
+        .select_related('recommended', 'recommended__teacher')
+        .only(
+            'recommended', 'recommended__title', 'recommended__image', 'recommended__price',
+            'recommended__teacher', 'recommended__teacher__name',
+        )[:limit]
+    ]
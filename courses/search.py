@@ -0,0 +1,146 @@
+# courses/search.py - فهرس بحث نصي للكورسات يدعم العربية (بدون خدمة خارجية)
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .catalog import CARD_FIELDS
+from .models import Course, CourseSearchTerm
+
+SEARCH_PAGE_SIZE = 24
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+# وزن كل حقل في ترتيب النتائج
+FIELD_WEIGHTS = (
+    ('title', 3),
+    ('category', 2),
+    ('description', 1),
+)
+
+# التشكيل + الألف الخنجرية
+_TASHKEEL_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TATWEEL = '\u0640'
+_NON_WORD_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+_CHAR_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+
+_ARTICLE_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'ال')
+
+
+def normalize_arabic(text):
+    """توحيد أشكال الحروف وإزالة التشكيل والتطويل"""
+    if not text:
+        return ''
+    text = _TASHKEEL_RE.sub('', text).replace(_TATWEEL, '')
+    return text.translate(_CHAR_MAP).lower()
+
+
+def _strip_article(token):
+    for prefix in _ARTICLE_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 3:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text):
+    """تقسيم النص بعد التوحيد إلى كلمات قابلة للفهرسة"""
+    tokens = []
+    for token in _NON_WORD_RE.split(normalize_arabic(text)):
+        token = _strip_article(token.strip('_'))
+        if MIN_TERM_LENGTH <= len(token) <= MAX_TERM_LENGTH:
+            tokens.append(token)
+    return tokens
+
+
+def course_terms(course):
+    """أوزان الكلمات لكورس واحد {term: weight}"""
+    weights = Counter()
+    for field, field_weight in FIELD_WEIGHTS:
+        for token in tokenize(getattr(course, field, '')):
+            weights[token] += field_weight
+    return weights
+
+
+@transaction.atomic
+def index_course(course):
+    """تحديث مدخلات الفهرس لكورس واحد (الكورسات غير المنشورة تخرج من الفهرس)"""
+    CourseSearchTerm.objects.filter(course_id=course.pk).delete()
+    if course.status != 'published':
+        return 0
+
+    postings = [
+        CourseSearchTerm(course_id=course.pk, term=term, weight=weight)
+        for term, weight in course_terms(course).items()
+    ]
+    CourseSearchTerm.objects.bulk_create(postings)
+    return len(postings)
+
+
+def rebuild_index(batch_size=500):
+    """إعادة بناء الفهرس بالكامل - للاستخدام من أمر الإدارة"""
+    CourseSearchTerm.objects.all().delete()
+    indexed = 0
+    postings = []
+    courses = Course.objects.filter(status='published').only('id', 'title', 'category', 'description')
+    for course in courses.iterator(chunk_size=batch_size):
+        postings.extend(
+            CourseSearchTerm(course_id=course.pk, term=term, weight=weight)
+            for term, weight in course_terms(course).items()
+        )
+        indexed += 1
+        if len(postings) >= batch_size:
+            CourseSearchTerm.objects.bulk_create(postings)
+            postings = []
+    CourseSearchTerm.objects.bulk_create(postings)
+    return indexed
+
+
+def _terms_filter(terms):
+    """مطابقة تامة للكلمات + مطابقة بادئة لآخر كلمة (أثناء الكتابة)"""
+    condition = Q(term__in=terms)
+    if len(terms[-1]) >= 3:
+        condition |= Q(term__startswith=terms[-1])
+    return condition
+
+
+def matching_course_ids(query, limit=None, offset=0):
+    """
+    أرقام الكورسات المطابقة مرتبة حسب عدد الكلمات المطابقة ثم الوزن.
+    التجميع يتم على مدخلات الفهرس المطابقة فقط وليس على جدول الكورسات.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    ranked = (
+        CourseSearchTerm.objects.filter(_terms_filter(terms))
+        .values('course_id')
+        .annotate(matched=Count('term', distinct=True), score=Sum('weight'))
+        .order_by('-matched', '-score', '-course_id')
+        .values_list('course_id', flat=True)
+    )
+    if limit is not None:
+        ranked = ranked[offset:offset + limit]
+    return list(ranked)
+
+
+def search_courses(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """صفحة نتائج مرتبة من البحث"""
+    page = max(page, 1)
+    course_ids = matching_course_ids(query, limit=page_size + 1, offset=(page - 1) * page_size)
+    has_next = len(course_ids) > page_size
+    course_ids = course_ids[:page_size]
+
+    courses_by_id = Course.objects.filter(id__in=course_ids, status='published').select_related('teacher').only(*CARD_FIELDS).in_bulk()
+    return {
+        'courses': [courses_by_id[course_id] for course_id in course_ids if course_id in courses_by_id],
+        'page': page,
+        'has_next': has_next,
+    }
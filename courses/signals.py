@@ -0,0 +1,100 @@
+# courses/signals.py - مزامنة البيانات المشتقة من الكورسات
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from teachers.models import Teacher
+
+from .counters import apply_lesson_delta, recount_course
+from .fragments import invalidate_course, invalidate_teacher
+from .models import Course, CourseModule, Lesson
+from .outline import bump_outline
+from .search import index_course
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_index(sender, instance, raw=False, **kwargs):
+    """تحديث فهرس البحث للكورس بعد كل حفظ (الحذف يتم تلقائياً بـ CASCADE)"""
+    if raw:
+        return
+    index_course(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_fragments(sender, instance, **kwargs):
+    """إبطال بطاقة الكورس والصفحة الرئيسية عند تغيير الكورس أو حذفه"""
+    invalidate_course(instance.pk, instance.status == 'published', instance.image_variants)
+
+
+@receiver(post_save, sender=Teacher)
+def invalidate_teacher_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_teacher(instance.pk)
+
+
+@receiver(pre_save, sender=CourseModule)
+def remember_module_course(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._previous_course_id = (
+        CourseModule.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=CourseModule)
+def update_module_course(sender, instance, created=False, raw=False, **kwargs):
+    previous_course_id = getattr(instance, '_previous_course_id', None)
+    if not raw and previous_course_id and previous_course_id != instance.course_id:
+        # الوحدة انتقلت بدروسها لكورس آخر
+        recount_course(previous_course_id)
+        recount_course(instance.course_id)
+        bump_outline(previous_course_id)
+    bump_outline(instance.course_id)
+
+
+@receiver(post_delete, sender=CourseModule)
+def invalidate_module_outline(sender, instance, **kwargs):
+    # الدروس تُحذف قبل الوحدة (CASCADE) وكل درس يخصم نفسه من العدادات
+    bump_outline(instance.course_id)
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_course(sender, instance, raw=False, **kwargs):
+    """حفظ الكورس القديم ومدة الدرس القديمة لو اتنقل لوحدة في كورس آخر أو تغيرت مدته"""
+    instance._previous_course_id = instance._previous_duration = None
+    if raw or not instance.pk:
+        return
+    previous = Lesson.objects.filter(pk=instance.pk).values_list('module__course_id', 'duration').first()
+    if previous:
+        instance._previous_course_id, instance._previous_duration = previous
+
+
+def _lesson_course_id(instance):
+    return CourseModule.objects.filter(id=instance.module_id).values_list('course_id', flat=True).first()
+
+
+@receiver(post_save, sender=Lesson)
+def update_lesson_counters(sender, instance, created=False, raw=False, **kwargs):
+    course_id = _lesson_course_id(instance)
+    previous_course_id = getattr(instance, '_previous_course_id', None)
+    if not raw:
+        if previous_course_id is None:
+            apply_lesson_delta(course_id, 1, instance.duration)
+        elif previous_course_id != course_id:
+            apply_lesson_delta(previous_course_id, -1, -instance._previous_duration)
+            apply_lesson_delta(course_id, 1, instance.duration)
+        else:
+            apply_lesson_delta(course_id, 0, instance.duration - instance._previous_duration)
+
+    for affected in {course_id, previous_course_id}:
+        if affected:
+            bump_outline(affected)
+
+
+@receiver(post_delete, sender=Lesson)
+def remove_lesson_counters(sender, instance, **kwargs):
+    course_id = _lesson_course_id(instance)
+    apply_lesson_delta(course_id, -1, -instance.duration)
+    if course_id:
+        bump_outline(course_id)
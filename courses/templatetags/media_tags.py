@@ -0,0 +1,37 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from edu_platform.images import VARIANTS, variant_name, variants_ready
+
+register = template.Library()
+
+
+def _srcset(field_file, extension):
+    return format_html_join(
+        ', ', '{} {}w',
+        ((field_file.storage.url(variant_name(field_file.name, variant, extension)), width)
+         for variant, width in VARIANTS.items()),
+    )
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', variant='card', sizes='100vw', css_class='', style=''):
+    """
+    صورة بنسخ WebP/JPEG متعددة المقاسات:
+    {% responsive_image course.image alt=course.title sizes="(max-width: 768px) 100vw, 350px" %}
+    لو النسخ لم تُولد بعد تُعرض الصورة الأصلية
+    """
+    if not field_file:
+        return ''
+    if not variants_ready(field_file):
+        return format_html('<img src="{}" alt="{}" class="{}" style="{}" loading="lazy">', field_file.url, alt, css_class, style)
+
+    fallback = field_file.storage.url(variant_name(field_file.name, variant, 'jpg'))
+    return format_html(
+        '<picture style="display: contents;">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="lazy">'
+        '</picture>',
+        _srcset(field_file, 'webp'), sizes,
+        fallback, _srcset(field_file, 'jpg'), sizes, alt, css_class, style,
+    )
@@ -0,0 +1,117 @@
+# courses/trending.py - درجة رواج الكورسات بتناقص أسي مع الوقت وتحديث تزايدي
+#
+# الدرجة تُخزن بمقياس نقطة مرجعية ثابتة t0: كل حدث في الوقت t يضيف وزنه × 2^((t - t0) / نصف العمر).
+# التناقص يضرب كل الدرجات في نفس المعامل فلا يغير الترتيب - لذلك لا يُطبق على الجدول في كل تشغيل،
+# والتشغيل يلمس فقط الكورسات التي لها أحداث جديدة. الدرجة الفعلية عند الحاجة: current_score.
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from enrollments.models import Enrollment
+from ratings.models import CourseRating
+
+from .models import Course, TrendingCheckpoint
+
+ENROLLMENT_WEIGHT = 1.0
+# تقييم 5 نجوم = نصف وزن اشتراك
+RATING_WEIGHT = 0.5
+# الدرجات الفعلية الأصغر من هذا تصبح صفراً عند نقل النقطة المرجعية
+MIN_SCORE = 1e-4
+# نقل النقطة المرجعية (UPDATE واحد لكل الجدول) بعد هذا العدد من فترات نصف العمر -
+# حتى لا تكبر الأوزان بلا حد (2^128 ما زال بعيداً جداً عن حد double)
+REBASE_HALF_LIVES = 128
+# الأحداث الأقدم من هذا العدد من فترات نصف العمر لا تؤثر عملياً
+MAX_AGE_HALF_LIVES = 12
+# النافذة لا تشمل آخر دقائق حتى لا يفوتها اشتراك أو تقييم بدأت معاملته قبلها ولم تُثبت بعد
+TRENDING_LAG = timedelta(minutes=5)
+
+
+def half_life():
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72))
+
+
+def decay_factor(elapsed, period):
+    """نسبة ما يتبقى من الدرجة بعد مرور elapsed: 2^(-elapsed/period)"""
+    return 0.5 ** (max(elapsed.total_seconds(), 0) / period.total_seconds())
+
+
+def epoch_scale(at, epoch, period):
+    """وزن حدث في الوقت at بمقياس النقطة المرجعية: 2^((at - epoch)/period) - أكبر من 1 للأحداث بعدها"""
+    return 2 ** ((at - epoch).total_seconds() / period.total_seconds())
+
+
+def current_score(stored_score, epoch, now=None):
+    """الدرجة الفعلية الآن من القيمة المخزنة (للعرض - الترتيب لا يحتاجها)"""
+    if epoch is None:
+        return stored_score
+    return stored_score * decay_factor((now or timezone.now()) - epoch, half_life())
+
+
+def _new_contributions(rows, weight, epoch, period, contributions):
+    """إضافة مساهمة صفوف (course_id, التاريخ, القيمة) لكل كورس بمقياس النقطة المرجعية"""
+    for course_id, created_at, value in rows.iterator(chunk_size=5000):
+        contributions[course_id] += weight(value) * epoch_scale(created_at, epoch, period)
+
+
+def _rebase(epoch, now, period):
+    """نقل كل الدرجات لمقياس النقطة المرجعية now وتصفير ما أصبح مهملاً - نادر (كل REBASE_HALF_LIVES)"""
+    factor = decay_factor(now - epoch, period)
+    Course.objects.filter(trending_score__gt=0).update(trending_score=F('trending_score') * factor)
+    Course.objects.filter(trending_score__gt=0, trending_score__lt=MIN_SCORE).update(trending_score=0)
+
+
+def refresh_trending(batch_size=500):
+    """
+    تحديث تزايدي: إضافة مساهمة الاشتراكات (أو إعادة تفعيلها) والتقييمات في النافذة
+    [آخر نقطة، الآن - TRENDING_LAG) للكورسات المتأثرة فقط، بمقياس النقطة المرجعية (بدون تحديث للتناقص).
+    النوافذ متصلة بالوقت وليس بالأرقام: صف رقمه أصغر لكن ثُبت متأخراً لا يفوت طالما ثُبت خلال فترة التأخير.
+    """
+    period = half_life()
+    with transaction.atomic():
+        checkpoint, _ = TrendingCheckpoint.objects.select_for_update().get_or_create(pk=1)
+        now = timezone.now()
+
+        if checkpoint.score_epoch is None:
+            checkpoint.score_epoch = now
+        elif now - checkpoint.score_epoch > period * REBASE_HALF_LIVES:
+            _rebase(checkpoint.score_epoch, now, period)
+            checkpoint.score_epoch = now
+        epoch = checkpoint.score_epoch
+
+        # الأحداث الأقدم من هذا لا تؤثر عملياً - أول تشغيل لا يمسح الجدول كله
+        oldest = now - period * MAX_AGE_HALF_LIVES
+        since = max(checkpoint.consumed_until or oldest, oldest)
+        cutoff = now - TRENDING_LAG
+        contributions = defaultdict(float)
+        if since < cutoff:
+            _new_contributions(
+                Enrollment.objects.filter(activated_at__gte=since, activated_at__lt=cutoff)
+                .exclude(status='cancelled')
+                .values_list('course_id', 'activated_at', 'id'),
+                lambda _: ENROLLMENT_WEIGHT,
+                epoch, period, contributions,
+            )
+            _new_contributions(
+                CourseRating.objects.filter(created_at__gte=since, created_at__lt=cutoff)
+                .values_list('course_id', 'created_at', 'rating'),
+                lambda rating: RATING_WEIGHT * rating / 5,
+                epoch, period, contributions,
+            )
+            checkpoint.consumed_until = cutoff
+
+        courses = [Course(id=course_id) for course_id in contributions]
+        for course in courses:
+            course.trending_score = F('trending_score') + contributions[course.id]
+        Course.objects.bulk_update(courses, ['trending_score'], batch_size=batch_size)
+
+        checkpoint.refreshed_at = now
+        checkpoint.save()
+
+    return {
+        'courses': len(courses),
+        'until': checkpoint.consumed_until,
+    }
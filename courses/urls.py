@@ -7,6 +7,7 @@ urlpatterns = [
     # روابط الكورسات العامة
     path('', views.course_list, name='course_list'),
     path('<int:course_id>/', views.course_detail, name='course_detail'),
+    path('search/', views.course_search, name='course_search'),
     
     # روابط المعلم
     path('create/', views.course_create, name='course_create'),
@@ -19,4 +20,5 @@ urlpatterns = [
     
     # السطر الناقص علشان صفحة الدروس
     path('<int:course_id>/lessons/', views.course_lessons, name='course_lessons'),  # أضف هذا السطر
+    path('<int:course_id>/outline/', views.course_outline, name='course_outline'),
 ]
\ No newline at end of file
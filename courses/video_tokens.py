@@ -0,0 +1,119 @@
+# courses/video_tokens.py - تشفير معرفات فيديوهات الدروس بمفاتيح قابلة للتدوير
+import base64
+import logging
+import time
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+DECRYPTED_CACHE_SIZE = getattr(settings, 'VIDEO_ID_CACHE_SIZE', 4096)
+EMBED_TOKEN_SALT = 'courses.video_embed'
+
+
+@lru_cache(maxsize=4)
+def _build_cipher(keys):
+    fernets = []
+    for key in keys:
+        try:
+            fernets.append(Fernet(key))
+        except (ValueError, TypeError):
+            logger.error('Invalid video id key in VIDEO_ID_KEYS (position %d)', len(fernets))
+    return MultiFernet(fernets) if fernets else None
+
+
+def get_cipher():
+    """MultiFernet واحد لكل العملية - المفتاح الأول للتشفير والباقي لفك التشفير القديم"""
+    return _build_cipher(tuple(getattr(settings, 'VIDEO_ID_KEYS', ())))
+
+
+def reset():
+    """مسح الكائنات المخزنة بعد تغيير المفاتيح"""
+    _build_cipher.cache_clear()
+    _decrypt_cached.cache_clear()
+
+
+def encrypt(video_id):
+    """تشفير معرف الفيديو - لو لا يوجد مفتاح صالح يرجع المعرف كما هو"""
+    cipher = get_cipher()
+    if cipher is None:
+        logger.warning('VIDEO_ID_KEYS is not configured; storing video id unencrypted')
+        return video_id
+    token = cipher.encrypt(video_id.encode())
+    return base64.urlsafe_b64encode(token).decode()
+
+
+def encrypt_many(video_ids):
+    """تشفير دفعة من المعرفات بنفس الـ cipher - للاستيراد الجماعي"""
+    cipher = get_cipher()
+    if cipher is None:
+        logger.warning('VIDEO_ID_KEYS is not configured; storing %d video ids unencrypted', len(video_ids))
+        return list(video_ids)
+    return [base64.urlsafe_b64encode(cipher.encrypt(video_id.encode())).decode() for video_id in video_ids]
+
+
+@lru_cache(maxsize=DECRYPTED_CACHE_SIZE)
+def _decrypt_cached(ciphertext):
+    cipher = get_cipher()
+    if cipher is None:
+        return None
+    try:
+        return cipher.decrypt(base64.urlsafe_b64decode(ciphertext.encode())).decode()
+    except (InvalidToken, ValueError):
+        return None
+
+
+def decrypt(ciphertext):
+    """فك التشفير مع ذاكرة LRU محدودة حسب النص المشفر - يرجع None لو فشل"""
+    if not ciphertext:
+        return None
+    return _decrypt_cached(ciphertext)
+
+
+def rotate(ciphertext):
+    """إعادة تشفير قيمة قديمة بالمفتاح الأساسي الحالي"""
+    cipher = get_cipher()
+    if cipher is None:
+        raise ValueError('VIDEO_ID_KEYS is not configured')
+    token = cipher.rotate(base64.urlsafe_b64decode(ciphertext.encode()))
+    return base64.urlsafe_b64encode(token).decode()
+
+
+def embed_token_max_age():
+    return getattr(settings, 'VIDEO_EMBED_TOKEN_MAX_AGE', 1800)
+
+
+def heartbeat_token_max_age():
+    return getattr(settings, 'VIDEO_HEARTBEAT_TOKEN_MAX_AGE', 60 * 60 * 6)
+
+
+def sign_embed(student_id, lesson_id, ciphertext, enrollment_id=None, duration=0):
+    """
+    رمز قصير العمر موقع بـ HMAC يربط الطالب (واشتراكه) بالدرس ومعرف الفيديو المشفر.
+    duration: مدة الفيديو بالثواني من بيانات الدرس (0 = غير مسجلة) - نبضات المشغل تحسب التغطية منها وليس من العميل.
+    i: وقت الإصدار - أول نبضة لا تقبل ثواني مشاهدة أكثر من الوقت الفعلي منذ فتح الصفحة.
+    """
+    payload = {'s': student_id, 'l': lesson_id, 'v': ciphertext, 'd': duration or 0, 'i': int(time.time())}
+    if enrollment_id is not None:
+        payload['e'] = enrollment_id
+    return signing.dumps(payload, salt=EMBED_TOKEN_SALT, compress=True)
+
+
+def embed_claims(token, lesson_id, max_age=None):
+    """
+    محتوى الرمز بعد التحقق بدون أي استعلام.
+    يرفع SignatureExpired لو انتهت صلاحيته و BadSignature لو كان مزوراً أو لدرس آخر.
+    """
+    payload = signing.loads(token, salt=EMBED_TOKEN_SALT, max_age=max_age or embed_token_max_age())
+    if payload.get('l') != lesson_id:
+        raise signing.BadSignature('Token was issued for another lesson')
+    return payload
+
+
+def verify_embed(token, lesson_id):
+    """التحقق من رمز الإطار - يرجع (student_id, ciphertext)"""
+    payload = embed_claims(token, lesson_id)
+    return payload['s'], payload['v']
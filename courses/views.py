@@ -1,23 +1,42 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
+from django.core import signing
+from django.urls import reverse
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition
+from edu_platform.conditional import latest, make_etag, viewer_role
+from edu_platform.uploads import upload_error
 from .models import Course, CourseModule, Lesson
 from teachers.models import Teacher
 from students.models import Student
 from enrollments.models import Enrollment
+from enrollments.activity import record_lesson_view
 from django.conf import settings
+from django.utils.http import urlencode
+from django.db.models import Max
+from .catalog import CATALOG_SORT_LABELS, catalog_page, catalog_categories, parse_filters
+from .search import search_courses
+from .recommendations import recommended_courses
+from .fragments import home_courses_html
+from . import video_tokens
+from .outline import get_outline, lesson_neighbours, outline_as_json, outline_lesson
 
 
-# الصفحة الرئيسية
+# الصفحة الرئيسية - شبكة الكورسات من التخزين المؤقت
 def home(request):
-    courses = Course.objects.filter(status='published')[:6]  # آخر 6 كورسات
-    return render(request, 'home.html', {'courses': courses})
+    return render(request, 'home.html', {'home_courses_html': home_courses_html()})
 
 
 # إنشاء كورس جديد - خاص بالمعلم فقط
 @login_required
 def course_create(request):
     if request.method == 'POST':
+        # الصورة المرفوضة أثناء الاستقبال لا تصل لـ request.FILES
+        error = upload_error(request)
+        if error:
+            return render(request, 'courses/course_create.html', {'error': error})
+
         try:
             teacher = Teacher.objects.get(user=request.user)
 
@@ -43,16 +62,87 @@ def course_create(request):
     return render(request, 'courses/course_create.html')
 
 
-# عرض كل الكورسات المنشورة
+# عرض الكورسات المنشورة - صفحات بالمؤشر مع الفلاتر
 def course_list(request):
-    courses = Course.objects.filter(status='published')
-    return render(request, 'courses/course_list.html', {'courses': courses})
+    filters = parse_filters(request.GET)
+    page = catalog_page(filters, cursor=request.GET.get('cursor'))
+
+    # الفلاتر الفعالة فقط علشان روابط الصفحات
+    active_filters = {key: value for key, value in filters.items() if value not in (None, '')}
+    next_url = None
+    if page['has_next']:
+        next_url = '?' + urlencode({**active_filters, 'cursor': page['next_cursor']})
+
+    return render(request, 'courses/course_list.html', {
+        'courses': page['courses'],
+        'filters': filters,
+        'categories': catalog_categories(),
+        'language_choices': Course.LANGUAGE_CHOICES,
+        'sort_choices': CATALOG_SORT_LABELS,
+        'next_url': next_url,
+        'first_url': '?' + urlencode(active_filters) if active_filters else '?',
+        'is_first_page': not request.GET.get('cursor'),
+    })
+
+
+# البحث في الكورسات من الفهرس النصي
+def course_search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = int(request.GET.get('page', 1))
+    except ValueError:
+        page_number = 1
+
+    results = search_courses(query, page=page_number) if query else {'courses': [], 'page': 1, 'has_next': False}
+
+    next_url = None
+    if results['has_next']:
+        next_url = '?' + urlencode({'q': query, 'page': results['page'] + 1})
+
+    return render(request, 'courses/course_list.html', {
+        'courses': results['courses'],
+        'search_query': query,
+        'is_search': True,
+        'next_url': next_url,
+        'first_url': '?' + urlencode({'q': query}),
+        'is_first_page': results['page'] == 1,
+    })
+
+
+def course_detail_etag(request, course_id):
+    """
+    ETag من تواريخ تعديل الكورس ومعلمه واقتراحاته + العدادات المعروضة - استعلام واحد بالمفتاح الأساسي.
+    العدادات تتغير بتحديثات ذرية لا تلمس updated_at، لذلك لا يوجد Last-Modified (If-Modified-Since وحده يرجع 304 بأعداد قديمة).
+    """
+    row = (
+        Course.objects.filter(id=course_id)
+        .annotate(recommendations_at=Max('recommendations__computed_at'))
+        .values_list(
+            'updated_at', 'teacher__updated_at', 'recommendations_at',
+            'students_count', 'lesson_count', 'total_duration_minutes',
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    last_modified = latest(*row[:3])
+    return make_etag(
+        'course', course_id, last_modified.isoformat(), *row[3:],
+        # الصفحة تختلف حسب نوع الزائر (زر الاشتراك والتقييم للطالب)
+        viewer_role(request),
+        # نموذج التقييم يحمل رمز CSRF - بعد تغيير سر الرمز (تسجيل الدخول) لا يُعاد استخدام صفحة قديمة
+        request.META.get('CSRF_COOKIE', ''),
+    )
 
 
 # صفحة تفاصيل الكورس
+@condition(etag_func=course_detail_etag)
 def course_detail(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    return render(request, 'courses/course_detail.html', {'course': course})
+    return render(request, 'courses/course_detail.html', {
+        'course': course,
+        'recommended_courses': recommended_courses(course.id),
+    })
 
 
 # صفحة كورسات المعلم
@@ -79,8 +169,7 @@ def course_dashboard(request, course_id):
 
 # عرض صفحة الدروس داخل كورس معيّن
 def course_lessons(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    modules = course.modules.prefetch_related('lessons').all()
+    course = get_object_or_404(Course.objects.select_related('teacher'), id=course_id)
 
     is_enrolled = False
     student = None
@@ -101,21 +190,25 @@ def course_lessons(request, course_id):
     if not is_enrolled:
         return redirect('course_detail', course_id=course.id)
 
-    lessons_by_module = []
-    for module in modules:
-        lessons_by_module.append({
-            'module': module,
-            'lessons': module.lessons.all()
-        })
+    # الوحدات والدروس من الفهرس المخزن مؤقتاً
+    outline = get_outline(course.id, course.outline_version)
 
     return render(request, 'courses/course_lessons.html', {
         'course': course,
-        'modules': modules,
-        'lessons_by_module': lessons_by_module,
+        'modules': outline['modules'],
+        'outline': outline,
         'student': student
     })
 
 
+# فهرس الكورس بصيغة JSON
+def course_outline(request, course_id):
+    version = Course.objects.filter(id=course_id).values_list('outline_version', flat=True).first()
+    if version is None:
+        return JsonResponse({'error': 'الكورس غير موجود'}, status=404)
+    return JsonResponse(outline_as_json(get_outline(course_id, version)))
+
+
 # عرض تفاصيل درس معيّن (صفحة الفيديو)
 def lesson_detail(request, course_id, lesson_id):
     course = get_object_or_404(Course, id=course_id)
@@ -137,19 +230,19 @@ def lesson_detail(request, course_id, lesson_id):
 
             has_access = bool(enrollment)
 
-            # تحديث تقدم الطالب
-            if has_access and enrollment:
-                enrollment.mark_lesson_completed(lesson.id)
+            # تسجيل المشاهدة في ملف محلي - التقدم يُحدث دفعة واحدة بأمر flush_lesson_views
+            # (دروس الفيديو ذات المدة المسجلة تكتمل من تغطية المشاهدة الفعلية عبر نبضات المشغل)
+            if has_access and enrollment and (lesson.lesson_type != 'video' or not lesson.duration):
+                record_lesson_view(enrollment.id, lesson.id)
 
             if has_access and lesson.lesson_type == 'video':
-                # استخدام الـ Video ID المشفر
+                # الاشتراك تم التحقق منه بالفعل - فك التشفير مرة واحدة فقط
                 video_id = lesson.get_decrypted_video_id()
                 if video_id:
-                    has_video_access, message = lesson.check_video_access(student)
-                    if has_video_access:
-                        video_url = f"https://www.youtube-nocookie.com/embed/{video_id}?rel=0&modestbranding=1"
-                    else:
-                        access_message = message
+                    # رابط موقع للإطار - صفحة الفيديو تتحقق منه بدون قاعدة البيانات
+                    ciphertext = lesson.encrypted_video_id if video_tokens.decrypt(lesson.encrypted_video_id) else video_id
+                    token = video_tokens.sign_embed(student.id, lesson.id, ciphertext, enrollment.id, lesson.duration * 60)
+                    video_url = f"{reverse('courses:protected_video', args=[lesson.id])}?t={token}"
             elif not has_access:
                 access_message = "يجب الاشتراك في الكورس لمشاهدة الدروس"
 
@@ -158,9 +251,17 @@ def lesson_detail(request, course_id, lesson_id):
     else:
         access_message = "يجب تسجيل الدخول أولاً"
 
+    outline = get_outline(course.id, course.outline_version)
+    previous_lesson, next_lesson = lesson_neighbours(outline, lesson.id)
+
     return render(request, 'courses/lesson_detail.html', {
         'course': course,
         'lesson': lesson,
+        'lesson_entry': outline_lesson(outline, lesson.id),
+        'module_title': next((m['title'] for m in outline['modules'] if m['id'] == lesson.module_id), ''),
+        'previous_lesson': previous_lesson,
+        'next_lesson': next_lesson,
+        'lesson_count': course.lesson_count,
         'student': student,  # ⬅️ ده اللي كان ناقص
         'has_access': has_access,
         'video_url': video_url,
@@ -168,19 +269,43 @@ def lesson_detail(request, course_id, lesson_id):
     })
 
 
+def _embed_response(video_id, lesson_id, token=None):
+    # بدون request حتى لا تعمل معالجات السياق (جلسة/قاعدة بيانات) في المسار السريع
+    html = render_to_string('courses/video_embed.html', {
+        'video_id': video_id,
+        'lesson_id': lesson_id,
+        'token': token,
+        'heartbeat_url': reverse('watch_heartbeat'),
+    })
+    return HttpResponse(html)
+
+
 # ✅ صفحة الفيديو المحمي
-@login_required
 def protected_video(request, lesson_id):
+    # المسار السريع: رمز موقع من lesson_detail - تحقق حسابي + قراءة الجلسة فقط
     student_id = request.session.get('student_id')
+    token = request.GET.get('t')
+    if token:
+        try:
+            token_student_id, ciphertext = video_tokens.verify_embed(token, lesson_id)
+            # الرمز ليس bearer: رابط مسرب لا يعمل إلا في جلسة الطالب الذي صدر له
+            if student_id and token_student_id == student_id:
+                video_id = video_tokens.decrypt(ciphertext) or ciphertext
+                return _embed_response(video_id, lesson_id, token)
+        except signing.SignatureExpired:
+            pass  # انتهت صلاحية الرمز - نرجع للتحقق الكامل
+        except signing.BadSignature:
+            return HttpResponseForbidden("<h2>🚫 رابط الفيديو غير صالح.</h2>")
+
     if not student_id:
         return HttpResponse("<h2>🚫 يجب تسجيل الدخول كطالب لمشاهدة الفيديو.</h2>")
 
     student = get_object_or_404(Student, id=student_id)
-    lesson = get_object_or_404(Lesson, id=lesson_id)
+    lesson = get_object_or_404(Lesson.objects.select_related('module'), id=lesson_id)
 
     enrollment = Enrollment.objects.filter(
         student=student,
-        course=lesson.module.course,
+        course_id=lesson.module.course_id,
         status='active'
     ).first()
 
@@ -190,14 +315,9 @@ def protected_video(request, lesson_id):
     # استخدام الـ Video ID المشفر
     video_id = lesson.get_decrypted_video_id()
     if video_id:
-        embed_url = f"https://www.youtube-nocookie.com/embed/{video_id}?rel=0&modestbranding=1"
-        html = f"""
-        <html><body style='margin:0'>
-        <iframe src="{embed_url}" width="100%" height="100%"
-        frameborder="0" allowfullscreen
-        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture">
-        </iframe></body></html>
-        """
-        return HttpResponse(html)
-
-    return HttpResponse("<h3>⚠️ لا يوجد فيديو متاح لهذا الدرس.</h3>")
\ No newline at end of file
+        # رمز جديد لنبضات المشغل بعد التحقق الكامل
+        ciphertext = lesson.encrypted_video_id if video_tokens.decrypt(lesson.encrypted_video_id) else video_id
+        token = video_tokens.sign_embed(student.id, lesson.id, ciphertext, enrollment.id, lesson.duration * 60)
+        return _embed_response(video_id, lesson.id, token)
+
+    return HttpResponse("<h3>⚠️ لا يوجد فيديو متاح لهذا الدرس.</h3>")
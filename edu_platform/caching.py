@@ -0,0 +1,82 @@
+# edu_platform/caching.py - أدوات تخزين مؤقت مشتركة بين التطبيقات
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+# كاش داخل ذاكرة العملية: الإبطال من عملية (أو من cron) لا يصل لباقي العمليات
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+LOCK_TIMEOUT = 30
+MISS_WAIT_SECONDS = 2
+MISS_POLL_INTERVAL = 0.05
+
+
+def get_or_refresh(key, builder, timeout, stale_timeout=300, lock_timeout=LOCK_TIMEOUT):
+    """
+    تخزين مؤقت بأسلوب stale-while-revalidate:
+    - القيمة الحديثة ترجع مباشرة
+    - القيمة القديمة ترجع فوراً وطلب واحد فقط يعيد بناءها
+    - عند عدم وجود قيمة ينتظر باقي الطلبات أول من يبنيها بدل تكرار البناء
+    """
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry is not None:
+        value, fresh_until = entry
+        if now < fresh_until or not cache.add(f'{key}:lock', 1, lock_timeout):
+            return value
+        return _rebuild(key, builder, timeout, stale_timeout)
+
+    if cache.add(f'{key}:lock', 1, lock_timeout):
+        return _rebuild(key, builder, timeout, stale_timeout)
+
+    # طلب آخر يبني القيمة الآن - انتظر نتيجته لفترة قصيرة
+    deadline = now + MISS_WAIT_SECONDS
+    while time.time() < deadline:
+        time.sleep(MISS_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return builder()
+
+
+def _rebuild(key, builder, timeout, stale_timeout):
+    try:
+        value = builder()
+        cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+        return value
+    finally:
+        cache.delete(f'{key}:lock')
+
+
+def peek(key):
+    """القيمة المخزنة (حديثة أو قديمة) بدون إعادة بناء"""
+    entry = cache.get(key)
+    return entry[0] if entry is not None else None
+
+
+def mark_stale(key, stale_timeout=300):
+    """تعليم القيمة كقديمة - تظل تُعرض حتى يعيد طلب واحد بناءها"""
+    entry = cache.get(key)
+    if entry is not None:
+        cache.set(key, (entry[0], 0), stale_timeout)
+
+
+def is_shared_cache():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """mark_stale وأرقام الإصدارات لا تعمل بين العمليات مع كاش محلي لكل عملية"""
+    if is_shared_cache():
+        return []
+    return [checks.Error(
+        'CACHES["default"] must be shared between processes.',
+        hint='Use Redis or Memcached (RedisCache / PyMemcacheCache) instead of LocMemCache/DummyCache.',
+        id='edu_platform.E001',
+    )]
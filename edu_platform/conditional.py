@@ -0,0 +1,40 @@
+# edu_platform/conditional.py - أدوات ETag / Last-Modified للطلبات الشرطية
+import hashlib
+
+from django.utils.http import parse_etags
+
+
+def viewer_role(request):
+    """نوع الزائر - الصفحات التي تختلف حسب الجلسة تضيفه إلى الـ ETag"""
+    if request.session.get('student_id'):
+        return 'student'
+    if request.session.get('teacher_id'):
+        return 'teacher'
+    return 'anonymous'
+
+
+def make_etag(*parts):
+    """ETag قصير من مكونات رخيصة (تواريخ التحديث، أعداد، أكبر رقم)"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def latest(*values):
+    """أحدث تاريخ من قائمة قد تحتوي على None"""
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def etag_matches(request, etag):
+    """
+    If-None-Match يطابق الـ ETag (مقارنة ضعيفة لكل قيمة كاملة كما في @condition، أو *).
+    للدوال التي تحمل الـ ETag مع المحتوى نفسه فلا يناسبها etag_func منفصل.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if candidates == ['*']:
+        return True
+    target = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == target for candidate in candidates)
@@ -0,0 +1,154 @@
+# edu_platform/idempotency.py - مفاتيح Idempotency-Key: إعادة نفس الطلب ترجع الاستجابة الأولى بدون تكرار العمل
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from students.models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+# مفاتيح الجلسة التي تحدد صاحب الطلب - المفتاح بدون مستخدم مسجل مرفوض
+SESSION_IDENTITIES = ('student_id', 'teacher_id')
+# أخطاء 4xx قد تنجح عند الإعادة (تسجيل دخول، حد طلبات، تعارض مؤقت) - لا تُحفظ
+TRANSIENT_CLIENT_ERRORS = {401, 403, 408, 409, 423, 425, 429}
+
+
+def default_ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def _scope(request, view_name):
+    """
+    النطاق: المستخدم المسجل في الجلسة + الدالة - أو None بدون مستخدم.
+    (كوكي الجلسة وحده لا يكفي: كل العملاء بدون جلسة يتشاركون نفس النطاق)
+    """
+    for identity in SESSION_IDENTITIES:
+        user_id = request.session.get(identity)
+        if user_id:
+            return hashlib.sha256(f'{identity}:{user_id}|{view_name}'.encode()).hexdigest()
+    return None
+
+
+def _should_store(response):
+    """
+    تُحفظ النتائج النهائية فقط: النجاح وأخطاء العميل الثابتة.
+    أخطاء الخادم والمتدفقة والمؤقتة، وأي JSON فيه success=false أو status=error
+    (الدوال هنا ترجع أخطاءها بـ 200) تُنفذ من جديد عند الإعادة.
+    """
+    if response.streaming:
+        return False
+    if 400 <= response.status_code < 500:
+        return response.status_code not in TRANSIENT_CLIENT_ERRORS
+    if not 200 <= response.status_code < 300:
+        return False
+    if response.get('Content-Type', '').startswith('application/json'):
+        try:
+            data = json.loads(response.content)
+        except ValueError:
+            return False
+        if isinstance(data, dict) and (data.get('success') is False or data.get('status') == 'error'):
+            return False
+    return True
+
+
+def _fingerprint(request, args, kwargs):
+    """بصمة الطلب - نفس المفتاح مع بيانات مختلفة خطأ من العميل وليس إعادة"""
+    digest = hashlib.sha256(request.body)
+    digest.update(repr((request.path, args, sorted(kwargs.items()))).encode())
+    return digest.hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return JsonResponse(
+            {'success': False, 'message': 'مفتاح Idempotency-Key مستخدم مع طلب مختلف'},
+            status=422,
+        )
+    response = HttpResponse(bytes(record.content), status=record.status_code, content_type=record.content_type)
+    response['Idempotency-Replayed'] = 'true'
+    return response
+
+
+def _claim(scope, key, fingerprint, expires_at):
+    """
+    حجز المفتاح بـ INSERT داخل معاملة الطلب - يرجع (الصف, None) أو (None, الصف الموجود).
+    طلب مكرر متزامن ينتظر عند المفتاح الفريد حتى تُثبت معاملة الأول أو تُلغى.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=fingerprint, status_code=0, expires_at=expires_at,
+                ), None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if existing is not None and existing.expires_at > timezone.now():
+                return None, existing
+            # مفتاح منتهي (أو حُذف للتو) - نحذفه ونحجز من جديد مرة واحدة
+            IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=timezone.now()).delete()
+    raise IntegrityError('Could not claim idempotency key')
+
+
+def idempotent(ttl=None):
+    """
+    ديكوريتور لطلبات POST: أول طلب بمفتاح معين يُنفذ وتُحفظ استجابته في جدول IdempotencyKey
+    في نفس المعاملة لمدة ttl، وأي إعادة بنفس المفتاح (من أي عملية) ترجع نفس الاستجابة.
+    نفس المفتاح ببيانات مختلفة ← 422. مفتاح بدون طالب أو معلم مسجل ← 401. بدون مفتاح ← السلوك العادي.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.META.get(HEADER, '').strip()
+            if request.method != 'POST' or not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return JsonResponse({'success': False, 'message': 'مفتاح Idempotency-Key طويل جداً'}, status=400)
+
+            scope = _scope(request, view_name)
+            if scope is None:
+                return JsonResponse({'success': False, 'message': 'مفتاح Idempotency-Key يتطلب تسجيل الدخول'}, status=401)
+
+            fingerprint = _fingerprint(request, args, kwargs)
+            expires_at = timezone.now() + timedelta(seconds=ttl or default_ttl())
+
+            # أي استثناء من الدالة يلغي المعاملة كلها ومعها حجز المفتاح - الإعادة تنفذ من جديد
+            with transaction.atomic():
+                record, existing = _claim(scope, key, fingerprint, expires_at)
+                if existing is not None:
+                    return _replay(existing, fingerprint)
+
+                response = view(request, *args, **kwargs)
+
+                # النتائج غير النهائية لا تُحفظ - الإعادة تنفذ من جديد
+                if not _should_store(response):
+                    record.delete()
+                else:
+                    record.status_code = response.status_code
+                    record.content = response.content
+                    record.content_type = response.get('Content-Type', '')
+                    record.save(update_fields=['status_code', 'content', 'content_type'])
+            return response
+
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=1000, dry_run=False):
+    """حذف المفاتيح المنتهية على دفعات - يرجع عددها"""
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    if dry_run:
+        return expired.count()
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
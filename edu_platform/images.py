@@ -0,0 +1,174 @@
+# edu_platform/images.py - توليد نسخ مصغرة من الصور المرفوعة خارج مسار الطلب
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# أقصى عرض لكل نسخة بالبكسل
+VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+# الامتداد ← صيغة Pillow
+FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+
+QUALITY = 80
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+    thread_name_prefix='image-variants',
+)
+
+
+def variant_name(name, variant, extension):
+    """courses/images/a.png ← courses/images/a.card.webp"""
+    root, _ = os.path.splitext(name)
+    return f'{root}.{variant}.{extension}'
+
+
+def ready_field(field_name):
+    """الحقل الذي يحفظ اسم الصورة التي اكتملت نسخها: image ← image_variants"""
+    return f'{field_name}_variants'
+
+
+def generate_variants(storage, name):
+    """توليد كل النسخ لصورة واحدة وحفظها بجوار الأصل - يرجع False لو الأصل غير موجود"""
+    if not storage.exists(name):
+        return False
+    with storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    for variant, max_width in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+        for extension, image_format in FORMATS.items():
+            output = resized.convert('RGB') if image_format == 'JPEG' else resized
+            buffer = BytesIO()
+            output.save(buffer, image_format, quality=QUALITY, optimize=True)
+            target = variant_name(name, variant, extension)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return True
+
+
+def delete_variants(storage, name):
+    for variant in VARIANTS:
+        for extension in FORMATS:
+            target = variant_name(name, variant, extension)
+            if storage.exists(target):
+                storage.delete(target)
+
+
+def mark_ready(model, pk, field, name):
+    """
+    تسجيل اكتمال النسخ على الصف: update مباشر (بدون إشارات ولا updated_at)
+    وفقط لو الصورة لم تتغير أثناء التوليد - يرجع True لو سُجل.
+    """
+    return bool(model._default_manager.filter(pk=pk, **{field: name}).update(**{ready_field(field): name}))
+
+
+def _generate_and_mark(model, pk, field, on_ready, storage, name):
+    if generate_variants(storage, name) and mark_ready(model, pk, field, name) and on_ready:
+        on_ready(pk)
+
+
+def _mark_if_generated(model, pk, field, on_ready, storage, name):
+    # العلامة ضاعت (حفظ كامل بنسخة قديمة من الصف) والنسخ موجودة - تسجيلها بدون إعادة التوليد.
+    # آخر نسخة تُكتب في generate_variants: وجودها يعني اكتمال الكل
+    last = variant_name(name, list(VARIANTS)[-1], list(FORMATS)[-1])
+    if storage.exists(last) and mark_ready(model, pk, field, name) and on_ready:
+        on_ready(pk)
+
+
+def _run(job, storage, name):
+    try:
+        job(storage, name)
+    except Exception:
+        logger.exception('Image variant job failed for %s', name)
+    finally:
+        close_old_connections()
+
+
+def schedule(job, storage, name):
+    """تشغيل المهمة في مجموعة العمال بعد نجاح المعاملة"""
+    transaction.on_commit(lambda: _executor.submit(_run, job, storage, name))
+
+
+def variants_ready(field_file):
+    """هل تم توليد النسخ لهذه الصورة؟ من علامة الصف نفسه - بدون أي فحص للملفات"""
+    if not field_file:
+        return False
+    return getattr(field_file.instance, ready_field(field_file.field.name), None) == field_file.name
+
+
+def register(model, *field_names, on_ready=None):
+    """
+    ربط حقول الصور في موديل بخط توليد النسخ.
+    كل حقل يحتاج حقلاً نصياً بجواره (ready_field) يُسجل فيه اسم الصورة بعد اكتمال نسخها،
+    و on_ready(pk) تُستدعى بعدها لإبطال ما عرض الصورة الأصلية.
+    """
+    label = f'{model._meta.label}.images'
+
+    def remember_names(sender, instance, **kwargs):
+        # الحقول المؤجلة (.only/.defer) لا تُقرأ هنا حتى لا تسبب استعلاماً إضافياً
+        names = {}
+        for field in field_names:
+            if field in instance.__dict__:
+                value = instance.__dict__[field]
+                names[field] = getattr(value, 'name', value) or ''
+        instance._original_image_names = names
+
+    def on_save(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+        if raw:
+            return
+        previous = getattr(instance, '_original_image_names', {})
+        for field in field_names:
+            if update_fields is not None and field not in update_fields:
+                continue
+            if not created and field not in previous:
+                continue
+            field_file = getattr(instance, field)
+            old_name = previous.get(field)
+            if not created:
+                if field_file.name == old_name:
+                    if field_file.name and instance.__dict__.get(ready_field(field), field_file.name) != field_file.name:
+                        schedule(partial(_mark_if_generated, sender, instance.pk, field, on_ready),
+                                 field_file.storage, field_file.name)
+                    continue
+                if old_name:
+                    schedule(delete_variants, field_file.storage, old_name)
+            if field_file.name:
+                schedule(partial(_generate_and_mark, sender, instance.pk, field, on_ready),
+                         field_file.storage, field_file.name)
+        remember_names(sender, instance)
+
+    def on_delete(sender, instance, **kwargs):
+        for field in field_names:
+            if field not in instance.__dict__:
+                continue
+            field_file = getattr(instance, field)
+            if field_file.name:
+                schedule(delete_variants, field_file.storage, field_file.name)
+
+    post_init.connect(remember_names, sender=model, weak=False, dispatch_uid=f'{label}.init')
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'{label}.save')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'{label}.delete')
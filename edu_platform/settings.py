@@ -120,10 +120,13 @@ if not DEBUG:
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # إعدادات التخزين المؤقت
+# كاش مشترك في الذاكرة بين كل عمليات الويب وأوامر cron: الإبطال وأرقام الإصدارات يجب أن تراها كل العمليات.
+# الكاش المحلي لكل عملية (LocMemCache) غير مسموح (فحص edu_platform.E001)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'edu_platform',
     }
 }
 
@@ -150,4 +153,30 @@ LOGGING = {
 # إعدادات مخصصة للمنصة
 MAX_UPLOAD_SIZE = 5242880  # 5MB
 ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif']
-ALLOWED_FILE_EXTENSIONS = ['pdf', 'doc', 'docx', 'ppt', 'pptx']
\ No newline at end of file
+ALLOWED_FILE_EXTENSIONS = ['pdf', 'doc', 'docx', 'ppt', 'pptx']
+ALLOWED_OUTLINE_EXTENSIONS = ['json', 'csv']  # ملفات استيراد فهرس الكورس
+
+# فحص الملفات أثناء الرفع قبل تخزينها في الذاكرة أو على القرص
+FILE_UPLOAD_HANDLERS = [
+    'edu_platform.uploads.UploadGuardHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# مفاتيح تشفير معرفات الفيديو (Fernet) - المفتاح الأول للتشفير والباقي لفك تشفير القيم القديمة أثناء التدوير
+VIDEO_ID_KEYS = [key.strip() for key in os.environ.get('FERNET_KEYS', os.environ.get('FERNET_KEY', '')).split(',') if key.strip()]
+VIDEO_ID_CACHE_SIZE = 4096
+VIDEO_EMBED_TOKEN_MAX_AGE = 60 * 30  # صلاحية رابط الفيديو الموقع (ثوانٍ)
+IMAGE_VARIANT_WORKERS = 2  # عدد العمال لتوليد نسخ الصور المصغرة
+LESSON_VIEW_LOG_DIR = os.path.join(BASE_DIR, 'var', 'lesson_views')  # ملفات مشاهدات الدروس قبل تطبيقها (flush_lesson_views)
+VIDEO_HEARTBEAT_TOKEN_MAX_AGE = 60 * 60 * 6  # صلاحية رمز نبضات المشغل (أطول من مدة أي فيديو)
+WATCH_FLUSH_INTERVAL = 5  # ثوانٍ بين كتابة نبضات المشاهدة المجمعة
+WATCH_FLUSH_THRESHOLD = 2000  # كتابة فورية عند هذا العدد من (اشتراك، درس) في الذاكرة
+WATCH_COMPLETION_COVERAGE = 0.9  # نسبة أجزاء الفيديو المشاهدة لاعتبار الدرس مكتملاً
+TRENDING_HALF_LIFE_HOURS = 72  # نصف عمر وزن الاشتراك/التقييم في درجة الرواج (refresh_trending)
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # مدة حفظ استجابة طلب POST بمفتاح Idempotency-Key لإعادتها عند التكرار
+EXAM_QUEUED_GRADING = False  # True وقت الذروة: submit_exam يحفظ الإجابات فقط ويصححها grade_exam_submissions
+EXAM_GRADING_FALLBACK_SECONDS = 30  # بعدها تُصحح الإجابة المنتظرة من صفحة المتابعة لو العمال متوقفون
+EXAM_DRAFT_TTL = 60 * 60 * 4  # مدة بقاء مسودة إجابات الاختبار في الكاش بعد آخر تغيير
+EXAM_DRAFT_PERSIST_INTERVAL = 30  # أقل فاصل (ثوانٍ) بين كتابتين لمسودة الطالب في قاعدة البيانات
+EXAM_PAPER_WARM_MINUTES = 10  # قبل بدء الاختبار بكم دقيقة تُبنى ورقته في الكاش (warm_exam_papers من cron)
@@ -0,0 +1,104 @@
+# edu_platform/uploads.py - فحص الملفات المرفوعة أثناء الاستقبال قبل تخزينها
+import os
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.http import HttpResponseRedirect
+
+# بداية كل نوع ملف مسموح (magic bytes)
+SIGNATURES = {
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'pdf': (b'%PDF-',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'ppt': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'docx': (b'PK\x03\x04',),
+    'pptx': (b'PK\x03\x04',),
+}
+
+# الحقول التي تقبل غير الصور ← اسم إعداد الامتدادات المسموحة - باقي الحقول صور
+FIELD_EXTENSION_SETTINGS = {
+    'attachment': 'ALLOWED_FILE_EXTENSIONS',
+    'outline_file': 'ALLOWED_OUTLINE_EXTENSIONS',
+}
+
+
+def max_request_size():
+    """أقصى حجم لطلب فيه ملفات: ملفان بالحد الأقصى + هامش للحقول النصية"""
+    return getattr(settings, 'MAX_UPLOAD_REQUEST_SIZE', settings.MAX_UPLOAD_SIZE * 2 + 512 * 1024)
+
+
+def allowed_extensions(field_name):
+    setting_name = FIELD_EXTENSION_SETTINGS.get(field_name.rsplit('-', 1)[-1], 'ALLOWED_IMAGE_EXTENSIONS')
+    return getattr(settings, setting_name)
+
+
+def upload_error(request):
+    """أول خطأ رفع في الطلب (أو None) - يجب استدعاؤها بعد قراءة request.POST"""
+    errors = getattr(request, 'upload_errors', None)
+    return errors[0] if errors else None
+
+
+class UploadGuardHandler(FileUploadHandler):
+    """
+    أول معالج في FILE_UPLOAD_HANDLERS:
+    يرفض الطلب الكبير قبل قراءته، ويوقف الملف الكبير أو غير المسموح أثناء الاستقبال
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request.upload_errors = []
+        self.request_too_large = content_length > max_request_size()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.received = 0
+
+        if self.request_too_large or (content_length and content_length > settings.MAX_UPLOAD_SIZE):
+            self._reject_size()
+
+        self.extension = os.path.splitext(file_name)[1].lower().lstrip('.')
+        if self.extension not in allowed_extensions(field_name):
+            self._reject(f'نوع الملف "{file_name}" غير مسموح')
+            raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            signatures = SIGNATURES.get(self.extension, ())
+            if signatures and not raw_data.startswith(signatures):
+                self._reject(f'محتوى الملف "{self.file_name}" لا يطابق امتداده')
+                raise SkipFile()
+
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self._reject_size()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # الملف نفسه يبنيه المعالج التالي (ذاكرة أو ملف مؤقت)
+        return None
+
+    def _reject(self, message):
+        self.request.upload_errors.append(message)
+
+    def _reject_size(self):
+        limit_mb = settings.MAX_UPLOAD_SIZE // (1024 * 1024)
+        self._reject(f'حجم الملف أكبر من الحد المسموح ({limit_mb} ميجابايت)')
+        # إيقاف القراءة فوراً بدون استهلاك باقي الطلب
+        raise StopUpload(connection_reset=True)
+
+
+class UploadGuardAdminMixin:
+    """عرض أخطاء الرفع في لوحة الإدارة بدلاً من حفظ النموذج بدون الملف"""
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        if request.method == 'POST':
+            request.POST  # قراءة الطلب لتشغيل معالج الرفع
+            error = upload_error(request)
+            if error:
+                messages.error(request, error)
+                return HttpResponseRedirect(request.get_full_path())
+        return super().changeform_view(request, object_id, form_url, extra_context)
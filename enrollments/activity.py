@@ -0,0 +1,179 @@
+# enrollments/activity.py - تسجيل مشاهدات الدروس في ملف إلحاق محلي وتطبيقها على قاعدة البيانات دفعة واحدة
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from courses.models import Course, Lesson
+
+from .models import Enrollment, LessonCompletion
+
+logger = logging.getLogger(__name__)
+
+LIVE_SUFFIX = '.log'
+FLUSHING_SUFFIX = '.flushing'
+LOCK_NAME = 'flush.lock'
+# مهلة بعد إعادة التسمية حتى تنتهي أي كتابة بدأت على الملف القديم
+ROTATE_GRACE_SECONDS = 1
+
+
+def log_dir():
+    return getattr(settings, 'LESSON_VIEW_LOG_DIR', os.path.join(settings.BASE_DIR, 'var', 'lesson_views'))
+
+
+def _live_path():
+    # ملف لكل عملية حتى لا تتزاحم العمليات على نفس الملف
+    return os.path.join(log_dir(), f'views-{os.getpid()}{LIVE_SUFFIX}')
+
+
+def record_lesson_view(enrollment_id, lesson_id):
+    """
+    تسجيل مشاهدة درس بدون أي كتابة في قاعدة البيانات.
+    سطر JSON واحد بكتابة O_APPEND واحدة - يطبقه الأمر flush_lesson_views لاحقاً.
+    """
+    line = json.dumps({'e': enrollment_id, 'l': lesson_id, 't': time.time()}, separators=(',', ':')) + '\n'
+    try:
+        try:
+            fd = os.open(_live_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            os.makedirs(log_dir(), exist_ok=True)
+            fd = os.open(_live_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        # فقدان مشاهدة أفضل من إفشال صفحة الدرس
+        logger.exception('Could not record lesson view (enrollment %s, lesson %s)', enrollment_id, lesson_id)
+
+
+def rotate_logs():
+    """نقل الملفات الحية إلى .flushing - الطلبات الجديدة تبدأ ملفات جديدة فوراً"""
+    rotated = False
+    for path in glob.glob(os.path.join(log_dir(), f'*{LIVE_SUFFIX}')):
+        os.rename(path, f'{path[:-len(LIVE_SUFFIX)]}.{time.time_ns()}{FLUSHING_SUFFIX}')
+        rotated = True
+    if rotated:
+        time.sleep(ROTATE_GRACE_SECONDS)
+    # تشمل ملفات دورة سابقة فشل تطبيقها
+    return sorted(glob.glob(os.path.join(log_dir(), f'*{FLUSHING_SUFFIX}')))
+
+
+def read_events(paths):
+    """دمج الأحداث لكل اشتراك: {enrollment_id: (set(lesson_ids), آخر وقت)}"""
+    coalesced = {}
+    skipped = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                    enrollment_id, lesson_id, seen_at = int(event['e']), int(event['l']), float(event['t'])
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                lessons, last_seen = coalesced.get(enrollment_id, (set(), 0))
+                lessons.add(lesson_id)
+                coalesced[enrollment_id] = (lessons, max(last_seen, seen_at))
+    return coalesced, skipped
+
+
+def apply_events(coalesced, batch_size=500):
+    """
+    تطبيق المشاهدات: إدخال الدروس المكتملة مع تجاهل المكرر، ثم تحديث
+    العداد والتقدم وآخر دخول لكل اشتراك متأثر بـ bulk_update واحد لكل دفعة.
+    """
+    if not coalesced:
+        return 0
+
+    # الدروس المحذوفة أو من كورس آخر لا تُسجل
+    lesson_courses = dict(
+        Lesson.objects.filter(id__in={lesson_id for lessons, _ in coalesced.values() for lesson_id in lessons})
+        .values_list('id', 'module__course_id')
+    )
+
+    with transaction.atomic():
+        # قفل الاشتراكات (بترتيب ثابت) حتى لا يكتب تطبيق متزامن (نبضات الفيديو) قيماً أقدم فوق قيمنا
+        enrollments = {
+            enrollment.pk: enrollment
+            for enrollment in Enrollment.objects.select_for_update()
+            .filter(id__in=list(coalesced))
+            .order_by('id')
+            .only('id', 'course_id', 'completed_count', 'progress', 'last_accessed')
+        }
+        lesson_counts = dict(
+            Course.objects.filter(id__in={enrollment.course_id for enrollment in enrollments.values()})
+            .values_list('id', 'lesson_count')
+        )
+
+        LessonCompletion.objects.bulk_create(
+            [
+                LessonCompletion(enrollment_id=enrollment_id, lesson_id=lesson_id)
+                for enrollment_id, (lessons, _) in coalesced.items() if enrollment_id in enrollments
+                for lesson_id in lessons
+                if lesson_courses.get(lesson_id) == enrollments[enrollment_id].course_id
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        counts = dict(
+            LessonCompletion.objects.filter(enrollment_id__in=enrollments)
+            .values('enrollment_id')
+            .annotate(count=Count('id'))
+            .values_list('enrollment_id', 'count')
+        )
+        for enrollment_id, enrollment in enrollments.items():
+            total_lessons = lesson_counts.get(enrollment.course_id, 0)
+            enrollment.completed_count = counts.get(enrollment_id, 0)
+            enrollment.progress = min(enrollment.completed_count * 100 // total_lessons, 100) if total_lessons > 0 else 0
+            last_seen = datetime.fromtimestamp(coalesced[enrollment_id][1], tz=timezone.utc)
+            enrollment.last_accessed = max(enrollment.last_accessed, last_seen)
+
+        Enrollment.objects.bulk_update(
+            enrollments.values(),
+            ['completed_count', 'progress', 'last_accessed'],
+            batch_size=batch_size,
+        )
+    return len(enrollments)
+
+
+@contextlib.contextmanager
+def flush_lock():
+    """
+    قفل ملف حصري طوال الدورة: تشغيلان متداخلان (cron) يقرآن نفس ملفات .flushing
+    فيطبقانها مرتين ويفشل أحدهما في الحذف. يعطي False إذا كانت دورة أخرى تعمل.
+    """
+    os.makedirs(log_dir(), exist_ok=True)
+    with open(os.path.join(log_dir(), LOCK_NAME), 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def flush(batch_size=500):
+    """دورة كاملة: تدوير الملفات ← دمج ← تطبيق ← حذف الملفات المطبقة (None إذا كانت دورة أخرى تعمل)"""
+    with flush_lock() as acquired:
+        if not acquired:
+            return None
+        paths = rotate_logs()
+        coalesced, skipped = read_events(paths)
+        updated = apply_events(coalesced, batch_size=batch_size)
+        for path in paths:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+    return {'files': len(paths), 'enrollments': updated, 'skipped': skipped}
@@ -1,22 +1,56 @@
-from django.contrib import admin
-from .models import Enrollment
+from django.contrib import admin, messages
+from django.utils import timezone
+from .models import Enrollment, TopUpRequest
+from .topups import process_topups, summary_message
 
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ['student', 'course', 'enrollment_date', 'status', 'payment_status', 'amount_paid', 'progress']
     list_filter = ['status', 'payment_status', 'enrollment_date']
     search_fields = ['student__name', 'course__title']
-    readonly_fields = ['enrollment_date', 'last_accessed']
+    readonly_fields = ['enrollment_date', 'activated_at', 'last_accessed', 'completed_count']
     
     fieldsets = (
         ('معلومات الحجز', {
-            'fields': ('student', 'course', 'enrollment_date', 'last_accessed')
+            'fields': ('student', 'course', 'enrollment_date', 'activated_at', 'last_accessed')
         }),
         ('حالة الحجز', {
-            'fields': ('status', 'progress')
+            'fields': ('status', 'progress', 'completed_count')
         }),
         ('المعلومات المالية', {
             'fields': ('payment_status', 'amount_paid')
         }),
     )
 
-admin.site.register(Enrollment, EnrollmentAdmin)
\ No newline at end of file
+    def save_model(self, request, obj, form, change):
+        # التفعيل اليدوي يُحسب في درجات الرواج مثل الشراء
+        if change and 'status' in form.changed_data and obj.status == 'active':
+            obj.activated_at = timezone.now()
+        super().save_model(request, obj, form, change)
+
+admin.site.register(Enrollment, EnrollmentAdmin)
+
+
+@admin.register(TopUpRequest)
+class TopUpRequestAdmin(admin.ModelAdmin):
+    list_display = ['student', 'amount', 'request_date', 'status', 'processed_at', 'proof_of_payment']
+    list_filter = ['status', 'request_date']
+    search_fields = ['student__name', 'student__phone_number']
+    list_select_related = ['student']
+    raw_id_fields = ['student']
+    # الحالة تتغير من الإجراءات فقط حتى يمر الشحن عبر سجل المحفظة
+    readonly_fields = ['status', 'request_date', 'processed_at']
+    actions = ['approve_selected', 'reject_selected']
+    list_per_page = 200
+
+    def _process(self, request, queryset, approve):
+        ids = list(queryset.values_list('id', flat=True))
+        result = process_topups(ids, approve=approve)
+        self.message_user(request, summary_message(result, approve), messages.SUCCESS)
+
+    @admin.action(description='✅ الموافقة على الطلبات المحددة وشحن الأرصدة')
+    def approve_selected(self, request, queryset):
+        self._process(request, queryset, approve=True)
+
+    @admin.action(description='❌ رفض الطلبات المحددة')
+    def reject_selected(self, request, queryset):
+        self._process(request, queryset, approve=False)
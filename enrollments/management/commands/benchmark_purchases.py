@@ -0,0 +1,159 @@
+# enrollments/management/commands/benchmark_purchases.py
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from courses.models import Course
+from enrollments.models import Enrollment
+from enrollments.services import AlreadyEnrolled, InsufficientBalance, purchase_course
+from students.models import Student, WalletTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        'قياس مسار الشراء تحت ضغط متزامن: طلاب مؤقتون يشترون نفس الكورس من عدة خيوط '
+        '(مع تكرار الضغط على زر الشراء) ثم التحقق من الأرصدة وسجل المحفظة والعدادات وحذف البيانات المؤقتة'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int, help='رقم الكورس المستخدم في القياس')
+        parser.add_argument('--buyers', type=int, default=200, help='عدد الطلاب المؤقتين (افتراضي: 200)')
+        parser.add_argument('--threads', type=int, default=16, help='عدد الخيوط المتوازية (افتراضي: 16)')
+        parser.add_argument('--attempts', type=int, default=2, help='محاولات الشراء لكل طالب (افتراضي: 2)')
+        parser.add_argument(
+            '--poor-ratio',
+            type=float,
+            default=0.25,
+            help='نسبة الطلاب برصيد أقل من السعر (افتراضي: 0.25)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.only('id', 'title', 'price').get(pk=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f'الكورس {options["course_id"]} غير موجود')
+        if options['buyers'] < 1 or options['threads'] < 1 or options['attempts'] < 1:
+            raise CommandError('--buyers و --threads و --attempts يجب أن تكون أكبر من صفر')
+
+        price = course.price
+        students = self._create_students(options['buyers'], price, options['poor_ratio'])
+        initial = {student.pk: student.balance for student in students}
+        students_count_before = Course.objects.values_list('students_count', flat=True).get(pk=course.pk)
+
+        attempts = [student.pk for student in students for _ in range(options['attempts'])]
+        random.shuffle(attempts)
+        outcomes = {'ok': 0, 'duplicate': 0, 'insufficient': 0, 'error': 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def buy(student_id):
+            started = time.perf_counter()
+            try:
+                purchase_course(student_id, course)
+                outcome = 'ok'
+            except AlreadyEnrolled:
+                outcome = 'duplicate'
+            except InsufficientBalance:
+                outcome = 'insufficient'
+            except Exception as e:
+                outcome = 'error'
+                self.stderr.write(f'❌ {student_id}: {e}')
+            finally:
+                close_old_connections()
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(time.perf_counter() - started)
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(buy, attempts))
+            elapsed = time.perf_counter() - started
+
+            problems = self._verify(course, price, initial, students_count_before, outcomes['ok'])
+        finally:
+            self._cleanup(course, initial)
+
+        latencies.sort()
+        self.stdout.write(
+            f'📊 {len(attempts)} محاولة في {elapsed:.2f} ثانية = {len(attempts) / elapsed:.0f} محاولة/ثانية\n'
+            f'   نجاح: {outcomes["ok"]} | مكرر: {outcomes["duplicate"]} | '
+            f'رصيد غير كافي: {outcomes["insufficient"]} | أخطاء: {outcomes["error"]}\n'
+            f'   زمن المحاولة: p50 {statistics.median(latencies) * 1000:.1f}ms | '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms | '
+            f'أقصى {latencies[-1] * 1000:.1f}ms'
+        )
+        if problems or outcomes['error']:
+            for problem in problems:
+                self.stderr.write(f'❌ {problem}')
+            raise CommandError('فشل التحقق من صحة الشراء المتزامن')
+        self.stdout.write(self.style.SUCCESS('✅ الأرصدة والاشتراكات وعدد الطلاب متطابقة'))
+
+    def _create_students(self, count, price, poor_ratio):
+        """طلاب مؤقتون بأرقام هاتف عشوائية - كلمة مرور غير صالحة للدخول"""
+        run = random.randint(0, 9999)
+        poor_count = int(count * poor_ratio)
+        students = [
+            Student(
+                name=f'benchmark-{run}-{index}',
+                phone_number=f'9{run:04d}{index:06d}',
+                parent_phone='0',
+                password='!',
+                residence='-',
+                grade='primary',
+                year='first',
+                balance=price - Decimal('0.01') if index < poor_count else price * 2,
+            )
+            for index in range(count)
+        ]
+        Student.objects.bulk_create(students, batch_size=500)
+        students = list(Student.objects.filter(name__startswith=f'benchmark-{run}-').only('id', 'balance'))
+        # الرصيد الافتتاحي كحركة شحن حتى يبقى الرصيد المخزن مطابقاً للسجل
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(student_id=student.pk, kind='topup', amount=student.balance, note='benchmark')
+                for student in students
+            ],
+            batch_size=500,
+        )
+        return students
+
+    def _verify(self, course, price, initial, students_count_before, succeeded):
+        problems = []
+        enrolled = set(
+            Enrollment.objects.filter(course=course, student_id__in=initial).values_list('student_id', flat=True)
+        )
+        if len(enrolled) != succeeded:
+            problems.append(f'{succeeded} عملية ناجحة لكن {len(enrolled)} اشتراك')
+
+        for student_id, balance, total_spent in Student.objects.filter(pk__in=initial).values_list(
+            'id', 'balance', 'total_spent'
+        ):
+            expected = initial[student_id] - price if student_id in enrolled else initial[student_id]
+            if balance != expected or balance < 0:
+                problems.append(f'الطالب {student_id}: الرصيد {balance} والمتوقع {expected}')
+            if total_spent != (price if student_id in enrolled else 0):
+                problems.append(f'الطالب {student_id}: إجمالي المنصرف {total_spent}')
+
+        purchases = WalletTransaction.objects.filter(student_id__in=initial, kind='purchase').count()
+        if purchases != succeeded:
+            problems.append(f'{succeeded} عملية ناجحة لكن {purchases} حركة شراء في سجل المحفظة')
+
+        students_count = Course.objects.values_list('students_count', flat=True).get(pk=course.pk)
+        if students_count - students_count_before != succeeded:
+            problems.append(f'عدد الطلاب زاد {students_count - students_count_before} والمتوقع {succeeded}')
+        return problems
+
+    def _cleanup(self, course, initial):
+        """حذف الطلاب المؤقتين (واشتراكاتهم) وإرجاع عدد طلاب الكورس كما كان"""
+        with transaction.atomic():
+            enrolled = Enrollment.objects.filter(course=course, student_id__in=initial).count()
+            Student.objects.filter(pk__in=initial).delete()
+            Course.objects.filter(pk=course.pk).update(students_count=F('students_count') - enrolled)
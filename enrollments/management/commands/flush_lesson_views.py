@@ -0,0 +1,27 @@
+# enrollments/management/commands/flush_lesson_views.py
+from django.core.management.base import BaseCommand
+
+from enrollments import activity
+
+
+class Command(BaseCommand):
+    help = 'تطبيق مشاهدات الدروس المسجلة في الملفات المحلية على الاشتراكات (يُشغل دورياً من cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد الصفوف في كل دفعة إدخال/تحديث (افتراضي: 500)',
+        )
+
+    def handle(self, *args, **options):
+        result = activity.flush(batch_size=options['batch_size'])
+        if result is None:
+            self.stdout.write('⏭️ دورة تطبيق أخرى تعمل الآن - لا شيء للتنفيذ')
+            return
+        if result['skipped']:
+            self.stderr.write(f'⚠️ تم تجاهل {result["skipped"]} سطر غير صالح')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ تم تطبيق {result["files"]} ملف على {result["enrollments"]} اشتراك'
+        ))
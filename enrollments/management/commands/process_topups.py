@@ -0,0 +1,52 @@
+# enrollments/management/commands/process_topups.py
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollments.models import TopUpRequest
+from enrollments.topups import process_topups, summary_message
+
+
+class Command(BaseCommand):
+    help = 'الموافقة على طلبات شحن الرصيد المعلقة أو رفضها دفعة واحدة (الأقدم أولاً)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['approve', 'reject'], help='approve للموافقة أو reject للرفض')
+        parser.add_argument(
+            '--ids',
+            type=int,
+            nargs='+',
+            help='أرقام طلبات محددة (افتراضي: كل الطلبات المعلقة)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=1000,
+            help='أقصى عدد طلبات في التشغيل الواحد (افتراضي: 1000)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='عدد الطلاب في كل UPDATE (افتراضي: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='عرض ما سيتم دون حفظ',
+        )
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1:
+            raise CommandError('--limit يجب أن يكون أكبر من صفر')
+
+        approve = options['action'] == 'approve'
+        if options['ids']:
+            ids = options['ids'][:options['limit']]
+        else:
+            ids = list(
+                TopUpRequest.objects.filter(status='pending')
+                .order_by('request_date', 'id')
+                .values_list('id', flat=True)[:options['limit']]
+            )
+
+        result = process_topups(ids, approve=approve, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(summary_message(result, approve, dry_run=options['dry_run'])))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_lesson_counters'),
+        ('enrollments', '0003_topuprequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_count',
+            field=models.IntegerField(default=0, verbose_name='عدد الدروس المكتملة'),
+        ),
+        migrations.CreateModel(
+            name='LessonCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإكمال')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_completions', to='enrollments.enrollment', verbose_name='الحجز')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='courses.lesson', verbose_name='الدرس')),
+            ],
+            options={
+                'verbose_name': 'درس مكتمل',
+                'verbose_name_plural': 'الدروس المكتملة',
+                'unique_together': {('enrollment', 'lesson')},
+            },
+        ),
+    ]
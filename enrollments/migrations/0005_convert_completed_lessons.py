@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+def convert_completed_lessons(apps, schema_editor):
+    """نقل قوائم JSON القديمة إلى جدول LessonCompletion مع تجاهل الدروس المحذوفة والمكررة"""
+    Enrollment = apps.get_model('enrollments', 'Enrollment')
+    LessonCompletion = apps.get_model('enrollments', 'LessonCompletion')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    lesson_courses = dict(Lesson.objects.values_list('id', 'module__course_id'))
+    total_lessons = {}
+    for course_id in lesson_courses.values():
+        total_lessons[course_id] = total_lessons.get(course_id, 0) + 1
+    completions = []
+    counts = []
+    for enrollment in Enrollment.objects.only('id', 'course_id', 'completed_lessons').iterator(chunk_size=500):
+        lesson_ids = set()
+        for lesson_id in enrollment.completed_lessons or []:
+            try:
+                lesson_id = int(lesson_id)
+            except (TypeError, ValueError):
+                continue
+            if lesson_courses.get(lesson_id) == enrollment.course_id:
+                lesson_ids.add(lesson_id)
+        completions.extend(LessonCompletion(enrollment_id=enrollment.id, lesson_id=lesson_id) for lesson_id in lesson_ids)
+        # التقدم يُعاد حسابه من الدروس الصالحة فقط (القائمة القديمة قد تحوي دروساً محذوفة أو مكررة)
+        total = total_lessons.get(enrollment.course_id, 0)
+        counts.append(Enrollment(
+            id=enrollment.id,
+            completed_count=len(lesson_ids),
+            progress=min(len(lesson_ids) * 100 // total, 100) if total > 0 else 0,
+        ))
+
+    LessonCompletion.objects.bulk_create(completions, batch_size=1000, ignore_conflicts=True)
+    Enrollment.objects.bulk_update(counts, ['completed_count', 'progress'], batch_size=1000)
+
+
+def restore_completed_lessons(apps, schema_editor):
+    Enrollment = apps.get_model('enrollments', 'Enrollment')
+    LessonCompletion = apps.get_model('enrollments', 'LessonCompletion')
+
+    lessons_by_enrollment = {}
+    for enrollment_id, lesson_id in LessonCompletion.objects.values_list('enrollment_id', 'lesson_id').order_by('id'):
+        lessons_by_enrollment.setdefault(enrollment_id, []).append(lesson_id)
+    Enrollment.objects.bulk_update(
+        [Enrollment(id=enrollment_id, completed_lessons=lesson_ids) for enrollment_id, lesson_ids in lessons_by_enrollment.items()],
+        ['completed_lessons'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0004_lessoncompletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_completed_lessons, restore_completed_lessons),
+    ]
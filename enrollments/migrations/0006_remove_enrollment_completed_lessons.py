@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0005_convert_completed_lessons'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='enrollment',
+            name='completed_lessons',
+        ),
+    ]
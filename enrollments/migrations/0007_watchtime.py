@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_lesson_counters'),
+        ('enrollments', '0006_remove_enrollment_completed_lessons'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seconds_watched', models.IntegerField(default=0, verbose_name='ثواني المشاهدة')),
+                ('max_position', models.IntegerField(default=0, verbose_name='أبعد نقطة (ثانية)')),
+                ('coverage', models.BigIntegerField(default=0, verbose_name='الأجزاء المشاهدة')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإكمال')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر نبضة')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_times', to='enrollments.enrollment', verbose_name='الحجز')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_times', to='courses.lesson', verbose_name='الدرس')),
+            ],
+            options={
+                'verbose_name': 'وقت مشاهدة',
+                'verbose_name_plural': 'أوقات المشاهدة',
+                'unique_together': {('enrollment', 'lesson')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0007_watchtime'),
+        ('students', '0005_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topuprequest',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='تاريخ المعالجة'),
+        ),
+        migrations.AddIndex(
+            model_name='topuprequest',
+            index=models.Index(fields=['status', 'request_date'], name='topup_status_date_idx'),
+        ),
+    ]
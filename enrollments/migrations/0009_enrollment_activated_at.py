@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_activated_at(apps, schema_editor):
+    Enrollment = apps.get_model('enrollments', 'Enrollment')
+    Enrollment.objects.update(activated_at=models.F('enrollment_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0008_topuprequest_processed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='activated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='تاريخ التفعيل'),
+        ),
+        migrations.RunPython(backfill_activated_at, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from students.models import Student
 from courses.models import Course
 
@@ -21,47 +22,37 @@ class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name="الطالب")
     course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name="الكورس")
     enrollment_date = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الحجز")
+    # وقت آخر تفعيل (الإنشاء أو إعادة التفعيل بعد الإلغاء) - درجات الرواج تُحسب منه
+    activated_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True, verbose_name="تاريخ التفعيل")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="حالة الحجز")
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending', verbose_name="حالة الدفع")
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="المبلغ المدفوع")
     progress = models.IntegerField(default=0, verbose_name="نسبة الإكمال")
     last_accessed = models.DateTimeField(auto_now=True, verbose_name="آخر دخول")
     
-    # إضف هذا الحقل الجديد
-    completed_lessons = models.JSONField(default=list, verbose_name="الدروس المكتملة")  # بيخزن [1, 2, 3] أي دي الدروس
+    # عدد الدروس المكتملة - يُعاد عدّه من LessonCompletion مع كل دفعة (activity.apply_events)
+    completed_count = models.IntegerField(default=0, verbose_name="عدد الدروس المكتملة")
     
     def update_progress(self):
-        """تحديث التقدم بناءً على الدروس المكتملة"""
-        # حساب إجمالي الدروس من خلال الـ modules
-        total_lessons = 0
-        for module in self.course.modules.all():
-            total_lessons += module.lessons.count()
+        """إعادة حساب التقدم من جدول الدروس المكتملة (للإصلاح - المسار العادي دفعات activity.apply_events و watchtime)"""
+        self.completed_count = self.lesson_completions.count()
+        total_lessons = self.get_total_lessons()
         
         if total_lessons > 0:
-            completed_count = len(self.completed_lessons)
-            self.progress = (completed_count / total_lessons) * 100
+            self.progress = min(self.completed_count * 100 // total_lessons, 100)
         else:
             self.progress = 0
         
-        self.save()
+        self.save(update_fields=['completed_count', 'progress', 'last_accessed'])
         return self.progress
 
-    def mark_lesson_completed(self, lesson_id):
-        """وضع علامة على درس كمكتمل"""
-        if lesson_id not in self.completed_lessons:
-            self.completed_lessons.append(lesson_id)
-            self.update_progress()  # حدث التقدم تلقائياً
-
     def get_completed_count(self):
         """عدد الدروس المكتملة"""
-        return len(self.completed_lessons)
+        return self.completed_count
 
     def get_total_lessons(self):
-        """إجمالي الدروس في الكورس"""
-        total_lessons = 0
-        for module in self.course.modules.all():
-            total_lessons += module.lessons.count()
-        return total_lessons
+        """إجمالي الدروس في الكورس (عداد مخزن على الكورس - بدون استعلام إضافي)"""
+        return self.course.lesson_count
 
     class Meta:
         verbose_name = 'حجز'
@@ -70,6 +61,41 @@ class Enrollment(models.Model):
 
     def __str__(self):
         return f"{self.student.name} - {self.course.title}"
+class LessonCompletion(models.Model):
+    """درس مكتمل لاشتراك واحد - المفتاح الفريد يجعل تسجيل الإكمال آمناً للتكرار"""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='lesson_completions', verbose_name="الحجز")
+    lesson = models.ForeignKey('courses.Lesson', on_delete=models.CASCADE, related_name='completions', verbose_name="الدرس")
+    completed_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإكمال")
+
+    class Meta:
+        verbose_name = 'درس مكتمل'
+        verbose_name_plural = 'الدروس المكتملة'
+        unique_together = ['enrollment', 'lesson']
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.lesson_id}"
+
+
+class WatchTime(models.Model):
+    """وقت المشاهدة الفعلي لدرس فيديو - يُجمع من نبضات المشغل ويُكتب دفعات (enrollments/watchtime.py)"""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='watch_times', verbose_name="الحجز")
+    lesson = models.ForeignKey('courses.Lesson', on_delete=models.CASCADE, related_name='watch_times', verbose_name="الدرس")
+    seconds_watched = models.IntegerField(default=0, verbose_name="ثواني المشاهدة")
+    max_position = models.IntegerField(default=0, verbose_name="أبعد نقطة (ثانية)")
+    # خريطة بت لأجزاء الفيديو التي تمت مشاهدتها (63 جزءاً متساوياً)
+    coverage = models.BigIntegerField(default=0, verbose_name="الأجزاء المشاهدة")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="تاريخ الإكمال")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر نبضة")
+
+    class Meta:
+        verbose_name = 'وقت مشاهدة'
+        verbose_name_plural = 'أوقات المشاهدة'
+        unique_together = ['enrollment', 'lesson']
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.lesson_id} ({self.seconds_watched}s)"
+
+
 class TopUpRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'قيد الانتظار'),
@@ -82,10 +108,14 @@ class TopUpRequest(models.Model):
     request_date = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الطلب")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="حالة الطلب")
     proof_of_payment = models.CharField(max_length=255, blank=True, verbose_name="رابط إثبات الدفع (WhatsApp)")
+    processed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="تاريخ المعالجة")
     
     class Meta:
         verbose_name = 'طلب شحن رصيد'
         verbose_name_plural = 'طلبات شحن الرصيد'
+        indexes = [
+            models.Index(fields=['status', 'request_date'], name='topup_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"طلب شحن لـ {self.student.name} بمبلغ {self.amount}"
\ No newline at end of file
@@ -0,0 +1,82 @@
+# enrollments/services.py - شراء كورس بمعاملة قصيرة واحدة آمنة مع الطلبات المتزامنة
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from courses.models import Course
+from students import wallet
+from students.models import Student
+
+from .models import Enrollment
+
+# الحالات التي تعني أن الطالب يملك الكورس بالفعل - غيرها (ملغي/قيد الانتظار) يُعاد تفعيله عند الشراء
+OWNED_STATUSES = ['active', 'completed']
+
+
+class PurchaseError(Exception):
+    """فشل متوقع في الشراء - الرسالة تُعرض للطالب كما هي"""
+
+
+class InsufficientBalance(PurchaseError):
+    def __init__(self, price, balance):
+        self.price = price
+        self.balance = balance
+        super().__init__(f'رصيدك غير كافي. السعر: {price} جنيه، رصيدك: {balance} جنيه')
+
+
+class AlreadyEnrolled(PurchaseError):
+    def __init__(self):
+        super().__init__('أنت مسجل في هذا الكورس بالفعل')
+
+
+def _debit(student_id, course_id, price):
+    """خصم شرطي عبر سجل المحفظة: UPDATE ... WHERE balance >= price + حركة شراء"""
+    try:
+        wallet.post(student_id, 'purchase', price, reference=f'course:{course_id}')
+    except wallet.InsufficientFunds as e:
+        raise InsufficientBalance(price, e.balance)
+
+
+def _upsert_enrollment(student_id, course_id, price):
+    """
+    إدخال الاشتراك، ولو موجود (مفتاح student+course الفريد) يُعاد تفعيله
+    بتحديث شرطي فقط إن لم يكن مملوكاً - وإلا AlreadyEnrolled.
+    """
+    try:
+        with transaction.atomic():
+            return Enrollment.objects.create(
+                student_id=student_id,
+                course_id=course_id,
+                amount_paid=price,
+                status='active',
+                payment_status='paid',
+            )
+    except IntegrityError:
+        reactivated = (
+            Enrollment.objects.filter(student_id=student_id, course_id=course_id)
+            .exclude(status__in=OWNED_STATUSES)
+            .update(
+                status='active', payment_status='paid', amount_paid=price,
+                last_accessed=timezone.now(), activated_at=timezone.now(),
+            )
+        )
+        if not reactivated:
+            if not Enrollment.objects.filter(student_id=student_id, course_id=course_id).exists():
+                # التعارض من مفتاح الطالب وليس من اشتراك سابق
+                raise Student.DoesNotExist
+            raise AlreadyEnrolled()
+        return Enrollment.objects.get(student_id=student_id, course_id=course_id)
+
+
+def purchase_course(student_id, course):
+    """
+    شراء كورس: الاشتراك ← خصم الرصيد ← زيادة عدد الطلاب، كلها في معاملة واحدة.
+    كل خطوة INSERT/UPDATE ذري، وأي فشل (تكرار/رصيد) يلغي المعاملة كلها.
+    ترتيب الأقفال ثابت (الاشتراك ثم الطالب ثم الكورس) وقفل الكورس المزدحم آخر خطوة حتى يُمسك أقل وقت.
+    """
+    price = course.price
+    with transaction.atomic():
+        enrollment = _upsert_enrollment(student_id, course.pk, price)
+        _debit(student_id, course.pk, price)
+        Course.objects.filter(pk=course.pk).update(students_count=F('students_count') + 1)
+    return enrollment
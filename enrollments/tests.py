@@ -1,3 +1,183 @@
-from django.test import TestCase
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from courses import video_tokens
+from courses.models import Course, CourseModule, Lesson
+from students.models import Student
+from teachers.models import Teacher
+
+from . import watchtime
+from .models import Enrollment, LessonCompletion, WatchTime
+
+
+class CoverageMaskTests(SimpleTestCase):
+    def test_interval_maps_to_segments(self):
+        # فيديو 630 ثانية: كل جزء 10 ثوانٍ
+        self.assertEqual(watchtime.coverage_mask(0, 10, 630), 0b1)
+        self.assertEqual(watchtime.coverage_mask(15, 35, 630), 0b1110)
+        self.assertEqual(watchtime.coverage_mask(0, 630, 630), watchtime.FULL_MASK)
+
+    def test_empty_or_invalid_interval(self):
+        self.assertEqual(watchtime.coverage_mask(20, 20, 630), 0)
+        self.assertEqual(watchtime.coverage_mask(30, 20, 630), 0)
+        self.assertEqual(watchtime.coverage_mask(0, 10, 0), 0)
+
+
+class SignEmbedTests(SimpleTestCase):
+    def test_duration_is_always_signed(self):
+        token = video_tokens.sign_embed(1, 2, 'vid', 3, 0)
+        claims = video_tokens.embed_claims(token, 2)
+        self.assertEqual(claims['d'], 0)
+        self.assertEqual(claims['e'], 3)
+        self.assertLessEqual(claims['i'], time.time())
+
+
+@mock.patch.object(watchtime, '_ensure_flusher')
+class RecordTests(SimpleTestCase):
+    def setUp(self):
+        watchtime._take_pending()
+
+    def tearDown(self):
+        watchtime._take_pending()
+
+    def test_budget_caps_seconds_and_coverage(self, _ensure_flusher):
+        # 120 حدثاً × 60 ثانية تغطي فيديو 63 دقيقة كاملاً لو لم يُقيد بالوقت الفعلي
+        events = [{'position': (i + 1) * 60, 'seconds': 60} for i in range(63)]
+        watchtime.record(1, 2, 63 * 60, events, budget=120)
+        seconds, _, mask = watchtime._pending[(1, 2)]
+        self.assertEqual(seconds, 120)
+        self.assertEqual(bin(mask).count('1'), 2)
+
+    def test_without_budget_events_are_only_clamped(self, _ensure_flusher):
+        watchtime.record(1, 2, 600, [{'position': 700, 'seconds': 500}])
+        seconds, max_position, _ = watchtime._pending[(1, 2)]
+        self.assertEqual(seconds, watchtime.MAX_EVENT_SECONDS)
+        self.assertEqual(max_position, 600)
+
+    def test_rejects_invalid_duration(self, _ensure_flusher):
+        with self.assertRaises(ValueError):
+            watchtime.record(1, 2, 0, [{'position': 1, 'seconds': 1}])
+
+
+class WatchTestData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = Teacher.objects.create(
+            name='t', phone_number='01000000000', email='t@example.com', password='x', address='a', bio='b',
+            specialization='s', teaching_levels='primary', experience='e', degree='bachelor', major='m',
+            payment_method='insta_pay', account_number='1', status='approved',
+        )
+        cls.course = Course.objects.create(
+            teacher=teacher, title='c', description='d', category='math', price=10, image='courses/images/c.jpg',
+            language='ar', status='published', estimated_duration='1',
+        )
+        module = CourseModule.objects.create(course=cls.course, title='m', order=1)
+        cls.lesson = Lesson.objects.create(module=module, title='l', order=1, lesson_type='video', duration=10)
+        cls.student = Student.objects.create(
+            name='s', phone_number='01100000000', parent_phone='0', password='x', residence='r',
+            grade='primary', year='first', balance=0,
+        )
+        cls.enrollment = Enrollment.objects.create(student=cls.student, course=cls.course, status='active')
+
+    def setUp(self):
+        cache.clear()
+        watchtime._take_pending()
+        patcher = mock.patch.object(watchtime, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(watchtime._take_pending)
+
+    def login(self, student_id):
+        session = self.client.session
+        session['student_id'] = student_id
+        session.save()
+
+
+class HeartbeatViewTests(WatchTestData):
+    def post(self, token, events):
+        return self.client.post(
+            reverse('watch_heartbeat'),
+            json.dumps({'lesson': self.lesson.id, 't': token, 'events': events}),
+            content_type='application/json',
+        )
+
+    def token(self, duration=600, issued_ago=0):
+        with mock.patch.object(video_tokens.time, 'time', return_value=time.time() - issued_ago):
+            return video_tokens.sign_embed(self.student.id, self.lesson.id, 'vid', self.enrollment.id, duration)
+
+    def test_token_is_bound_to_session_student(self):
+        self.login(self.student.id + 1)
+        response = self.post(self.token(), [{'position': 5, 'seconds': 5}])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(watchtime._pending, {})
+
+    def test_anonymous_client_is_rejected(self):
+        response = self.post(self.token(), [{'position': 5, 'seconds': 5}])
+        self.assertEqual(response.status_code, 403)
+
+    def test_seconds_capped_by_elapsed_wall_time(self):
+        self.login(self.student.id)
+        events = [{'position': (i + 1) * 5, 'seconds': 5} for i in range(120)]
+        response = self.post(self.token(issued_ago=60), events)
+        self.assertEqual(response.status_code, 202)
+        seconds, _, _ = watchtime._pending[(self.enrollment.id, self.lesson.id)]
+        self.assertLessEqual(seconds, 60 + watchtime.HEARTBEAT_SLACK_SECONDS + 1)
+
+        # النبضة التالية فوراً لا تقبل إلا الهامش
+        watchtime._take_pending()
+        self.post(self.token(issued_ago=60), events)
+        seconds, _, _ = watchtime._pending[(self.enrollment.id, self.lesson.id)]
+        self.assertLessEqual(seconds, watchtime.HEARTBEAT_SLACK_SECONDS + 1)
+
+    def test_zero_duration_is_accepted_but_not_tracked(self):
+        self.login(self.student.id)
+        response = self.post(self.token(duration=0), [{'position': 5, 'seconds': 5}])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(watchtime._pending, {})
+
+    def test_malformed_body(self):
+        self.login(self.student.id)
+        response = self.post(self.token(), 'not-a-list')
+        self.assertEqual(response.status_code, 400)
+
+
+class LessonDetailTests(WatchTestData):
+    def test_video_without_duration_completes_on_open(self):
+        Lesson.objects.filter(id=self.lesson.id).update(duration=0)
+        self.login(self.student.id)
+        with mock.patch('courses.views.record_lesson_view') as record_view:
+            self.client.get(reverse('courses:lesson_detail', args=[self.course.id, self.lesson.id]))
+        record_view.assert_called_once_with(self.enrollment.id, self.lesson.id)
+
+    def test_video_with_duration_waits_for_coverage(self):
+        self.login(self.student.id)
+        with mock.patch('courses.views.record_lesson_view') as record_view:
+            self.client.get(reverse('courses:lesson_detail', args=[self.course.id, self.lesson.id]))
+        record_view.assert_not_called()
+
+
+class WatchTimeFlushTests(WatchTestData):
+    def test_full_coverage_completes_lesson(self):
+        duration = self.lesson.duration * 60
+        events = [{'position': position, 'seconds': 60} for position in range(60, duration + 1, 60)]
+        watchtime.record(self.enrollment.id, self.lesson.id, duration, events)
+        self.assertEqual(watchtime.flush(), 1)
+
+        row = WatchTime.objects.get(enrollment=self.enrollment, lesson=self.lesson)
+        self.assertEqual(row.seconds_watched, duration)
+        self.assertIsNotNone(row.completed_at)
+        self.assertTrue(LessonCompletion.objects.filter(enrollment=self.enrollment, lesson=self.lesson).exists())
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_count, self.enrollment.progress), (1, 100))
+
+    def test_partial_coverage_does_not_complete(self):
+        watchtime.record(self.enrollment.id, self.lesson.id, 600, [{'position': 300, 'seconds': 60}])
+        watchtime.flush()
+        row = WatchTime.objects.get(enrollment=self.enrollment, lesson=self.lesson)
+        self.assertIsNone(row.completed_at)
+        self.assertFalse(LessonCompletion.objects.exists())
@@ -0,0 +1,58 @@
+# enrollments/topups.py - معالجة طلبات شحن الرصيد دفعة واحدة (موافقة أو رفض)
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from students import wallet
+
+from .models import TopUpRequest
+
+
+def process_topups(request_ids, approve, batch_size=500, dry_run=False):
+    """
+    موافقة/رفض مجموعة طلبات في معاملة واحدة.
+    الطلبات تُقفل (SELECT ... FOR UPDATE) ويُعالج منها قيد الانتظار فقط - فلا يُشحن طلب مرتين
+    لو عالجه موظفان في نفس الوقت. الموافقة: UPDATE واحد بـ CASE للأرصدة + حركات المحفظة دفعة واحدة.
+    """
+    with transaction.atomic():
+        pending = list(
+            TopUpRequest.objects.select_for_update()
+            .filter(id__in=request_ids, status='pending')
+            .order_by('id')
+            .values_list('id', 'student_id', 'amount')
+        )
+        processed_ids = [request_id for request_id, _, _ in pending]
+
+        if pending and not dry_run:
+            if approve:
+                wallet.post_many(
+                    'topup',
+                    [(student_id, amount, f'topup:{request_id}') for request_id, student_id, amount in pending],
+                    note='شحن رصيد',
+                    batch_size=batch_size,
+                )
+            for start in range(0, len(processed_ids), batch_size):
+                TopUpRequest.objects.filter(id__in=processed_ids[start:start + batch_size]).update(
+                    status='approved' if approve else 'rejected',
+                    processed_at=timezone.now(),
+                )
+
+    return {
+        'processed': len(pending),
+        'skipped': len(set(request_ids)) - len(pending),
+        'students': len({student_id for _, student_id, _ in pending}),
+        'amount': sum((amount for _, _, amount in pending), Decimal('0')),
+    }
+
+
+def summary_message(result, approve, dry_run=False):
+    prefix = '🔍 (تجربة) ' if dry_run else '✅ '
+    action = 'الموافقة على' if approve else 'رفض'
+    message = (
+        f'{prefix}تم {action} {result["processed"]} طلب شحن '
+        f'لـ {result["students"]} طالب بإجمالي {result["amount"]} جنيه'
+    )
+    if result['skipped']:
+        message += f' (تم تخطي {result["skipped"]} طلب تمت معالجته من قبل)'
+    return message
@@ -1,55 +1,29 @@
+import json
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
+from django.core import signing
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from .models import Enrollment
+from . import watchtime
+from .services import PurchaseError, purchase_course
 from students.models import Student
 from courses.models import Course
+from courses import video_tokens
+from edu_platform.idempotency import idempotent
 
+MAX_HEARTBEAT_EVENTS = 120
+
+@idempotent()
 def enroll_course(request, course_id):
     if 'student_id' not in request.session:
         return JsonResponse({'success': False, 'message': 'يجب تسجيل الدخول أولاً'})
     
     try:
-        student = Student.objects.get(id=request.session['student_id'])
-        course = get_object_or_404(Course, id=course_id)
-        
-        # تحقق إذا الرصيد كافي
-        if student.balance < course.price:
-            return JsonResponse({
-                'success': False, 
-                'message': f'رصيدك غير كافي. السعر: {course.price} جنيه، رصيدك: {student.balance} جنيه'
-            })
-        
-        # تحقق إذا مسجل من قبل في حالة active فقط
-        existing_enrollment = Enrollment.objects.filter(
-            student=student, 
-            course=course,
-            status='active'
-        ).first()
-        
-        if existing_enrollment:
-            return JsonResponse({
-                'success': False, 
-                'message': 'أنت مسجل في هذا الكورس بالفعل'
-            })
+        course = get_object_or_404(Course.objects.only('id', 'title', 'price'), id=course_id)
         
-        # خصم المبلغ من رصيد الطالب
-        student.balance -= course.price
-        student.total_spent += course.price
-        student.save()
-        
-        # إنشاء الحجز
-        enrollment = Enrollment(
-            student=student,
-            course=course,
-            amount_paid=course.price,
-            status='active',
-            payment_status='paid'
-        )
-        enrollment.save()
-        
-        # زيادة عدد الطلاب في الكورس
-        course.students_count += 1
-        course.save()
+        # ✅ خصم الرصيد + الاشتراك + عدد الطلاب في معاملة واحدة بتحديثات ذرية
+        purchase_course(request.session['student_id'], course)
         
         # ⬇️ الحل: توجيه مباشر بدون AJAX
         return JsonResponse({
@@ -58,10 +32,12 @@ def enroll_course(request, course_id):
             'redirect_url': '/students/dashboard/'
         })
         
+    except PurchaseError as e:
+        return JsonResponse({'success': False, 'message': str(e)})
     except Student.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'يجب أن تكون طالباً'})
     except Exception as e:
-        return JsonResponse({'success': False, 'message': f'حدث خطأ: {str(e)}'})
+        return JsonResponse({'success': False, 'message': f'حدث خطأ: {str(e)}'}, status=500)
 
 def student_enrollments(request):
     if 'student_id' not in request.session:
@@ -79,4 +55,33 @@ def enrollment_detail(request, enrollment_id):
         return redirect('/students/login/')
     
     enrollment = get_object_or_404(Enrollment, id=enrollment_id, student_id=request.session['student_id'])
-    return render(request, 'enrollments/enrollment_detail.html', {'enrollment': enrollment})
\ No newline at end of file
+    return render(request, 'enrollments/enrollment_detail.html', {'enrollment': enrollment})
+
+
+# ✅ نبضات مشغل الفيديو - التحقق من الرمز الموقع فقط والتجميع في الذاكرة (بدون قاعدة البيانات)
+@csrf_exempt  # الرمز الموقع في الطلب هو التفويض وليس الكوكيز
+@require_POST
+def watch_heartbeat(request):
+    try:
+        data = json.loads(request.body)
+        lesson_id = int(data['lesson'])
+        events = data['events']
+        if not isinstance(events, list) or len(events) > MAX_HEARTBEAT_EVENTS:
+            raise ValueError('events')
+        claims = video_tokens.embed_claims(data['t'], lesson_id, max_age=video_tokens.heartbeat_token_max_age())
+        # الرمز ليس bearer: النبضات تُقبل فقط من جلسة الطالب الذي صدر له
+        if claims['s'] != request.session.get('student_id'):
+            raise signing.BadSignature('Token was issued for another student')
+        enrollment_id = claims['e']
+        # المدة من الرمز الموقع (مدة الدرس المسجلة) - أي مدة يرسلها العميل تُهمل
+        duration = float(claims['d'])
+        if not duration:
+            # درس بدون مدة مسجلة يكتمل بفتح صفحته (lesson_detail) - لا تغطية لحسابها
+            return JsonResponse({'success': True}, status=202)
+        budget = watchtime.wall_time_budget(enrollment_id, lesson_id, claims['i'])
+        watchtime.record(enrollment_id, lesson_id, duration, events, budget)
+    except signing.BadSignature:
+        return JsonResponse({'success': False}, status=403)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False}, status=400)
+    return JsonResponse({'success': True}, status=202)
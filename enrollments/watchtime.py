@@ -0,0 +1,225 @@
+# enrollments/watchtime.py - تجميع نبضات مشغل الفيديو في الذاكرة وكتابتها دفعات
+import atexit
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from courses import video_tokens
+
+from . import activity
+from .models import WatchTime
+
+logger = logging.getLogger(__name__)
+
+# عدد أجزاء الفيديو في خريطة التغطية (بت لكل جزء - 63 حتى لا نلمس بت الإشارة في BIGINT)
+SEGMENTS = 63
+FULL_MASK = (1 << SEGMENTS) - 1
+MAX_EVENT_SECONDS = 60
+MAX_VIDEO_SECONDS = 60 * 60 * 24
+# هامش فوق الوقت الفعلي بين نبضتين (تأخير الشبكة وإرسال sendBeacon عند إغلاق الصفحة)
+HEARTBEAT_SLACK_SECONDS = 30
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+# (enrollment_id, lesson_id) ← [ثواني, أبعد نقطة, خريطة التغطية]
+_pending = {}
+_flusher = None
+
+
+def flush_interval():
+    return getattr(settings, 'WATCH_FLUSH_INTERVAL', 5)
+
+
+def flush_threshold():
+    return getattr(settings, 'WATCH_FLUSH_THRESHOLD', 2000)
+
+
+def completion_segments():
+    """عدد الأجزاء المطلوب مشاهدتها لاعتبار الدرس مكتملاً"""
+    return math.ceil(SEGMENTS * getattr(settings, 'WATCH_COMPLETION_COVERAGE', 0.9))
+
+
+def coverage_mask(start, end, duration):
+    """أجزاء الفيديو التي تغطيها الفترة [start, end) كخريطة بت"""
+    if duration <= 0 or end <= start:
+        return 0
+    segment = duration / SEGMENTS
+    first = min(int(start / segment), SEGMENTS - 1)
+    last = min(int(math.nextafter(min(end, duration), 0) / segment), SEGMENTS - 1)
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def wall_time_budget(enrollment_id, lesson_id, issued_at):
+    """
+    أقصى ثواني مشاهدة تقبلها النبضة الحالية: الوقت الفعلي منذ آخر نبضة لنفس الدرس
+    (أو منذ إصدار الرمز) + هامش. آخر نبضة في التخزين المشترك حتى تتقيد كل العمليات بنفس الوقت.
+    """
+    now = time.time()
+    key = f'watchtime:seen:{enrollment_id}:{lesson_id}'
+    last_seen = max(cache.get(key) or 0, issued_at)
+    cache.set(key, now, video_tokens.heartbeat_token_max_age())
+    return max(now - last_seen, 0) + HEARTBEAT_SLACK_SECONDS
+
+
+def record(enrollment_id, lesson_id, duration, events, budget=None):
+    """
+    إضافة دفعة نبضات من المشغل إلى الذاكرة - بدون أي استعلام.
+    duration: مدة الدرس من الرمز الموقع (لا يُقبل من العميل حتى لا تُغطى كل الأجزاء بمدة ثانية واحدة).
+    كل حدث {position, seconds}: الموضع الحالي وعدد الثواني المشاهدة منذ الحدث السابق.
+    budget: أقصى مجموع ثوانٍ يُقبل من الدفعة (wall_time_budget) - الأحداث بعد نفاده لا تغطي شيئاً.
+    """
+    if not math.isfinite(duration) or not 0 < duration <= MAX_VIDEO_SECONDS:
+        raise ValueError('Invalid video duration')
+    seconds = 0
+    max_position = 0
+    mask = 0
+    for event in events:
+        position, watched = float(event['position']), float(event['seconds'])
+        if not (math.isfinite(position) and math.isfinite(watched)):
+            raise ValueError('Invalid heartbeat event')
+        position = min(max(position, 0), duration)
+        watched = min(max(watched, 0), MAX_EVENT_SECONDS)
+        if budget is not None:
+            watched = min(watched, max(budget - seconds, 0))
+        seconds += watched
+        max_position = max(max_position, position)
+        mask |= coverage_mask(position - watched, position, duration)
+
+    if not seconds and not mask:
+        return
+
+    key = (enrollment_id, lesson_id)
+    with _lock:
+        entry = _pending.get(key)
+        if entry is None:
+            _pending[key] = [seconds, max_position, mask]
+        else:
+            entry[0] += seconds
+            entry[1] = max(entry[1], max_position)
+            entry[2] |= mask
+        pending_count = len(_pending)
+
+    _ensure_flusher()
+    if pending_count >= flush_threshold():
+        _wakeup.set()
+
+
+def _take_pending():
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    return pending
+
+
+def flush(batch_size=500):
+    """كتابة كل ما في الذاكرة: إنشاء الصفوف الناقصة ثم تحديث واحد مجمع لكل دفعة"""
+    pending = _take_pending()
+    keys = list(pending)
+    written = 0
+    for start in range(0, len(keys), batch_size):
+        chunk = {key: pending[key] for key in keys[start:start + batch_size]}
+        try:
+            written += _write_chunk(chunk, batch_size)
+        except Exception:
+            logger.exception('Could not flush %d watch-time entries; keeping them for the next flush', len(chunk))
+            _restore_pending(chunk)
+    return written
+
+
+def _restore_pending(chunk):
+    """إرجاع دفعة فشلت كتابتها للذاكرة ودمجها مع ما وصل بعدها - تُكتب في المحاولة التالية"""
+    with _lock:
+        for key, (seconds, max_position, mask) in chunk.items():
+            entry = _pending.get(key)
+            if entry is None:
+                _pending[key] = [seconds, max_position, mask]
+            else:
+                entry[0] += seconds
+                entry[1] = max(entry[1], max_position)
+                entry[2] |= mask
+
+
+def _write_chunk(chunk, batch_size):
+    now = timezone.now()
+    enrollment_ids = {enrollment_id for enrollment_id, _ in chunk}
+    lesson_ids = {lesson_id for _, lesson_id in chunk}
+
+    with transaction.atomic():
+        # INSERT ... ON CONFLICT DO NOTHING للصفوف الجديدة فقط - القيم تُضاف بعدها للجميع
+        WatchTime.objects.bulk_create(
+            [WatchTime(enrollment_id=enrollment_id, lesson_id=lesson_id) for enrollment_id, lesson_id in chunk],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        rows = [
+            row for row in WatchTime.objects.filter(enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids)
+            .only('id', 'enrollment_id', 'lesson_id')
+            if (row.enrollment_id, row.lesson_id) in chunk
+        ]
+        for row in rows:
+            seconds, max_position, mask = chunk[(row.enrollment_id, row.lesson_id)]
+            row.seconds_watched = F('seconds_watched') + round(seconds)
+            row.max_position = Greatest(F('max_position'), int(max_position))
+            row.coverage = F('coverage').bitor(mask)
+            row.updated_at = now
+        WatchTime.objects.bulk_update(
+            rows,
+            ['seconds_watched', 'max_position', 'coverage', 'updated_at'],
+            batch_size=batch_size,
+        )
+
+        # الإكمال من التغطية الفعلية وليس من فتح الصفحة
+        required = completion_segments()
+        completed = [
+            (row['id'], row['enrollment_id'], row['lesson_id'])
+            for row in WatchTime.objects.filter(id__in=[row.pk for row in rows], completed_at__isnull=True)
+            .values('id', 'enrollment_id', 'lesson_id', 'coverage')
+            if bin(row['coverage'] & FULL_MASK).count('1') >= required
+        ]
+        if completed:
+            WatchTime.objects.filter(id__in=[row_id for row_id, _, _ in completed]).update(completed_at=now)
+
+        # كل اشتراك متأثر: إدخال الدروس المكتملة + تحديث العداد والتقدم وآخر دخول
+        coalesced = {enrollment_id: (set(), now.timestamp()) for enrollment_id, _ in chunk}
+        for _, enrollment_id, lesson_id in completed:
+            coalesced[enrollment_id][0].add(lesson_id)
+        activity.apply_events(coalesced, batch_size=batch_size)
+
+    return len(rows)
+
+
+def _run_flusher():
+    while True:
+        _wakeup.wait(flush_interval())
+        _wakeup.clear()
+        try:
+            flush()
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """خيط كتابة واحد لكل عملية - يبدأ مع أول نبضة (بعد fork في gunicorn)"""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='watchtime-flusher', daemon=True)
+            _flusher.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    if _pending:
+        flush()
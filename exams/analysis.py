@@ -0,0 +1,154 @@
+# exams/analysis.py - تحليل أسئلة الاختبار (Item Analysis) بمصفوفات NumPy من كل النتائج دفعة واحدة
+import numpy as np
+
+from .answer_key import get_answer_key
+from .models import Choice, Question, Result
+
+UNANSWERED = -1
+# نسبة الطلاب في المجموعة العليا والدنيا لحساب معامل التمييز (المعيار الشائع 27%)
+GROUP_FRACTION = 0.27
+HISTOGRAM_BINS = 10
+# حدود تعليم السؤال للمراجعة
+EASY_LIMIT = 0.9
+HARD_LIMIT = 0.2
+LOW_DISCRIMINATION = 0.2
+
+
+def response_matrix(answer_key, answers_rows):
+    """
+    مصفوفة (طالب × سؤال) بفهرس الاختيار داخل السؤال، و UNANSWERED للمتروك أو غير الصالح.
+    الفهارس صغيرة (int16) بدلاً من أرقام الاختيارات حتى تبقى المصفوفة خفيفة مع آلاف الطلاب.
+    """
+    question_ids = answer_key.question_ids
+    indexes = [
+        {choice_id: index for index, choice_id in enumerate(sorted(answer_key.choices[question_id]))}
+        for question_id in question_ids
+    ]
+    rows = [
+        [
+            indexes[column].get(answer_key.selected(answers, question_id), UNANSWERED)
+            for column, question_id in enumerate(question_ids)
+        ]
+        for answers in answers_rows
+    ]
+    return np.array(rows, dtype=np.int16).reshape(len(rows), len(question_ids))
+
+
+def correct_table(answer_key):
+    """مصفوفة (سؤال × فهرس اختيار) منطقية: True للاختيار الصحيح"""
+    width = max((len(answer_key.choices[question_id]) for question_id in answer_key.question_ids), default=0)
+    table = np.zeros((len(answer_key.question_ids), max(width, 1)), dtype=bool)
+    for row, question_id in enumerate(answer_key.question_ids):
+        for index, choice_id in enumerate(sorted(answer_key.choices[question_id])):
+            table[row, index] = choice_id in answer_key.correct[question_id]
+    return table
+
+
+def correctness_matrix(responses, table):
+    """مصفوفة الصواب (طالب × سؤال) 0/1 بدون أي حلقة في بايثون"""
+    answered = responses != UNANSWERED
+    columns = np.arange(responses.shape[1])
+    return answered & table[columns, np.where(answered, responses, 0)]
+
+
+def discrimination_index(correct, totals):
+    """معامل التمييز: نسبة الصواب في أعلى 27% ناقص نسبته في أدنى 27% (حسب الدرجة الكلية)"""
+    students = correct.shape[0]
+    if students < 2:
+        return np.full(correct.shape[1], np.nan)
+    group = max(1, int(round(students * GROUP_FRACTION)))
+    order = np.argsort(totals, kind='stable')
+    return correct[order[-group:]].mean(axis=0) - correct[order[:group]].mean(axis=0)
+
+
+def kr20(correct):
+    """معامل ثبات Kuder-Richardson 20 - None لو أقل من سؤالين أو تباين الدرجات صفر"""
+    students, questions = correct.shape
+    if questions < 2 or students < 2:
+        return None
+    p = correct.mean(axis=0)
+    variance = correct.sum(axis=1).var()
+    if variance == 0:
+        return None
+    return float(questions / (questions - 1) * (1 - (p * (1 - p)).sum() / variance))
+
+
+def score_histogram(percentages, bins=HISTOGRAM_BINS):
+    """توزيع النسب المئوية على فئات متساوية من 0 إلى 100"""
+    counts, edges = np.histogram(np.clip(percentages, 0, 100), bins=bins, range=(0, 100))
+    peak = counts.max() if counts.size and counts.max() else 1
+    return [
+        {
+            'label': f'{int(edges[index])}-{int(edges[index + 1])}%',
+            'count': int(count),
+            'height': round(float(count) / peak * 100, 1),
+        }
+        for index, count in enumerate(counts)
+    ]
+
+
+def item_analysis(exam_id):
+    """
+    تحليل كل النتائج: قراءة متدفقة بـ iterator() ثم حسابات المصفوفات.
+    الاستعلامات ثابتة مهما كان عدد الطلاب: النتائج + نصوص الأسئلة + نصوص الاختيارات.
+    """
+    answer_key = get_answer_key(exam_id)
+    rows = Result.objects.filter(exam_id=exam_id).values_list('answers', 'percentage')
+
+    percentages = []
+
+    def answers_rows():
+        # كل نتيجة تتحول لصف أرقام صغيرة فوراً ولا يبقى JSON الإجابات في الذاكرة
+        for answers, percentage in rows.iterator(chunk_size=2000):
+            percentages.append(percentage)
+            yield answers
+
+    responses = response_matrix(answer_key, answers_rows())
+    table = correct_table(answer_key)
+    correct = correctness_matrix(responses, table)
+    answered = responses != UNANSWERED
+    students = responses.shape[0]
+
+    difficulty = correct.mean(axis=0) if students else np.zeros(correct.shape[1])
+    discrimination = discrimination_index(correct, correct.sum(axis=1))
+    wrong_counts = (answered & ~correct).sum(axis=0)
+
+    question_texts = dict(Question.objects.filter(exam_id=exam_id).values_list('id', 'text'))
+    choice_texts = dict(Choice.objects.filter(question__exam_id=exam_id).values_list('id', 'text'))
+
+    items = []
+    for column, question_id in enumerate(answer_key.question_ids):
+        choice_ids = sorted(answer_key.choices[question_id])
+        picked = responses[:, column]
+        counts = np.bincount(picked[picked != UNANSWERED], minlength=len(choice_ids))
+        item_difficulty = float(difficulty[column])
+        item_discrimination = None if np.isnan(discrimination[column]) else float(discrimination[column])
+        items.append({
+            'number': column + 1,
+            'question_id': question_id,
+            'question_text': question_texts.get(question_id, 'سؤال محذوف'),
+            'difficulty': round(item_difficulty * 100, 1),
+            'discrimination': None if item_discrimination is None else round(item_discrimination, 2),
+            'wrong_count': int(wrong_counts[column]),
+            'unanswered': int(students - answered[:, column].sum()),
+            'choices': [
+                {
+                    'text': choice_texts.get(choice_id, ''),
+                    'is_correct': bool(table[column, index]),
+                    'count': int(counts[index]),
+                    'percentage': round(float(counts[index]) / students * 100, 1) if students else 0,
+                }
+                for index, choice_id in enumerate(choice_ids)
+            ],
+            'needs_review': bool(students) and (
+                not HARD_LIMIT <= item_difficulty <= EASY_LIMIT
+                or (item_discrimination is not None and item_discrimination < LOW_DISCRIMINATION)
+            ),
+        })
+
+    return {
+        'students': students,
+        'items': items,
+        'histogram': score_histogram(np.asarray(percentages, dtype=float)),
+        'kr20': kr20(correct),
+    }
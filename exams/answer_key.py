@@ -0,0 +1,130 @@
+# exams/answer_key.py - مفتاح إجابات الاختبار: يُبنى باستعلام واحد ويُخزن في الكاش بإصدار
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Exam, Question
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+
+def _answer_key_key(exam_id, version):
+    return f'exams:answer_key:{exam_id}:v{version}'
+
+
+def answer_key_version(exam_id):
+    """
+    رقم إصدار المفتاح الحالي من صف الاختبار - يتغير مع أي تعديل في الأسئلة أو الاختيارات.
+    في قاعدة البيانات وليس في الكاش حتى تراه كل العمليات بمجرد تثبيت التعديل.
+    """
+    return Exam.objects.filter(pk=exam_id).values_list('answer_key_version', flat=True).first() or 0
+
+
+def bump_answer_key(exam_id):
+    """إبطال المفتاح الحالي بتحديث ذري في نفس معاملة التعديل - الإصدار القديم يُهمل وينتهي تلقائياً"""
+    Exam.objects.filter(pk=exam_id).update(answer_key_version=F('answer_key_version') + 1)
+
+
+def _choice_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AnswerKey:
+    """
+    الأسئلة بترتيبها، والاختيارات الصحيحة والصالحة لكل سؤال.
+    التصحيح كله في بايثون بدون أي استعلام.
+    """
+
+    def __init__(self, exam_id, question_ids, correct, choices):
+        self.exam_id = exam_id
+        self.question_ids = question_ids
+        # {question_id: frozenset(الاختيارات الصحيحة)}
+        self.correct = correct
+        # {question_id: frozenset(كل اختيارات السؤال)}
+        self.choices = choices
+
+    @property
+    def total_questions(self):
+        return len(self.question_ids)
+
+    def selected(self, answers, question_id):
+        """اختيار الطالب للسؤال لو كان من اختياراته فعلاً - وإلا None"""
+        choice_id = _choice_id(answers.get(str(question_id)))
+        return choice_id if choice_id in self.choices.get(question_id, ()) else None
+
+    def clean(self, answers):
+        """الإجابات الصالحة فقط {str(question_id): choice_id} - يُهمل أي سؤال أو اختيار ليس من الاختبار"""
+        cleaned = {}
+        for question_id in self.question_ids:
+            choice_id = self.selected(answers, question_id)
+            if choice_id is not None:
+                cleaned[str(question_id)] = choice_id
+        return cleaned
+
+    def is_correct(self, question_id, choice_id):
+        return choice_id in self.correct.get(question_id, ())
+
+    def correct_choice(self, question_id):
+        """أول اختيار صحيح للسؤال (للعرض)"""
+        return min(self.correct[question_id]) if self.correct.get(question_id) else None
+
+    def correct_count(self, answers):
+        return sum(
+            1 for question_id in self.question_ids
+            if self.is_correct(question_id, self.selected(answers, question_id))
+        )
+
+    def wrong_questions(self, answers):
+        """الأسئلة المجاب عنها خطأ: [(question_id, اختيار الطالب)]"""
+        wrong = []
+        for question_id in self.question_ids:
+            choice_id = self.selected(answers, question_id)
+            if choice_id is not None and not self.is_correct(question_id, choice_id):
+                wrong.append((question_id, choice_id))
+        return wrong
+
+    def grade(self, answers, points_per_question):
+        """(الدرجة، النسبة المئوية) بنفس حساب submit_exam"""
+        score = self.correct_count(answers) * points_per_question
+        total_points = self.total_questions * points_per_question
+        percentage = (score / total_points) * 100 if total_points > 0 else 0
+        return score, percentage
+
+
+def build_answer_key(exam_id):
+    """استعلام واحد: الأسئلة مع اختياراتها (LEFT JOIN حتى يُحسب السؤال بلا اختيارات)"""
+    question_ids = []
+    correct = {}
+    choices = {}
+    rows = (
+        Question.objects.filter(exam_id=exam_id)
+        .order_by('order', 'id', 'choice__id')
+        .values_list('id', 'choice__id', 'choice__is_correct')
+    )
+    for question_id, choice_id, is_correct in rows:
+        if question_id not in choices:
+            question_ids.append(question_id)
+            choices[question_id] = set()
+            correct[question_id] = set()
+        if choice_id is not None:
+            choices[question_id].add(choice_id)
+            if is_correct:
+                correct[question_id].add(choice_id)
+    return AnswerKey(
+        exam_id,
+        question_ids,
+        {question_id: frozenset(ids) for question_id, ids in correct.items()},
+        {question_id: frozenset(ids) for question_id, ids in choices.items()},
+    )
+
+
+def get_answer_key(exam_id, version=None):
+    """version: إصدار محمل مسبقاً مع الاختبار - يوفر استعلام قراءته"""
+    key = _answer_key_key(exam_id, answer_key_version(exam_id) if version is None else version)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(exam_id)
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
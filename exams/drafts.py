@@ -0,0 +1,76 @@
+# exams/drafts.py - حفظ إجابات الاختبار أثناء الحل: الكاش مع كل تغيير وقاعدة البيانات مرة كل فترة
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .models import ExamDraft
+
+
+def draft_ttl():
+    """مدة بقاء المسودة في الكاش بعد آخر تغيير"""
+    return getattr(settings, 'EXAM_DRAFT_TTL', 60 * 60 * 4)
+
+
+def persist_interval():
+    """أقل فاصل (ثوانٍ) بين كتابتين للمسودة نفسها في قاعدة البيانات"""
+    return getattr(settings, 'EXAM_DRAFT_PERSIST_INTERVAL', 30)
+
+
+def _draft_key(exam_id, student_id):
+    return f'exams:draft:{exam_id}:{student_id}'
+
+
+def _persisted_key(exam_id, student_id):
+    return f'exams:draft:{exam_id}:{student_id}:persisted'
+
+
+def persist_draft(exam_id, student_id, answers):
+    """upsert بجملة واحدة (INSERT ... ON CONFLICT UPDATE على exam+student)"""
+    ExamDraft.objects.bulk_create(
+        [ExamDraft(exam_id=exam_id, student_id=student_id, answers=answers)],
+        update_conflicts=True,
+        # MySQL يستخدم كل المفاتيح الفريدة تلقائياً ولا يقبل تحديدها
+        unique_fields=['exam', 'student'] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=['answers', 'updated_at'],
+    )
+
+
+def save_draft(exam_id, student_id, answers, force=False):
+    """
+    حفظ المسودة في الكاش مع كل تغيير، وفي قاعدة البيانات لأول تغيير في كل فترة فقط
+    (cache.add كقفل للفترة) - التغييرات المتتالية داخل الفترة تُدمج في الكاش.
+    force: كتابة فورية (عند مغادرة الصفحة). يرجع True لو كُتبت في قاعدة البيانات.
+    الكاش يُكتب قبل قاعدة البيانات دائماً، فنسخته هي الأحدث طالما بقيت.
+    """
+    cache.set(_draft_key(exam_id, student_id), (timezone.now(), answers), draft_ttl())
+    due = cache.add(_persisted_key(exam_id, student_id), True, persist_interval())
+    if not (due or force):
+        return False
+    persist_draft(exam_id, student_id, answers)
+    return True
+
+
+def load_draft(exam_id, student_id):
+    """
+    نسخة الكاش، وإلا آخر نسخة مكتوبة في قاعدة البيانات (ثم تُعاد للكاش بوقت كتابتها)، وإلا {}.
+    قاعدة البيانات تُقرأ فقط عند غياب نسخة الكاش (انتهاء المدة أو الإخلاء).
+    """
+    key = _draft_key(exam_id, student_id)
+    cached = cache.get(key)
+    if isinstance(cached, tuple):
+        return cached[1]
+    stored = (
+        ExamDraft.objects.filter(exam_id=exam_id, student_id=student_id)
+        .values_list('updated_at', 'answers').first()
+    )
+    if stored is None:
+        return {}
+    cache.add(key, stored, draft_ttl())
+    return stored[1]
+
+
+def discard_draft(exam_id, student_id):
+    """بعد التسليم: لا حاجة للمسودة"""
+    cache.delete_many([_draft_key(exam_id, student_id), _persisted_key(exam_id, student_id)])
+    ExamDraft.objects.filter(exam_id=exam_id, student_id=student_id).delete()
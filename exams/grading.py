@@ -0,0 +1,172 @@
+# exams/grading.py - استقبال إجابات الاختبار فوراً وتصحيحها دفعات خارج طلب الويب
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .answer_key import get_answer_key
+from .models import Exam, ExamSubmission, Result
+
+logger = logging.getLogger(__name__)
+
+# إجابات محجوزة لعامل توقف في المنتصف تعود للطابور بعد هذه المدة
+STALE_CLAIM = timedelta(minutes=5)
+# التسليم بعد نهاية الاختبار يُقبل خلال هذه المهلة فقط (التسليم التلقائي عند انتهاء الوقت وبطء الشبكة)
+SUBMIT_GRACE = timedelta(minutes=2)
+
+
+def queued_grading():
+    """True: submit_exam يحفظ الإجابات ويرجع فوراً والتصحيح على grade_exam_submissions"""
+    return getattr(settings, 'EXAM_QUEUED_GRADING', False)
+
+
+def fallback_seconds():
+    """بعد هذه المدة في الانتظار تُصحح الإجابات من طلب المتابعة نفسه (لو العمال متوقفون)"""
+    return getattr(settings, 'EXAM_GRADING_FALLBACK_SECONDS', 30)
+
+
+def accepts_answers(exam, now=None):
+    """الاختبار نشط وداخل نافذته (مع مهلة SUBMIT_GRACE بعد النهاية) - للتسليم"""
+    now = now or timezone.now()
+    return exam.is_active and exam.start_date <= now and before_deadline(exam.end_date, now)
+
+
+def before_deadline(end_date, now=None):
+    """لم تنتهِ نافذة الاختبار بعد (مع مهلة SUBMIT_GRACE) - لحفظ المسودة من نافذة الجلسة"""
+    return (now or timezone.now()) <= end_date + SUBMIT_GRACE
+
+
+def submit(exam_id, student_id, answers, started_at=None):
+    """
+    حفظ الإجابات الخام مرة واحدة لكل (اختبار، طالب) - يرجع (submission, created).
+    الضغط المزدوج يرجع نفس الإيصال بدلاً من IntegrityError.
+    """
+    return ExamSubmission.objects.get_or_create(
+        exam_id=exam_id,
+        student_id=student_id,
+        defaults={'answers': answers, 'started_at': started_at},
+    )
+
+
+def release_stale_claims():
+    return ExamSubmission.objects.filter(
+        status='grading', claimed_at__lt=timezone.now() - STALE_CLAIM,
+    ).update(status='pending', claimed_at=None)
+
+
+def claim(ids):
+    """حجز تفاؤلي: UPDATE شرطي على الحالة - كل إجابة يحجزها عامل واحد فقط"""
+    claimed_at = timezone.now()
+    ExamSubmission.objects.filter(id__in=ids, status='pending').update(status='grading', claimed_at=claimed_at)
+    return list(ExamSubmission.objects.filter(id__in=ids, status='grading', claimed_at=claimed_at))
+
+
+def claim_batch(batch_size):
+    ids = list(
+        ExamSubmission.objects.filter(status='pending')
+        .order_by('submitted_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    return claim(ids) if ids else []
+
+
+def grade_submissions(submissions, batch_size=500):
+    """
+    تصحيح دفعة من مفتاح الإجابات المخزن ثم upsert لصفوف Result
+    (INSERT ... ON CONFLICT UPDATE على exam+student) وتعليم الإجابات كمصححة.
+    """
+    if not submissions:
+        return 0
+    # الدرجة وإصدار مفتاح الإجابات لكل اختبار باستعلام واحد للدفعة
+    exams = {
+        exam_id: (points_per_question, version)
+        for exam_id, points_per_question, version in
+        Exam.objects.filter(id__in={submission.exam_id for submission in submissions})
+        .values_list('id', 'points_per_question', 'answer_key_version')
+    }
+
+    results = []
+    times = {}
+    for submission in submissions:
+        points_per_question, version = exams[submission.exam_id]
+        score, percentage = get_answer_key(submission.exam_id, version).grade(submission.answers, points_per_question)
+        started_at = submission.started_at or submission.submitted_at
+        results.append(Result(
+            exam_id=submission.exam_id,
+            student_id=submission.student_id,
+            score=score,
+            percentage=percentage,
+            answers=submission.answers,
+            duration_minutes=max(int((submission.submitted_at - started_at).total_seconds() / 60), 0),
+        ))
+        times[(submission.exam_id, submission.student_id)] = (started_at, submission.submitted_at)
+
+    with transaction.atomic():
+        Result.objects.bulk_create(
+            results,
+            batch_size=batch_size,
+            update_conflicts=True,
+            # MySQL يستخدم كل المفاتيح الفريدة تلقائياً ولا يقبل تحديدها
+            unique_fields=['exam', 'student'] if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=['score', 'percentage', 'answers', 'duration_minutes'],
+        )
+        # auto_now_add يضع وقت التصحيح - وقت البدء والتسليم الفعليان من الإجابات المحفوظة
+        rows = [
+            row for row in Result.objects.filter(
+                exam_id__in={exam_id for exam_id, _ in times},
+                student_id__in={student_id for _, student_id in times},
+            ).only('id', 'exam_id', 'student_id')
+            if (row.exam_id, row.student_id) in times
+        ]
+        for row in rows:
+            row.started_at, row.completed_at = times[(row.exam_id, row.student_id)]
+        Result.objects.bulk_update(rows, ['started_at', 'completed_at'], batch_size=batch_size)
+
+        ExamSubmission.objects.filter(id__in=[submission.pk for submission in submissions]).update(
+            status='graded', graded_at=timezone.now(), error='',
+        )
+    return len(results)
+
+
+def grade_batch(submissions, batch_size=500):
+    """
+    تصحيح دفعة بدون إيقاف العامل عند أي خطأ: الدفعة الفاشلة تُعاد إجابةً إجابة
+    حتى تُعلم الإجابة المعيبة وحدها كفاشلة (مثلاً اختبار حُذف بعد التسليم).
+    """
+    try:
+        return grade_submissions(submissions, batch_size=batch_size)
+    except Exception as e:
+        if len(submissions) > 1:
+            logger.warning('Could not grade a batch of %d exam submissions; grading them one by one', len(submissions))
+            return sum(grade_batch([submission], batch_size=batch_size) for submission in submissions)
+        logger.exception('Could not grade exam submission %s', submissions[0].pk)
+        ExamSubmission.objects.filter(pk=submissions[0].pk).update(status='failed', error=str(e)[:1000])
+        return 0
+
+
+def grade_now(submission):
+    """تصحيح إجابة واحدة فوراً (الوضع المتزامن أو بديل عند توقف العمال)"""
+    claimed = claim([submission.pk])
+    if claimed:
+        grade_batch(claimed)
+    submission.refresh_from_db(fields=['status'])
+    return submission
+
+
+def run_worker(stop, batch_size=200, poll_interval=1.0, once=False):
+    """عامل واحد: حجز دفعة ← تصحيح ← تكرار. once: يتوقف عند فراغ الطابور"""
+    graded = 0
+    while not stop.is_set():
+        try:
+            batch = claim_batch(batch_size)
+            if batch:
+                graded += grade_batch(batch, batch_size=batch_size)
+                continue
+        finally:
+            close_old_connections()
+        if once:
+            break
+        stop.wait(poll_interval)
+    return graded
@@ -0,0 +1,81 @@
+# exams/management/commands/grade_exam_submissions.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams import grading
+from exams.models import ExamSubmission
+
+# كل كم ثانية يعيد الخيط الرئيسي الإجابات المحجوزة لعمال متوقفين إلى الطابور
+RELEASE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'تصحيح إجابات الاختبارات المحفوظة في الطابور بمجموعة عمال ودفعات (يعمل باستمرار أو --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='عدد العمال المتوازيين (افتراضي: 4)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='عدد الإجابات التي يحجزها العامل في كل دفعة (افتراضي: 200)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='ثواني الانتظار عند فراغ الطابور (افتراضي: 1)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='تصحيح ما في الطابور ثم الخروج',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='إعادة الإجابات التي فشل تصحيحها إلى الطابور أولاً',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers و --batch-size يجب أن يكونا أكبر من صفر')
+
+        if options['retry_failed']:
+            retried = ExamSubmission.objects.filter(status='failed').update(status='pending', claimed_at=None, error='')
+            self.stdout.write(f'🔁 تمت إعادة {retried} إجابة فاشلة إلى الطابور')
+        released = grading.release_stale_claims()
+        if released:
+            self.stdout.write(f'🔁 تمت إعادة {released} إجابة محجوزة لعامل متوقف')
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='exam-grader') as pool:
+            futures = [
+                pool.submit(
+                    grading.run_worker, stop,
+                    batch_size=options['batch_size'],
+                    poll_interval=options['poll_interval'],
+                    once=options['once'],
+                )
+                for _ in range(options['workers'])
+            ]
+            try:
+                while not all(future.done() for future in futures):
+                    if stop.wait(RELEASE_INTERVAL if not options['once'] else options['poll_interval']):
+                        break
+                    if not options['once']:
+                        grading.release_stale_claims()
+            except KeyboardInterrupt:
+                self.stdout.write('⏹️ إيقاف العمال بعد الدفعة الحالية...')
+            finally:
+                stop.set()
+            graded = sum(future.result() for future in futures)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ تم تصحيح {graded} إجابة'))
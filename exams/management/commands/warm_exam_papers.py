@@ -0,0 +1,35 @@
+# exams/management/commands/warm_exam_papers.py
+from django.core.management.base import BaseCommand, CommandError
+
+from edu_platform.caching import is_shared_cache
+from exams import papers
+
+
+class Command(BaseCommand):
+    help = 'بناء أوراق الاختبارات التي تبدأ قريباً في الكاش قبل موعدها (يُشغل كل دقيقة من cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes',
+            type=int,
+            default=None,
+            help='بناء أوراق الاختبارات التي تبدأ خلال هذه الدقائق (افتراضي: EXAM_PAPER_WARM_MINUTES)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='عرض عدد الأوراق التي ستُبنى بدون بنائها',
+        )
+
+    def handle(self, *args, **options):
+        if options['minutes'] is not None and options['minutes'] < 0:
+            raise CommandError('--minutes لا يمكن أن يكون سالباً')
+        # الأوراق المبنية في كاش داخل ذاكرة هذه العملية تضيع بانتهائها ولا تراها عمليات الويب
+        if not is_shared_cache():
+            raise CommandError('CACHES["default"] يجب أن يكون كاشاً مشتركاً بين العمليات لتجهيز الأوراق مسبقاً')
+
+        result = papers.warm_papers(minutes=options['minutes'], dry_run=options['dry_run'])
+        prefix = '🔍 (تجربة) ' if options['dry_run'] else '✅ '
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}تم بناء {result["built"]} ورقة من {result["exams"]} اختبار قريب أو جارٍ'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:17
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_remove_exam_notification_sent'),
+        ('students', '0005_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('answers', models.JSONField(default=dict)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('grading', 'قيد التصحيح'), ('graded', 'تم التصحيح'), ('failed', 'فشل التصحيح')], default='pending', max_length=20)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('graded_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='exams.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_submissions', to='students.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'submitted_at'], name='exam_submission_queue_idx')],
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_examsubmission'),
+        ('students', '0005_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to='exams.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_drafts', to='students.student')),
+            ],
+            options={
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
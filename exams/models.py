@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from courses.models import Course
 from teachers.models import Teacher
@@ -18,10 +20,21 @@ class Exam(models.Model):
     points_per_question = models.IntegerField(default=1)
     is_active = models.BooleanField(default=True)  # اجعله True افتراضياً
     created_at = models.DateTimeField(auto_now_add=True)
+    # يزيد ذرياً مع أي تعديل في الأسئلة أو الاختيارات (exams/signals.py) - مفتاح الإجابات والورقة المخزنة بهذا الإصدار
+    answer_key_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # save() العادي لا يكتب الإصدار حتى لا يرجعه لقيمة قديمة محملة في الذاكرة
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'answer_key_version'
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def status(self):
         """حالة الاختبار تلقائياً بناءً على الوقت والأسئلة"""
@@ -83,4 +96,54 @@ class Result(models.Model):
         return f"{self.student.name} - {self.exam.title}"
 
     class Meta:
-        unique_together = ['exam', 'student']      
\ No newline at end of file
+        unique_together = ['exam', 'student']      
+
+
+class ExamSubmission(models.Model):
+    """
+    الإجابات الخام كما وصلت من الطالب - تُحفظ فوراً ويُصححها grade_exam_submissions دفعات.
+    رقم الإيصال ثابت لكل (اختبار، طالب) فإعادة الإرسال ترجع نفس الإيصال.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('grading', 'قيد التصحيح'),
+        ('graded', 'تم التصحيح'),
+        ('failed', 'فشل التصحيح'),
+    ]
+
+    receipt = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='submissions')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_submissions')
+    answers = models.JSONField(default=dict)
+    started_at = models.DateTimeField(null=True, blank=True)
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    graded_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ['exam', 'student']
+        indexes = [
+            models.Index(fields=['status', 'submitted_at'], name='exam_submission_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt} - {self.get_status_display()}"
+
+
+class ExamDraft(models.Model):
+    """
+    آخر نسخة محفوظة من إجابات الطالب أثناء الاختبار - النسخة الحية في الكاش (exams/drafts.py)
+    وتُكتب هنا مرة كل فترة فقط، فتبقى الإجابات لو سقط الكاش أو أُغلقت الصفحة.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='drafts')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_drafts')
+    answers = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['exam', 'student']
+
+    def __str__(self):
+        return f"{self.student_id} - {self.exam_id}"
@@ -0,0 +1,91 @@
+# exams/papers.py - ورقة الاختبار مبنية مسبقاً: الأسئلة والاختيارات (بدون الإجابات الصحيحة) وHTML جاهز
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from edu_platform.caching import get_or_refresh, peek
+
+from .answer_key import answer_key_version
+from .models import Choice, Exam, Question
+
+PAPER_TIMEOUT = 60 * 60 * 24
+
+
+def warm_minutes():
+    """قبل بدء الاختبار بكم دقيقة تُبنى ورقته (warm_exam_papers)"""
+    return getattr(settings, 'EXAM_PAPER_WARM_MINUTES', 10)
+
+
+def _paper_key(exam_id):
+    # نفس إصدار مفتاح الإجابات: أي تعديل في الأسئلة أو الاختيارات يبطل الاثنين (exams/signals.py)
+    return f'exams:paper:{exam_id}:v{answer_key_version(exam_id)}'
+
+
+def build_paper(exam_id):
+    """استعلامان فقط: الأسئلة بترتيبها ثم كل اختياراتها"""
+    questions = (
+        Question.objects.filter(exam_id=exam_id)
+        .only('id', 'text', 'image', 'order')
+        .order_by('order', 'id')
+        .prefetch_related(Prefetch('choice_set', queryset=Choice.objects.only('id', 'text', 'question_id').order_by('id')))
+    )
+    data = {
+        'exam_id': exam_id,
+        'questions': [
+            {
+                'id': question.id,
+                'text': question.text,
+                'image': question.image.url if question.image else None,
+                'choices': [{'id': choice.id, 'text': choice.text} for choice in question.choice_set.all()],
+            }
+            for question in questions
+        ],
+    }
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    context = {'questions': data['questions']}
+    return {
+        'data': data,
+        'etag': f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"',
+        'question_count': len(data['questions']),
+        'grid_html': render_to_string('exams/partials/exam_paper_grid.html', context),
+        'questions_html': render_to_string('exams/partials/exam_paper_questions.html', context),
+    }
+
+
+def get_paper(exam_id):
+    """
+    ورقة الاختبار من الكاش - نفس المحتوى لكل الطلاب.
+    عند عدم وجودها يبنيها طلب واحد وينتظره الباقون (get_or_refresh).
+    """
+    paper = get_or_refresh(_paper_key(exam_id), lambda: build_paper(exam_id), PAPER_TIMEOUT)
+    return {
+        **paper,
+        'grid_html': mark_safe(paper['grid_html']),
+        'questions_html': mark_safe(paper['questions_html']),
+    }
+
+
+def exams_to_warm(minutes=None):
+    """الاختبارات النشطة التي تبدأ خلال المدة القادمة أو بدأت ولم تنته"""
+    now = timezone.now()
+    return Exam.objects.filter(
+        is_active=True,
+        start_date__lte=now + timedelta(minutes=warm_minutes() if minutes is None else minutes),
+        end_date__gte=now,
+    ).order_by('start_date').values_list('id', flat=True)
+
+
+def warm_papers(minutes=None, dry_run=False):
+    """بناء أوراق الاختبارات القريبة غير الموجودة في الكاش - يرجع {exams, built}"""
+    exam_ids = list(exams_to_warm(minutes))
+    missing = [exam_id for exam_id in exam_ids if peek(_paper_key(exam_id)) is None]
+    if not dry_run:
+        for exam_id in missing:
+            get_paper(exam_id)
+    return {'exams': len(exam_ids), 'built': len(missing)}
@@ -0,0 +1,21 @@
+# exams/signals.py - إبطال مفتاح الإجابات المخزن عند تعديل الأسئلة أو الاختيارات
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .answer_key import bump_answer_key
+from .models import Choice, Question
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    # في نفس المعاملة: الإصدار الجديد يظهر مع التعديل نفسه عند التثبيت
+    bump_answer_key(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_choice_answer_key(sender, instance, **kwargs):
+    exam_id = Question.objects.filter(pk=instance.question_id).values_list('exam_id', flat=True).first()
+    if exam_id is not None:
+        bump_answer_key(exam_id)
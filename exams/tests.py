@@ -1,3 +1,75 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .analysis import UNANSWERED, correct_table, correctness_matrix, discrimination_index, kr20, response_matrix
+from .answer_key import AnswerKey
+
+
+def make_answer_key():
+    # سؤالان: الأول صحيحه 101 والثاني صحيحه 202
+    return AnswerKey(
+        1,
+        [10, 20],
+        {10: frozenset({101}), 20: frozenset({202})},
+        {10: frozenset({101, 102}), 20: frozenset({201, 202})},
+    )
+
+
+class ResponseMatrixTests(SimpleTestCase):
+    def test_choice_indexes_and_unanswered(self):
+        responses = response_matrix(make_answer_key(), [
+            {'10': 101, '20': 202},
+            {'10': 102, '20': 999},
+            {},
+        ])
+        np.testing.assert_array_equal(responses, [[0, 1], [1, UNANSWERED], [UNANSWERED, UNANSWERED]])
+
+    def test_no_results(self):
+        self.assertEqual(response_matrix(make_answer_key(), []).shape, (0, 2))
+
+
+class CorrectnessMatrixTests(SimpleTestCase):
+    def test_matches_correct_choices(self):
+        table = correct_table(make_answer_key())
+        np.testing.assert_array_equal(table, [[True, False], [False, True]])
+
+        responses = np.array([[0, 1], [1, UNANSWERED], [UNANSWERED, 0]], dtype=np.int16)
+        np.testing.assert_array_equal(
+            correctness_matrix(responses, table),
+            [[True, True], [False, False], [False, False]],
+        )
+
+    def test_unanswered_is_never_correct(self):
+        # فهرس 0 صحيح في الجدول - المتروك لا يُحسب صحيحاً رغم استبداله بـ 0 داخلياً
+        table = np.array([[True, False]])
+        responses = np.array([[UNANSWERED]], dtype=np.int16)
+        self.assertFalse(correctness_matrix(responses, table)[0, 0])
+
+
+class DiscriminationIndexTests(SimpleTestCase):
+    def test_upper_minus_lower_group(self):
+        # 10 طلاب: المجموعتان العليا والدنيا 3 طلاب لكل منهما (27%)
+        totals = np.arange(10)
+        correct = np.array([[0, 1]] * 3 + [[1, 1]] * 4 + [[1, 0]] * 3, dtype=bool)
+        np.testing.assert_allclose(discrimination_index(correct, totals), [1.0, -1.0])
+
+    def test_needs_two_students(self):
+        result = discrimination_index(np.array([[True, False]]), np.array([1]))
+        self.assertTrue(np.isnan(result).all())
+
+
+class KR20Tests(SimpleTestCase):
+    def test_known_value(self):
+        correct = np.array([
+            [1, 1, 1],
+            [1, 1, 0],
+            [1, 0, 0],
+            [0, 0, 0],
+        ], dtype=bool)
+        # p = (0.75, 0.5, 0.25) ← Σpq = 0.625، تباين الدرجات = 1.25 ← 3/2 × (1 - 0.5)
+        self.assertAlmostEqual(kr20(correct), 0.75)
+
+    def test_undefined_cases(self):
+        self.assertIsNone(kr20(np.array([[1], [0]], dtype=bool)))
+        self.assertIsNone(kr20(np.array([[1, 0]], dtype=bool)))
+        self.assertIsNone(kr20(np.array([[1, 0], [0, 1]], dtype=bool)))
@@ -10,8 +10,11 @@ urlpatterns = [
     path('question/<int:question_id>/delete/', views.delete_question, name='delete_question'),
     path('student/', views.student_exams, name='student_exams'),
     path('<int:exam_id>/take/', views.take_exam, name='take_exam'),
+    path('<int:exam_id>/paper/', views.exam_paper, name='exam_paper'),
+    path('<int:exam_id>/draft/', views.save_exam_draft, name='save_exam_draft'),
     path('<int:exam_id>/submit/', views.submit_exam, name='submit_exam'),
     path('<int:exam_id>/result/', views.exam_result, name='exam_result'),
+    path('submission/<uuid:receipt>/status/', views.submission_status, name='submission_status'),
     path('api/wrong-answers/<int:exam_id>/<int:student_id>/', views.wrong_answers_api, name='wrong_answers_api'),
     path('<int:exam_id>/results/', views.exam_results_stats, name='exam_results_stats'),
     
@@ -1,18 +1,25 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
 import json
 from teachers.decorators import teacher_required
 from teachers.models import Teacher
 from courses.models import Course
-from .models import Exam, Question, Choice, Result
+from .models import Exam, ExamSubmission, Question, Choice, Result
 from django.utils import timezone
 from students.models import Student
 from enrollments.models import Enrollment
 from django.http import JsonResponse
 from django.db.models import Avg, Count
 from django.template.defaulttags import register
+from edu_platform.conditional import etag_matches
+from edu_platform.uploads import upload_error
+from .analysis import item_analysis
+from .answer_key import get_answer_key
+from . import drafts, grading, papers
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 
 @teacher_required
 def create_exam(request):
@@ -78,6 +85,10 @@ def exam_questions(request, exam_id):
             choices_json = request.POST.get('choices')
             correct_choice_index = request.POST.get('correct_choice_index')
             
+            error = upload_error(request)
+            if error:
+                return JsonResponse({'success': False, 'error': error})
+            
             if not question_text or not choices_json or correct_choice_index is None:
                 return JsonResponse({'success': False, 'error': 'بيانات غير مكتملة'})
             
@@ -206,6 +217,13 @@ def student_exams(request):
 
 
 
+def _exam_in_progress(request, exam_id):
+    """نافذة الاختبار المفتوح في الجلسة (من take_exam) لو كان هو exam_id، وإلا None"""
+    in_progress = request.session.get('exam_in_progress')
+    if isinstance(in_progress, dict) and in_progress.get('id') == exam_id:
+        return in_progress
+    return None
+
 def take_exam(request, exam_id):
     """صفحة أداء الاختبار"""
     # التحقق من تسجيل الدخول
@@ -225,7 +243,7 @@ def take_exam(request, exam_id):
     # التحقق من تسجيل الطالب في الكورس
     enrollment = Enrollment.objects.filter(
         student=student,
-        course=exam.course,
+        course_id=exam.course_id,
         status='active'
     ).first()
     
@@ -239,56 +257,105 @@ def take_exam(request, exam_id):
     if existing_result:
         return redirect('exams:exam_result', exam_id=exam.id)
     
-    # جلب الأسئلة مرتبة
-    questions = Question.objects.filter(exam=exam).order_by('order').prefetch_related('choice_set')
+    # ✅ ورقة الاختبار مبنية مسبقاً في الكاش (warm_exam_papers) - بدون استعلام للأسئلة
+    paper = papers.get_paper(exam.id)
     
     # ✅ حفظ وقت بدء الاختبار
     request.session['exam_start_time'] = str(timezone.now())
+    # ✅ الاختبار المفتوح حالياً ونافذته وإصدار مفتاحه - حفظ المسودة يتحقق منها بدون قراءة صف الاختبار
+    request.session['exam_in_progress'] = {
+        'id': exam.id,
+        'ends_at': exam.end_date.isoformat(),
+        'key_version': exam.answer_key_version,
+    }
     
     return render(request, 'exams/take_exam.html', {
         'exam': exam,
-        'questions': questions,
+        'paper': paper,
         'student': student,
-        'duration_minutes': exam.duration
+        'duration_minutes': exam.duration,
+        # ✅ استرجاع الإجابات المحفوظة بعد إعادة تحميل الصفحة أو انقطاع الاتصال
+        'draft_answers': drafts.load_draft(exam.id, student.id)
     })
 
+def exam_paper(request, exam_id):
+    """ورقة الاختبار JSON (بدون الإجابات الصحيحة) مع ETag - من الكاش فقط"""
+    if not request.session.get('student_id'):
+        return JsonResponse({'error': 'يجب تسجيل الدخول'}, status=401)
+    if _exam_in_progress(request, exam_id) is None:
+        return JsonResponse({'error': 'هذا الاختبار غير مفتوح'}, status=403)
+    
+    paper = papers.get_paper(exam_id)
+    if etag_matches(request, paper['etag']):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(paper['data'], json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = paper['etag']
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@require_POST
+def save_exam_draft(request, exam_id):
+    """حفظ تلقائي لإجابات الاختبار مع كل تغيير - الجلسة والكاش فقط في أغلب الطلبات (بدون صف الاختبار)"""
+    student_id = request.session.get('student_id')
+    if not student_id:
+        return JsonResponse({'success': False, 'error': 'يجب تسجيل الدخول'}, status=401)
+    # نافذة الاختبار من الجلسة - التسليم (submit_exam) يعيد التحقق الكامل من صف الاختبار
+    in_progress = _exam_in_progress(request, exam_id)
+    if in_progress is None or not grading.before_deadline(timezone.datetime.fromisoformat(in_progress['ends_at'])):
+        return JsonResponse({'success': False, 'error': 'هذا الاختبار غير مفتوح'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        answers = data['answers']
+        if not isinstance(answers, dict):
+            raise ValueError('answers')
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False}, status=400)
+    
+    # ✅ التحقق من مفتاح الإجابات المخزن - أي سؤال أو اختيار خارج الاختبار يُهمل
+    answers = get_answer_key(exam_id, in_progress['key_version']).clean(answers)
+    persisted = drafts.save_draft(exam_id, student_id, answers, force=bool(data.get('final')))
+    return JsonResponse({'success': True, 'saved': len(answers), 'persisted': persisted})
+
 def submit_exam(request, exam_id):
     if not request.session.get('student_id'):
         return redirect('students:student_login')
     
     if request.method == 'POST':
         student_id = request.session.get('student_id')
-        student = Student.objects.get(id=student_id)
-        exam = get_object_or_404(Exam, id=exam_id)
+        exam = get_object_or_404(
+            Exam.objects.only('id', 'course_id', 'is_active', 'start_date', 'end_date', 'answer_key_version'), id=exam_id
+        )
         
-        # جلب الإجابات من الـ JSON
-        answers_data = request.POST.get('answers_data')
-        if not answers_data:
+        # ✅ نتيجة سابقة (حتى بدون إيصال تسليم) لا تُستبدل بتسليم جديد
+        if Result.objects.filter(exam_id=exam.id, student_id=student_id).exists():
+            return redirect('exams:exam_result', exam_id=exam.id)
+        
+        # ✅ نفس تحقق take_exam: الاختبار مفتوح (مع مهلة قصيرة للتسليم التلقائي عند انتهاء الوقت) والاشتراك نشط
+        if not grading.accepts_answers(exam):
+            messages.error(request, 'هذا الاختبار غير متاح حالياً')
+            return redirect('exams:student_exams')
+        if not Enrollment.objects.filter(student_id=student_id, course_id=exam.course_id, status='active').exists():
+            messages.error(request, 'غير مسجل في هذا الكورس')
             return redirect('exams:student_exams')
         
+        # جلب الإجابات من الـ JSON
+        answers_data = request.POST.get('answers_data')
         try:
-            answers = json.loads(answers_data)
+            answers = json.loads(answers_data) if answers_data else None
         except json.JSONDecodeError:
-            return redirect('exams:student_exams')
+            answers = None
         
-        # حساب الدرجة
-        score = 0
-        total_questions = exam.question_set.count()
+        # ✅ لو لم تصل الإجابات (انقطاع الاتصال أو انتهاء الوقت) يُسلم آخر ما حُفظ تلقائياً
+        if not isinstance(answers, dict) or not answers:
+            answers = drafts.load_draft(exam.id, student_id) or answers
         
-        for question in exam.question_set.all():
-            selected_choice_id = answers.get(str(question.id))
-            
-            if selected_choice_id:
-                try:
-                    selected_choice = Choice.objects.get(id=selected_choice_id, question=question)
-                    if selected_choice.is_correct:
-                        score += exam.points_per_question
-                except Choice.DoesNotExist:
-                    pass
+        if not isinstance(answers, dict):
+            return redirect('exams:student_exams')
         
-        # حساب النسبة المئوية
-        total_points = total_questions * exam.points_per_question
-        percentage = (score / total_points) * 100 if total_points > 0 else 0
+        # ✅ تُحفظ الإجابات الصالحة فقط (نفس تنظيف المسودة) - وليس بيانات POST كما هي
+        answers = get_answer_key(exam.id, exam.answer_key_version).clean(answers)
         
         # ✅ جلب وقت البداية من session
         start_time_str = request.session.get('exam_start_time')
@@ -297,22 +364,20 @@ def submit_exam(request, exam_id):
         else:
             started_at = timezone.now()
         
-        # ✅ حفظ النتيجة مع الوقت
-        Result.objects.create(
-            exam=exam,
-            student=student,
-            score=score,
-            percentage=percentage,
-            answers=answers,
-            started_at=started_at,
-            completed_at=timezone.now()
-        )
+        # ✅ حفظ الإجابات الخام فوراً - الضغط المزدوج يرجع نفس الإيصال
+        submission, created = grading.submit(exam.id, student_id, answers, started_at)
+        
+        # الوضع المتزامن: التصحيح الآن (upsert على Result). وضع الطابور: يصححها grade_exam_submissions
+        if not grading.queued_grading() and submission.status == 'pending':
+            grading.grade_now(submission)
         
-        # ✅ مسح وقت البدء من session
+        # ✅ مسح وقت البدء والمسودة بعد التسليم
         if 'exam_start_time' in request.session:
             del request.session['exam_start_time']
+        request.session.pop('exam_in_progress', None)
+        drafts.discard_draft(exam.id, student_id)
         
-        return redirect('exams:exam_result', exam_id=exam.id)
+        return redirect(f"{reverse('exams:exam_result', args=[exam.id])}?receipt={submission.receipt}")
     
     return redirect('exams:student_exams')
 
@@ -325,7 +390,16 @@ def exam_result(request, exam_id):
     student_id = request.session.get('student_id')
     student = Student.objects.get(id=student_id)
     exam = get_object_or_404(Exam, id=exam_id)
-    result = get_object_or_404(Result, exam=exam, student=student)
+    result = Result.objects.filter(exam=exam, student=student).first()
+    
+    # الإجابات في طابور التصحيح - صفحة انتظار تتابع الإيصال
+    if result is None:
+        submission = get_object_or_404(ExamSubmission.objects.only('receipt', 'status'), exam=exam, student=student)
+        return render(request, 'exams/exam_pending.html', {
+            'exam': exam,
+            'student': student,
+            'submission': submission
+        })
     
     return render(request, 'exams/exam_result.html', {
         'exam': exam,
@@ -333,6 +407,27 @@ def exam_result(request, exam_id):
         'student': student
     })
 
+def submission_status(request, receipt):
+    """متابعة إيصال التسليم - لو تأخر التصحيح (العمال متوقفون) يُصحح هنا"""
+    if not request.session.get('student_id'):
+        return JsonResponse({'error': 'يجب تسجيل الدخول'}, status=401)
+    
+    submission = get_object_or_404(
+        ExamSubmission.objects.only('id', 'exam_id', 'status', 'submitted_at'),
+        receipt=receipt,
+        student_id=request.session['student_id']
+    )
+    
+    waited = (timezone.now() - submission.submitted_at).total_seconds()
+    if submission.status == 'pending' and waited > grading.fallback_seconds():
+        grading.grade_now(submission)
+    
+    return JsonResponse({
+        'status': submission.status,
+        'status_display': submission.get_status_display(),
+        'result_url': reverse('exams:exam_result', args=[submission.exam_id]) if submission.status == 'graded' else None
+    })
+
 def wrong_answers_api(request, exam_id, student_id):
     """API لجلب الإجابات الخاطئة"""
     try:
@@ -340,25 +435,27 @@ def wrong_answers_api(request, exam_id, student_id):
         student = Student.objects.get(id=student_id)
         result = Result.objects.get(exam=exam, student=student)
         
-        wrong_answers = []
+        # ✅ التصحيح من مفتاح الإجابات، ثم نصوص الأسئلة والاختيارات الخاطئة فقط باستعلامين
+        answer_key = get_answer_key(exam.id, exam.answer_key_version)
+        wrong = answer_key.wrong_questions(result.answers)
+        correct_ids = {question_id: answer_key.correct_choice(question_id) for question_id, _ in wrong}
+        questions = Question.objects.only('id', 'text', 'image').in_bulk([question_id for question_id, _ in wrong])
+        choice_texts = dict(
+            Choice.objects.filter(
+                id__in=[choice_id for _, choice_id in wrong] + [choice_id for choice_id in correct_ids.values() if choice_id]
+            ).values_list('id', 'text')
+        )
         
-        for question in exam.question_set.all():
-            student_choice_id = result.answers.get(str(question.id))
-            
-            if student_choice_id:
-                try:
-                    student_choice = Choice.objects.get(id=student_choice_id)
-                    correct_choice = question.choice_set.filter(is_correct=True).first()
-                    
-                    if student_choice != correct_choice:
-                        wrong_answers.append({
-                            'question_text': question.text,
-                            'question_image': question.image.url if question.image else None,
-                            'student_answer': student_choice.text,
-                            'correct_answer': correct_choice.text if correct_choice else 'غير محدد'
-                        })
-                except Choice.DoesNotExist:
-                    pass
+        wrong_answers = []
+        for question_id, student_choice_id in wrong:
+            question = questions[question_id]
+            correct_choice_id = correct_ids[question_id]
+            wrong_answers.append({
+                'question_text': question.text,
+                'question_image': question.image.url if question.image else None,
+                'student_answer': choice_texts[student_choice_id],
+                'correct_answer': choice_texts[correct_choice_id] if correct_choice_id else 'غير محدد'
+            })
         
         return JsonResponse({
             'wrong_answers': wrong_answers
@@ -405,23 +502,15 @@ def exam_results_stats(request, exam_id):
     passed_students = results.filter(percentage__gte=50).count()
     failed_students = total_students - passed_students
     
-    # الأسئلة الأكثر خطأ
-    wrong_questions = {}
-    for result in results:
-        for q_id, choice_id in result.answers.items():
-            question = Question.objects.get(id=int(q_id))
-            choice = Choice.objects.get(id=choice_id)
-            if not choice.is_correct:
-                wrong_questions[question.id] = wrong_questions.get(question.id, 0) + 1
+    # ✅ تحليل الأسئلة بمصفوفات NumPy: الصعوبة والتمييز وتوزيع الاختيارات والثبات (KR-20)
+    analysis = item_analysis(exam.id)
     
     # تحضير البيانات للتمبلت
-    top_wrong_questions = []
-    for question_id, wrong_count in sorted(wrong_questions.items(), key=lambda x: x[1], reverse=True)[:5]:
-        question = Question.objects.get(id=question_id)
-        top_wrong_questions.append({
-            'question_text': question.text,
-            'wrong_count': wrong_count
-        })
+    top_wrong_questions = sorted(
+        (item for item in analysis['items'] if item['wrong_count']),
+        key=lambda item: item['wrong_count'],
+        reverse=True
+    )[:5]
     
     return render(request, 'exams/exam_results_stats.html', {
         'exam': exam,
@@ -431,4 +520,6 @@ def exam_results_stats(request, exam_id):
         'passed_students': passed_students,
         'failed_students': failed_students,
         'top_wrong_questions': top_wrong_questions,
+        'analysis': analysis,
+        'kr20': round(analysis['kr20'], 2) if analysis['kr20'] is not None else None,
     })
\ No newline at end of file
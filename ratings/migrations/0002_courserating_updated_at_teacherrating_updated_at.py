@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courserating',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='آخر تعديل'),
+        ),
+        migrations.AddField(
+            model_name='teacherrating',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='آخر تعديل'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0002_courserating_updated_at_teacherrating_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='courserating',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='تاريخ التقييم'),
+        ),
+    ]
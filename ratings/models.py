@@ -8,7 +8,9 @@ class CourseRating(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name="الكورس")
     rating = models.IntegerField(verbose_name="التقييم", choices=[(i, i) for i in range(1, 6)])
     review = models.TextField(blank=True, verbose_name="المراجعة")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ التقييم")
+    # مفهرس لأن درجات الرواج تقرأ التقييمات الجديدة بنافذة زمنية (courses/trending.py)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="تاريخ التقييم")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تعديل")
     
     class Meta:
         verbose_name = 'تقييم كورس'
@@ -21,6 +23,7 @@ class TeacherRating(models.Model):
     rating = models.IntegerField(verbose_name="التقييم", choices=[(i, i) for i in range(1, 6)])
     review = models.TextField(blank=True, verbose_name="المراجعة")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ التقييم")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تعديل")
     
     class Meta:
         verbose_name = 'تقييم معلم'
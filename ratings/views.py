@@ -6,8 +6,42 @@ from teachers.models import Teacher
 from students.models import Student
 from django.db import models
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from edu_platform.conditional import make_etag
+from edu_platform.idempotency import idempotent
+
+
+def _ratings_validators(request, queryset, cache_attr):
+    """أكبر رقم + العدد + آخر تعديل للتقييمات - تجميع واحد على الفهرس"""
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, queryset.aggregate(
+            last_id=models.Max('id'),
+            total=models.Count('id'),
+            last_updated=models.Max('updated_at'),
+        ))
+    return getattr(request, cache_attr)
+
+
+def course_ratings_etag(request, course_id):
+    stats = _ratings_validators(request, CourseRating.objects.filter(course_id=course_id), '_course_ratings_validators')
+    return make_etag('course-ratings', course_id, stats['last_id'], stats['total'], stats['last_updated'] and stats['last_updated'].isoformat())
+
+
+def course_ratings_last_modified(request, course_id):
+    return _ratings_validators(request, CourseRating.objects.filter(course_id=course_id), '_course_ratings_validators')['last_updated']
+
+
+def teacher_ratings_etag(request, teacher_id):
+    stats = _ratings_validators(request, TeacherRating.objects.filter(teacher_id=teacher_id), '_teacher_ratings_validators')
+    return make_etag('teacher-ratings', teacher_id, stats['last_id'], stats['total'], stats['last_updated'] and stats['last_updated'].isoformat())
+
+
+def teacher_ratings_last_modified(request, teacher_id):
+    return _ratings_validators(request, TeacherRating.objects.filter(teacher_id=teacher_id), '_teacher_ratings_validators')['last_updated']
+
 
 @csrf_exempt
+@idempotent()
 def submit_course_rating(request, course_id):
     if 'student_id' not in request.session:
         return JsonResponse({'success': False, 'message': 'يجب تسجيل الدخول'})
@@ -35,6 +69,7 @@ def submit_course_rating(request, course_id):
         except Student.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'يجب أن تكون طالبًا'})
 
+@condition(etag_func=course_ratings_etag, last_modified_func=course_ratings_last_modified)
 def get_course_ratings(request, course_id):
     course = get_object_or_404(Course, id=course_id)
     ratings = CourseRating.objects.filter(course=course)
@@ -76,6 +111,7 @@ def submit_teacher_rating(request, teacher_id):
         except Student.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'يجب أن تكون طالبًا'})
 
+@condition(etag_func=teacher_ratings_etag, last_modified_func=teacher_ratings_last_modified)
 def get_teacher_ratings(request, teacher_id):
     teacher = get_object_or_404(Teacher, id=teacher_id)
     ratings = TeacherRating.objects.filter(teacher=teacher)
@@ -1,13 +1,76 @@
+from django import forms
 from django.contrib import admin
 from .models import Student
-from .models import WalletSettings
+from .models import WalletSettings, WalletSnapshot, WalletTransaction
+from . import wallet
+from edu_platform.uploads import UploadGuardAdminMixin
 
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'phone_number', 'grade', 'year', 'balance']
+    # أعمدة الرصيد تُحدث من سجل المحفظة فقط
+    readonly_fields = ['balance', 'total_spent', 'bonus_balance']
     # تم إزالة عمود المراسلة تماماً
 
 admin.site.register(Student, StudentAdmin)
 
 @admin.register(WalletSettings)
 class WalletSettingsAdmin(admin.ModelAdmin):
-    list_display = ['__str__']
\ No newline at end of file
+    list_display = ['__str__']
+
+
+class WalletTransactionForm(forms.ModelForm):
+    # الشراء يُسجل من مسار الشراء فقط - الإدارة تضيف حركات إيداع
+    kind = forms.ChoiceField(
+        label='نوع الحركة',
+        choices=[choice for choice in WalletTransaction.KIND_CHOICES if choice[0] != 'purchase'],
+    )
+
+    class Meta:
+        model = WalletTransaction
+        fields = ['student', 'kind', 'amount', 'reference', 'note']
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError('المبلغ يجب أن يكون أكبر من صفر')
+        return amount
+
+
+@admin.register(WalletTransaction)
+class WalletTransactionAdmin(admin.ModelAdmin):
+    """سجل إلحاق فقط: إضافة حركات جديدة بدون تعديل أو حذف"""
+    form = WalletTransactionForm
+    list_display = ['student', 'kind', 'amount', 'reference', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['student__name', 'student__phone_number', 'reference']
+    list_select_related = ['student']
+    raw_id_fields = ['student']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        # الحركة والرصيد المخزن معاً في معاملة واحدة
+        posted = wallet.post(obj.student_id, obj.kind, obj.amount, reference=obj.reference, note=obj.note)
+        obj.pk = posted.pk
+        obj.created_at = posted.created_at
+
+
+@admin.register(WalletSnapshot)
+class WalletSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['student', 'as_of', 'balance', 'total_spent', 'bonus_balance']
+    list_filter = ['as_of']
+    search_fields = ['student__name', 'student__phone_number']
+    list_select_related = ['student']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,26 @@
+# students/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+
+from edu_platform.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'حذف مفاتيح Idempotency-Key المنتهية (يُشغل دورياً من cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='عدد المفاتيح في كل دفعة حذف (افتراضي: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='عرض عدد المفاتيح المنتهية دون حذف',
+        )
+
+    def handle(self, *args, **options):
+        count = purge_expired(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        prefix = '🔍 (تجربة) ' if options['dry_run'] else '✅ '
+        self.stdout.write(self.style.SUCCESS(f'{prefix}تم حذف {count} مفتاح منتهي'))
@@ -0,0 +1,45 @@
+# students/management/commands/snapshot_wallets.py
+from django.core.management.base import BaseCommand, CommandError
+
+from students import wallet
+
+
+class Command(BaseCommand):
+    help = 'أخذ لقطات أرصدة للطلاب الذين لهم حركات محفظة منذ آخر تشغيل (يُشغل دورياً من cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='عدد الطلاب في كل دفعة (افتراضي: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='حساب اللقطات دون حفظ',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='مطابقة الأرصدة المخزنة مع (آخر لقطة + الحركات بعدها) بدلاً من أخذ لقطات',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = wallet.verify_projection(batch_size=options['batch_size'])
+            for student_id, stored, expected in mismatches:
+                self.stdout.write(
+                    f'🔧 الطالب {student_id}: ' + '، '.join(
+                        f'{field} {stored[field]} ← {expected[field]}'
+                        for field in wallet.PROJECTION_FIELDS if stored[field] != expected[field]
+                    )
+                )
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} طالب رصيده المخزن لا يطابق سجل المحفظة')
+            self.stdout.write(self.style.SUCCESS('✅ كل الأرصدة المخزنة مطابقة لسجل المحفظة'))
+            return
+
+        created = wallet.take_snapshots(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        prefix = '🔍 (تجربة) ' if options['dry_run'] else '✅ '
+        self.stdout.write(self.style.SUCCESS(f'{prefix}تم أخذ {created} لقطة رصيد'))
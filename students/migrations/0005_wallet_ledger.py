@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def opening_snapshots(apps, schema_editor):
+    # الأرصدة الحالية تصبح لقطة افتتاحية - الحركات تبدأ بعدها
+    Student = apps.get_model('students', 'Student')
+    WalletSnapshot = apps.get_model('students', 'WalletSnapshot')
+    as_of = timezone.now()
+    snapshots = [
+        WalletSnapshot(
+            student_id=student_id,
+            as_of=as_of,
+            balance=balance,
+            total_spent=total_spent,
+            bonus_balance=bonus_balance,
+        )
+        for student_id, balance, total_spent, bonus_balance in Student.objects.values_list(
+            'id', 'balance', 'total_spent', 'bonus_balance'
+        ).iterator(chunk_size=2000)
+    ]
+    WalletSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_remove_walletsettings_video_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(verbose_name='حتى تاريخ')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='رصيد المحفظة')),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='إجمالي المنصرف')),
+                ('bonus_balance', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='رصيد الإهداءات')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_snapshots', to='students.student', verbose_name='الطالب')),
+            ],
+            options={
+                'verbose_name': 'لقطة رصيد',
+                'verbose_name_plural': 'لقطات الرصيد',
+                'unique_together': {('student', 'as_of')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WalletTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('topup', 'شحن رصيد'), ('purchase', 'شراء كورس'), ('bonus', 'إهداء'), ('refund', 'استرداد')], max_length=20, verbose_name='نوع الحركة')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='المبلغ')),
+                ('reference', models.CharField(blank=True, max_length=100, verbose_name='المرجع')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='ملاحظة')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الحركة')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_transactions', to='students.student', verbose_name='الطالب')),
+            ],
+            options={
+                'verbose_name': 'حركة محفظة',
+                'verbose_name_plural': 'حركات المحفظة',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['student', 'created_at'], name='wallet_tx_student_idx'), models.Index(fields=['created_at'], name='wallet_tx_created_idx')],
+            },
+        ),
+        migrations.RunPython(opening_snapshots, migrations.RunPython.noop),
+    ]
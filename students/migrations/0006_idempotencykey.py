@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, verbose_name='النطاق')),
+                ('key', models.CharField(max_length=255, verbose_name='المفتاح')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='بصمة الطلب')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='كود الاستجابة')),
+                ('content', models.BinaryField(default=b'', verbose_name='محتوى الاستجابة')),
+                ('content_type', models.CharField(blank=True, max_length=255, verbose_name='نوع المحتوى')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الطلب')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='ينتهي في')),
+            ],
+            options={
+                'verbose_name': 'مفتاح Idempotency',
+                'verbose_name_plural': 'مفاتيح Idempotency',
+                'unique_together': {('scope', 'key')},
+            },
+        ),
+    ]
@@ -76,4 +76,78 @@ class WalletSettings(models.Model):
         verbose_name_plural = "إعدادات المحافظ"
     
     def __str__(self):
-        return "إعدادات محافظ الشحن"
\ No newline at end of file
+        return "إعدادات محافظ الشحن"
+
+
+class WalletTransaction(models.Model):
+    """
+    حركة محفظة - سجل إلحاق فقط (لا تعديل ولا حذف).
+    أعمدة الرصيد في Student مجرد إسقاط مخزن لهذا السجل يحدثه students/wallet.py في نفس المعاملة.
+    """
+    KIND_CHOICES = [
+        ('topup', 'شحن رصيد'),
+        ('purchase', 'شراء كورس'),
+        ('bonus', 'إهداء'),
+        ('refund', 'استرداد'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='wallet_transactions', verbose_name='الطالب')
+    kind = models.CharField('نوع الحركة', max_length=20, choices=KIND_CHOICES)
+    # المبلغ دائماً موجب - اتجاه أثره على الرصيد يحدده النوع (wallet.EFFECTS)
+    amount = models.DecimalField('المبلغ', max_digits=10, decimal_places=2)
+    reference = models.CharField('المرجع', max_length=100, blank=True)
+    note = models.CharField('ملاحظة', max_length=255, blank=True)
+    created_at = models.DateTimeField('تاريخ الحركة', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'حركة محفظة'
+        verbose_name_plural = 'حركات المحفظة'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['student', 'created_at'], name='wallet_tx_student_idx'),
+            models.Index(fields=['created_at'], name='wallet_tx_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} - {self.student_id}"
+
+
+class WalletSnapshot(models.Model):
+    """لقطة دورية للرصيد: قيم الطالب بعد كل الحركات قبل as_of - الرصيد في أي وقت = لقطة + ذيل قصير"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='wallet_snapshots', verbose_name='الطالب')
+    as_of = models.DateTimeField('حتى تاريخ')
+    balance = models.DecimalField('رصيد المحفظة', max_digits=10, decimal_places=2, default=0)
+    total_spent = models.DecimalField('إجمالي المنصرف', max_digits=10, decimal_places=2, default=0)
+    bonus_balance = models.DecimalField('رصيد الإهداءات', max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'لقطة رصيد'
+        verbose_name_plural = 'لقطات الرصيد'
+        unique_together = ['student', 'as_of']
+
+    def __str__(self):
+        return f"{self.student_id} @ {self.as_of}: {self.balance}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    مفتاح Idempotency-Key واستجابة أول طلب به (edu_platform/idempotency.py).
+    يُكتب في نفس معاملة الطلب: لو ثُبت العمل ثُبت المفتاح معه، والمفتاح الفريد يمنع تنفيذه مرتين من أي عملية.
+    """
+    # sha256(كوكي الجلسة | الدالة)
+    scope = models.CharField('النطاق', max_length=64)
+    key = models.CharField('المفتاح', max_length=255)
+    fingerprint = models.CharField('بصمة الطلب', max_length=64)
+    status_code = models.PositiveSmallIntegerField('كود الاستجابة')
+    content = models.BinaryField('محتوى الاستجابة', default=b'')
+    content_type = models.CharField('نوع المحتوى', max_length=255, blank=True)
+    created_at = models.DateTimeField('تاريخ الطلب', auto_now_add=True)
+    expires_at = models.DateTimeField('ينتهي في', db_index=True)
+
+    class Meta:
+        verbose_name = 'مفتاح Idempotency'
+        verbose_name_plural = 'مفاتيح Idempotency'
+        unique_together = ['scope', 'key']
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
@@ -16,6 +16,8 @@ from decimal import Decimal, InvalidOperation
 from admins.models import Admin  # ✅ استيراد نموذج Admin
 from django.http import HttpResponse
 from .models import Student, WalletSettings
+from edu_platform.uploads import upload_error
+from edu_platform.idempotency import idempotent
 
 # ===============================
 # دوال الطالب الأساسية (محفوظة بالكامل مع تحسينات الأداء)
@@ -34,6 +36,10 @@ def student_register(request):
         # ✅ معالجة رفع الصورة الشخصية
         profile_image = request.FILES.get('profile_image')
 
+        error = upload_error(request)
+        if error:
+            return render(request, 'students/register.html', {'error': error})
+
         if not all([name, phone_number, parent_phone, password, residence, grade, year]):
             return render(request, 'students/register.html', {
                 'error': 'جميع الحقول مطلوبة'
@@ -122,8 +128,10 @@ def student_dashboard(request):
             'course__teacher'
         ).only(
             'course__title',
+            'course__lesson_count',
             'course__teacher__name',
             'amount_paid',
+            'completed_count',
             'enrollment_date',
             'status',
             'progress'
@@ -205,6 +213,7 @@ def student_logout(request):
 # دالة المراسلة الجديدة (مصححة بالكامل)
 # ===============================
 @csrf_exempt
+@idempotent()
 def send_student_message(request):
     """إرسال رسالة من الطالب إلى الإدارة - مصحح بالكامل"""
     if 'student_id' not in request.session:
@@ -0,0 +1,204 @@
+# students/wallet.py - كاتب سجل المحفظة: كل تغيير في الرصيد حركة + تحديث الأعمدة المخزنة في نفس المعاملة
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import Student, WalletSnapshot, WalletTransaction
+
+PROJECTION_FIELDS = ('balance', 'total_spent', 'bonus_balance')
+
+# أثر كل نوع حركة على أعمدة الطالب (المبلغ × الإشارة)
+# الإهداء رصيد قابل للصرف، و bonus_balance إجمالي ما أُهدي للطالب
+EFFECTS = {
+    'topup': {'balance': 1},
+    'purchase': {'balance': -1, 'total_spent': 1},
+    'bonus': {'balance': 1, 'bonus_balance': 1},
+    'refund': {'balance': 1, 'total_spent': -1},
+}
+
+# اللقطة لا تشمل آخر دقائق حتى لا تفوتها حركة بدأت قبلها ولم تُثبت بعد
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, balance):
+        self.balance = balance
+        super().__init__(f'الرصيد غير كافي: {balance}')
+
+
+def _zero():
+    return dict.fromkeys(PROJECTION_FIELDS, Decimal('0'))
+
+
+def _apply(values, kind, amount):
+    for field, sign in EFFECTS[kind].items():
+        values[field] += sign * amount
+    return values
+
+
+def post(student_id, kind, amount, reference='', note=''):
+    """
+    تسجيل حركة وتحديث الرصيد المخزن ذرياً.
+    الخصم شرطي (UPDATE ... WHERE balance >= amount) ويرفع InsufficientFunds بدون أي كتابة.
+    """
+    if kind not in EFFECTS:
+        raise ValueError(f'Unknown wallet transaction kind: {kind}')
+    amount = Decimal(amount)
+    if amount < 0:
+        raise ValueError('Wallet amounts must not be negative')
+
+    effects = EFFECTS[kind]
+    with transaction.atomic():
+        students = Student.objects.filter(pk=student_id)
+        if effects.get('balance', 0) < 0:
+            students = students.filter(balance__gte=amount)
+        updated = students.update(**{field: F(field) + sign * amount for field, sign in effects.items()})
+        if not updated:
+            balance = Student.objects.filter(pk=student_id).values_list('balance', flat=True).first()
+            if balance is None:
+                raise Student.DoesNotExist
+            raise InsufficientFunds(balance)
+        return WalletTransaction.objects.create(
+            student_id=student_id, kind=kind, amount=amount, reference=reference, note=note,
+        )
+
+
+def post_many(kind, entries, note='', batch_size=500):
+    """
+    إيداع دفعة حركات [(student_id, amount, reference)] لنوع واحد:
+    UPDATE واحد بـ CASE لكل دفعة طلاب + bulk_create للحركات، في معاملة واحدة.
+    """
+    effects = EFFECTS[kind]
+    if any(sign < 0 for sign in effects.values()):
+        raise ValueError(f'Bulk posting supports credits only, not {kind}')
+
+    totals = defaultdict(Decimal)
+    for student_id, amount, _ in entries:
+        if amount < 0:
+            raise ValueError('Wallet amounts must not be negative')
+        totals[student_id] += amount
+
+    student_ids = list(totals)
+    with transaction.atomic():
+        for start in range(0, len(student_ids), batch_size):
+            chunk = student_ids[start:start + batch_size]
+            credit = Case(
+                *[When(pk=student_id, then=Value(totals[student_id])) for student_id in chunk],
+                default=Value(Decimal('0')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+            Student.objects.filter(pk__in=chunk).update(
+                **{field: F(field) + credit for field in effects}
+            )
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(student_id=student_id, kind=kind, amount=amount, reference=reference, note=note)
+                for student_id, amount, reference in entries
+            ],
+            batch_size=batch_size,
+        )
+    return len(entries)
+
+
+def _latest_snapshots(student_ids, before=None):
+    """آخر لقطة لكل طالب (قبل تاريخ معين اختيارياً) - استعلامان لكل دفعة"""
+    snapshots = WalletSnapshot.objects.filter(student=OuterRef('pk'))
+    if before is not None:
+        snapshots = snapshots.filter(as_of__lte=before)
+    latest_ids = (
+        Student.objects.filter(pk__in=student_ids)
+        .annotate(snapshot_id=Subquery(snapshots.order_by('-as_of').values('id')[:1]))
+        .exclude(snapshot_id=None)
+        .values_list('snapshot_id', flat=True)
+    )
+    return {snapshot.student_id: snapshot for snapshot in WalletSnapshot.objects.filter(id__in=list(latest_ids))}
+
+
+def _tail_totals(transactions):
+    """مجموع أثر الحركات لكل طالب: {student_id: {balance, total_spent, bonus_balance}}"""
+    totals = defaultdict(_zero)
+    for student_id, kind, amount in (
+        transactions.order_by().values('student_id', 'kind').annotate(total=Sum('amount'))
+        .values_list('student_id', 'kind', 'total')
+    ):
+        _apply(totals[student_id], kind, amount)
+    return totals
+
+
+def balance_at(student_id, at):
+    """قيم محفظة الطالب في لحظة معينة = آخر لقطة قبلها + حركات ما بعد اللقطة حتى تلك اللحظة"""
+    snapshot = _latest_snapshots([student_id], before=at).get(student_id)
+    transactions = WalletTransaction.objects.filter(student_id=student_id, created_at__lte=at)
+    values = _zero()
+    if snapshot is not None:
+        values = {field: getattr(snapshot, field) for field in PROJECTION_FIELDS}
+        transactions = transactions.filter(created_at__gte=snapshot.as_of)
+    for field, amount in _tail_totals(transactions).get(student_id, {}).items():
+        values[field] += amount
+    return values
+
+
+def take_snapshots(batch_size=1000, dry_run=False):
+    """
+    لقطة جديدة لكل طالب له حركات منذ آخر تشغيل: لقطته السابقة + مجموع حركات النافذة.
+    النوافذ متصلة (من as_of السابق حتى الآن - SNAPSHOT_LAG) فلا تُحسب حركة مرتين ولا تفوت.
+    """
+    cutoff = timezone.now() - SNAPSHOT_LAG
+    since = WalletSnapshot.objects.aggregate(last=Max('as_of'))['last']
+    if since is not None and since >= cutoff:
+        return 0
+
+    window = WalletTransaction.objects.filter(created_at__lt=cutoff)
+    if since is not None:
+        window = window.filter(created_at__gte=since)
+    totals = _tail_totals(window)
+
+    student_ids = list(totals)
+    created = 0
+    for start in range(0, len(student_ids), batch_size):
+        chunk = student_ids[start:start + batch_size]
+        previous = _latest_snapshots(chunk)
+        snapshots = []
+        for student_id in chunk:
+            values = _zero()
+            if student_id in previous:
+                values = {field: getattr(previous[student_id], field) for field in PROJECTION_FIELDS}
+            for field, amount in totals[student_id].items():
+                values[field] += amount
+            snapshots.append(WalletSnapshot(student_id=student_id, as_of=cutoff, **values))
+        if not dry_run:
+            WalletSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+        created += len(snapshots)
+    return created
+
+
+def verify_projection(batch_size=1000):
+    """
+    مقارنة الأعمدة المخزنة بـ (آخر لقطة + الحركات بعد آخر تشغيل) لكل الطلاب.
+    يرجع قائمة (student_id, القيم المخزنة, القيم المحسوبة) للمختلف فقط.
+    """
+    since = WalletSnapshot.objects.aggregate(last=Max('as_of'))['last']
+    tail = WalletTransaction.objects.all()
+    if since is not None:
+        tail = tail.filter(created_at__gte=since)
+    totals = _tail_totals(tail)
+
+    mismatches = []
+    student_ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(student_ids), batch_size):
+        chunk = student_ids[start:start + batch_size]
+        snapshots = _latest_snapshots(chunk)
+        for student_id, *stored in Student.objects.filter(pk__in=chunk).values_list('id', *PROJECTION_FIELDS):
+            expected = _zero()
+            if student_id in snapshots:
+                expected = {field: getattr(snapshots[student_id], field) for field in PROJECTION_FIELDS}
+            for field, amount in totals.get(student_id, {}).items():
+                expected[field] += amount
+            stored = dict(zip(PROJECTION_FIELDS, stored))
+            if stored != expected:
+                mismatches.append((student_id, stored, expected))
+    return mismatches
@@ -4,10 +4,11 @@ from django.http import HttpResponseRedirect
 from django.utils.html import format_html
 from django.urls import path
 from django.db.models import Count
+from edu_platform.uploads import UploadGuardAdminMixin
 from .models import Teacher
 
 @admin.register(Teacher)
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(UploadGuardAdminMixin, admin.ModelAdmin):
     list_display = [
         'name', 
         'phone_number', 
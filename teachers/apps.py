@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TeachersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teachers'
+
+    def ready(self):
+        from courses.fragments import teacher_images_ready
+        from edu_platform import images
+        # الصورة الشخصية فقط تُعرض بنسخ متعددة المقاسات (بطاقات الصفحة الرئيسية) - الشهادة لا تُعرض
+        images.register(self.get_model('Teacher'), 'profile_image', on_ready=teacher_images_ready)
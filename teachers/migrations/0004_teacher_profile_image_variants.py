@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+def mark_existing_variants(apps, schema_editor):
+    # الصور التي وُلدت نسخها قبل هذا الحقل (آخر نسخة تُكتب في generate_variants موجودة)
+    from edu_platform.images import FORMATS, VARIANTS, variant_name
+    Teacher = apps.get_model('teachers', 'Teacher')
+    storage = Teacher._meta.get_field('profile_image').storage
+    ready = [
+        Teacher(id=row_id, profile_image_variants=name)
+        for row_id, name in Teacher.objects.exclude(profile_image='').values_list('id', 'profile_image').iterator()
+        if storage.exists(variant_name(name, list(VARIANTS)[-1], list(FORMATS)[-1]))
+    ]
+    Teacher.objects.bulk_update(ready, ['profile_image_variants'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0003_teacher_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='profile_image_variants',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(mark_existing_variants, migrations.RunPython.noop),
+    ]
@@ -49,6 +49,8 @@ class Teacher(models.Model):
         upload_to='teachers/profiles/', 
         default='default_profile.jpg'
     )
+    # اسم الصورة الشخصية التي اكتملت نسخها المصغرة (edu_platform/images.py)
+    profile_image_variants = models.CharField(max_length=255, blank=True, editable=False)
     certificate_image = models.ImageField(
         'صورة الشهادة', 
         upload_to='teachers/certificates/', 
@@ -74,6 +76,7 @@ class Teacher(models.Model):
     )
     
     created_at = models.DateTimeField('تاريخ التسجيل', auto_now_add=True)
+    updated_at = models.DateTimeField('آخر تحديث', auto_now=True)
 
     def __str__(self):
         return self.name
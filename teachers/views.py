@@ -1,7 +1,10 @@
 # teachers/views.py - محدث ومحسن (بدون نظام المراسلة)
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
-from django.db.models import Avg, Sum, Count
+from django.db.models import Avg, Sum, Count, Max, Q
+from django.views.decorators.http import condition
+from edu_platform.conditional import latest, make_etag
+from edu_platform.uploads import upload_error
 from django.views.decorators.csrf import csrf_exempt
 import json
 from .models import Teacher
@@ -29,6 +32,9 @@ def teacher_register(request):
             certificates = request.POST.get('certificates', '')
             profile_image = request.FILES.get('profile_image')
             certificate_image = request.FILES.get('certificate_image')
+            error = upload_error(request)
+            if error:
+                return render(request, 'teachers/register.html', {'error': error})
             payment_method = request.POST.get('payment_method')
             account_number = request.POST.get('account_number', '')
             profit_percentage = request.POST.get('profit_percentage', 50)
@@ -141,6 +147,32 @@ def teacher_dashboard(request):
             'error': f'حدث خطأ في تحميل البيانات: {str(e)}'
         })
 
+def _teacher_profile_validators(request, teacher_id):
+    """آخر تعديل للمعلم أو أي من كورساته + عدد الكورسات المنشورة - استعلام واحد"""
+    cache_attr = '_teacher_profile_validators'
+    if not hasattr(request, cache_attr):
+        row = Teacher.objects.filter(id=teacher_id).annotate(
+            courses_updated_at=Max('course__updated_at'),
+            published_count=Count('course', filter=Q(course__status='published')),
+        ).values_list('updated_at', 'courses_updated_at', 'published_count').first()
+        setattr(request, cache_attr, row)
+    return getattr(request, cache_attr)
+
+
+def teacher_profile_etag(request, teacher_id):
+    row = _teacher_profile_validators(request, teacher_id)
+    if row is None:
+        return None
+    updated_at, courses_updated_at, published_count = row
+    return make_etag('teacher', teacher_id, updated_at.isoformat(), courses_updated_at and courses_updated_at.isoformat(), published_count)
+
+
+def teacher_profile_last_modified(request, teacher_id):
+    row = _teacher_profile_validators(request, teacher_id)
+    return latest(row[0], row[1]) if row else None
+
+
+@condition(etag_func=teacher_profile_etag, last_modified_func=teacher_profile_last_modified)
 def teacher_profile(request, teacher_id):
     # الكود الأصلي محفوظ مع تحسينات الاستعلام
     teacher = get_object_or_404(